@@ -0,0 +1,38 @@
+"""listing and user coordinates
+
+Revision ID: 09a102d6225e
+Revises: b75a628efad8
+Create Date: 2026-10-18 09:47:31.502117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '09a102d6225e'
+down_revision: Union[str, Sequence[str], None] = 'b75a628efad8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('users', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('surplus_listings', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('surplus_listings', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('surplus_listings', sa.Column('geo_cell', sa.Integer(), nullable=True))
+    op.create_index('ix_surplus_listings_status_geo_cell', 'surplus_listings', ['status', 'geo_cell'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_surplus_listings_status_geo_cell', table_name='surplus_listings')
+    op.drop_column('surplus_listings', 'geo_cell')
+    op.drop_column('surplus_listings', 'longitude')
+    op.drop_column('surplus_listings', 'latitude')
+    op.drop_column('users', 'longitude')
+    op.drop_column('users', 'latitude')
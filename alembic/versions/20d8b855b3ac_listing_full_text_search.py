@@ -0,0 +1,41 @@
+"""listing full text search
+
+Revision ID: 20d8b855b3ac
+Revises: 09a102d6225e
+Create Date: 2026-10-18 10:31:52.804411
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20d8b855b3ac'
+down_revision: Union[str, Sequence[str], None] = '09a102d6225e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.add_column('surplus_listings', sa.Column('search_vector', sa.Text().with_variant(postgresql.TSVECTOR(), 'postgresql'), nullable=True))
+    if dialect == 'postgresql':
+        op.execute("UPDATE surplus_listings SET search_vector = to_tsvector('english', coalesce(description, ''))")
+        op.create_index('ix_surplus_listings_search_vector', 'surplus_listings', ['search_vector'], unique=False, postgresql_using='gin')
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS surplus_listings_fts USING fts5(description, content='')")
+        op.execute("INSERT INTO surplus_listings_fts (rowid, description) SELECT id, coalesce(description, '') FROM surplus_listings")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_surplus_listings_search_vector', table_name='surplus_listings')
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS surplus_listings_fts")
+    op.drop_column('surplus_listings', 'search_vector')
@@ -0,0 +1,81 @@
+"""event seasonality and summaries
+
+Revision ID: 44645473f1eb
+Revises: c6c72f6994aa
+Create Date: 2026-10-18 14:22:50.631847
+
+"""
+from collections import Counter
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '44645473f1eb'
+down_revision: Union[str, Sequence[str], None] = 'c6c72f6994aa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('seasonality', sa.String(length=50), nullable=True))
+    op.create_table('event_stats',
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('seasonality', sa.String(length=50), nullable=False),
+    sa.Column('location', sa.String(length=100), nullable=False),
+    sa.Column('events', sa.Integer(), nullable=False),
+    sa.Column('guest_count', sa.Integer(), nullable=False),
+    sa.Column('ai_savings_kg', sa.Float(), nullable=False),
+    sa.Column('ai_savings_rupees', sa.Float(), nullable=False),
+    sa.Column('listings', sa.Integer(), nullable=False),
+    sa.Column('surplus_kg', sa.Float(), nullable=False),
+    sa.Column('collected_listings', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('event_type', 'seasonality', 'location')
+    )
+    food_type_stats = op.create_table('event_food_type_stats',
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('food_type', sa.String(length=100), nullable=False),
+    sa.Column('events', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('event_type', 'food_type')
+    )
+
+    # Backfill the summaries from existing events and their listings
+    op.execute("""
+        INSERT INTO event_stats (event_type, seasonality, location, events, guest_count,
+                                 ai_savings_kg, ai_savings_rupees, listings, surplus_kg, collected_listings)
+        SELECT COALESCE(e.event_type, 'Unknown'), COALESCE(e.seasonality, 'Unknown'), COALESCE(e.location, 'Unknown'),
+               COUNT(*), COALESCE(SUM(e.guest_count), 0),
+               COALESCE(SUM(e.ai_savings_kg), 0), COALESCE(SUM(e.ai_savings_rupees), 0),
+               COALESCE(SUM(l.listings), 0), COALESCE(SUM(l.surplus_kg), 0), COALESCE(SUM(l.collected), 0)
+        FROM events e
+        LEFT JOIN (
+            SELECT event_id, COUNT(*) AS listings, SUM(quantity_kg) AS surplus_kg,
+                   COUNT(CASE WHEN status = 'collected' THEN 1 END) AS collected
+            FROM surplus_listings WHERE event_id IS NOT NULL GROUP BY event_id
+        ) l ON l.event_id = e.id
+        GROUP BY COALESCE(e.event_type, 'Unknown'), COALESCE(e.seasonality, 'Unknown'), COALESCE(e.location, 'Unknown')
+    """)
+    # food_types is comma-separated, so split the distinct lists here
+    counts = Counter()
+    rows = op.get_bind().execute(sa.text(
+        "SELECT COALESCE(event_type, 'Unknown'), food_types, COUNT(*) FROM events "
+        "WHERE food_types IS NOT NULL GROUP BY COALESCE(event_type, 'Unknown'), food_types"
+    ))
+    for event_type, food_types, events in rows:
+        for food_type in {food_type.strip() for food_type in food_types.split(",") if food_type.strip()}:
+            counts[(event_type, food_type)] += events
+    if counts:
+        op.bulk_insert(food_type_stats, [
+            {'event_type': event_type, 'food_type': food_type, 'events': events}
+            for (event_type, food_type), events in counts.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('event_food_type_stats')
+    op.drop_table('event_stats')
+    op.drop_column('events', 'seasonality')
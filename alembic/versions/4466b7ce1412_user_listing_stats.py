@@ -0,0 +1,71 @@
+"""user listing stats
+
+Revision ID: 4466b7ce1412
+Revises: 7685eb73821e
+Create Date: 2026-10-18 12:20:44.950372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4466b7ce1412'
+down_revision: Union[str, Sequence[str], None] = '7685eb73821e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_listing_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_listings', sa.Integer(), nullable=False),
+    sa.Column('available_listings', sa.Integer(), nullable=False),
+    sa.Column('claimed_listings', sa.Integer(), nullable=False),
+    sa.Column('collected_listings', sa.Integer(), nullable=False),
+    sa.Column('expired_listings', sa.Integer(), nullable=False),
+    sa.Column('total_quantity_kg', sa.Float(), nullable=False),
+    sa.Column('ai_optimized_count', sa.Integer(), nullable=False),
+    sa.Column('ngo_active_claims', sa.Integer(), nullable=False),
+    sa.Column('ngo_collections', sa.Integer(), nullable=False),
+    sa.Column('ngo_collected_kg', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Backfill from the listings; python -m backend.rebuild_stats recomputes the same numbers
+    op.execute("""
+        INSERT INTO user_listing_stats (user_id, total_listings, available_listings, claimed_listings,
+                                        collected_listings, expired_listings, total_quantity_kg, ai_optimized_count,
+                                        ngo_active_claims, ngo_collections, ngo_collected_kg)
+        SELECT u.id,
+               COALESCE(o.total, 0), COALESCE(o.available, 0), COALESCE(o.claimed, 0),
+               COALESCE(o.collected, 0), COALESCE(o.expired, 0), COALESCE(o.quantity_kg, 0), COALESCE(o.ai_optimized, 0),
+               COALESCE(n.active_claims, 0), COALESCE(n.collections, 0), COALESCE(n.collected_kg, 0)
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total,
+                   COUNT(CASE WHEN status = 'available' THEN 1 END) AS available,
+                   COUNT(CASE WHEN status = 'claimed' THEN 1 END) AS claimed,
+                   COUNT(CASE WHEN status = 'collected' THEN 1 END) AS collected,
+                   COUNT(CASE WHEN status = 'expired' THEN 1 END) AS expired,
+                   SUM(quantity_kg) AS quantity_kg,
+                   COUNT(CASE WHEN ai_optimized THEN 1 END) AS ai_optimized
+            FROM surplus_listings WHERE user_id IS NOT NULL GROUP BY user_id
+        ) o ON o.user_id = u.id
+        LEFT JOIN (
+            SELECT claimed_by_id,
+                   COUNT(CASE WHEN status = 'claimed' THEN 1 END) AS active_claims,
+                   COUNT(CASE WHEN status = 'collected' THEN 1 END) AS collections,
+                   SUM(CASE WHEN status = 'collected' THEN quantity_kg ELSE 0 END) AS collected_kg
+            FROM surplus_listings WHERE claimed_by_id IS NOT NULL GROUP BY claimed_by_id
+        ) n ON n.claimed_by_id = u.id
+        WHERE o.user_id IS NOT NULL OR n.claimed_by_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_listing_stats')
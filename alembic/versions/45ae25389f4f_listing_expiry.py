@@ -0,0 +1,47 @@
+"""listing expiry
+
+Revision ID: 45ae25389f4f
+Revises: 20d8b855b3ac
+Create Date: 2026-10-18 11:05:17.331960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from backend.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '45ae25389f4f'
+down_revision: Union[str, Sequence[str], None] = '20d8b855b3ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('surplus_listings', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_surplus_listings_status_expires', 'surplus_listings', ['status', 'expires_at'], unique=False)
+    # Give listings that are already available the default shelf life, so the
+    # sweeper expires them like new ones
+    hours = settings.LISTING_DEFAULT_TTL_HOURS
+    if hours <= 0:
+        return
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        expires_at = f"created_at + interval '{hours} hours'"
+    elif dialect == 'sqlite':
+        expires_at = f"datetime(created_at, '+{hours} hours')"
+    else:
+        expires_at = f"DATE_ADD(created_at, INTERVAL {hours} HOUR)"
+    op.execute(
+        f"UPDATE surplus_listings SET expires_at = {expires_at} "
+        "WHERE status = 'available' AND expires_at IS NULL AND created_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_surplus_listings_status_expires', table_name='surplus_listings')
+    op.drop_column('surplus_listings', 'expires_at')
@@ -0,0 +1,28 @@
+"""listing claimer index
+
+Revision ID: 56c03eb26bde
+Revises: 44645473f1eb
+Create Date: 2026-10-18 14:58:09.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '56c03eb26bde'
+down_revision: Union[str, Sequence[str], None] = '44645473f1eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_surplus_listings_claimer_created_id', 'surplus_listings', ['claimed_by_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_surplus_listings_claimer_created_id', table_name='surplus_listings')
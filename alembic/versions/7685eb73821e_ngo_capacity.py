@@ -0,0 +1,28 @@
+"""ngo capacity
+
+Revision ID: 7685eb73821e
+Revises: 45ae25389f4f
+Create Date: 2026-10-18 11:42:09.671205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7685eb73821e'
+down_revision: Union[str, Sequence[str], None] = '45ae25389f4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('capacity_kg', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'capacity_kg')
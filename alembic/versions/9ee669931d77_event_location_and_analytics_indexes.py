@@ -0,0 +1,32 @@
+"""event location and analytics indexes
+
+Revision ID: 9ee669931d77
+Revises: 4466b7ce1412
+Create Date: 2026-10-18 13:05:12.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9ee669931d77'
+down_revision: Union[str, Sequence[str], None] = '4466b7ce1412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('events', sa.Column('location', sa.String(length=100), nullable=True))
+    op.create_index('ix_events_type_location', 'events', ['event_type', 'location'], unique=False)
+    op.create_index('ix_surplus_listings_event_created', 'surplus_listings', ['event_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_surplus_listings_event_created', table_name='surplus_listings')
+    op.drop_index('ix_events_type_location', table_name='events')
+    op.drop_column('events', 'location')
@@ -0,0 +1,28 @@
+"""event owner index
+
+Revision ID: b3f1c9d27e4a
+Revises: 56c03eb26bde
+Create Date: 2026-10-18 16:42:08.113504
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1c9d27e4a'
+down_revision: Union[str, Sequence[str], None] = '56c03eb26bde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_user_food_types', 'events', ['user_id', 'food_types'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_user_food_types', table_name='events')
@@ -0,0 +1,34 @@
+"""listing keyset indexes
+
+Revision ID: b75a628efad8
+Revises: f5942e177f14
+Create Date: 2026-10-18 09:12:04.118231
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b75a628efad8'
+down_revision: Union[str, Sequence[str], None] = 'f5942e177f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_surplus_listings_created_id', 'surplus_listings', ['created_at', 'id'], unique=False)
+    op.create_index('ix_surplus_listings_status_created_id', 'surplus_listings', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_surplus_listings_owner_created_id', 'surplus_listings', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_surplus_listings_status_quantity', 'surplus_listings', ['status', 'quantity_kg'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_surplus_listings_status_quantity', table_name='surplus_listings')
+    op.drop_index('ix_surplus_listings_owner_created_id', table_name='surplus_listings')
+    op.drop_index('ix_surplus_listings_status_created_id', table_name='surplus_listings')
+    op.drop_index('ix_surplus_listings_created_id', table_name='surplus_listings')
@@ -0,0 +1,32 @@
+"""change versions
+
+Revision ID: c6c72f6994aa
+Revises: 9ee669931d77
+Create Date: 2026-10-18 13:41:37.205519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6c72f6994aa'
+down_revision: Union[str, Sequence[str], None] = '9ee669931d77'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_versions',
+    sa.Column('scope', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('change_versions')
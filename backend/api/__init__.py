@@ -1,47 +1,38 @@
-import os
-import joblib
-import numpy as np
-
-# Load model, encoder, scaler from backend directory
-MODEL_DIR = os.path.join(os.path.dirname(__file__), '..')
-try:
-    rf_model = joblib.load(os.path.join(MODEL_DIR, 'rf_model.pkl'))
-    encoder = joblib.load(os.path.join(MODEL_DIR, 'encoder.pkl'))
-    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
-    print("✅ ML models loaded successfully")
-except Exception as e:
-    print(f"❌ Error loading models: {e}")
-    # Fallback to dummy models for now
-    rf_model = None
-    encoder = None
-    scaler = None
-
-# Helper function for prediction
-def predict_wastage(input_dict):
-    if rf_model is None or encoder is None or scaler is None:
-        # Fallback to dummy prediction
-        return 5.0  # Dummy wastage prediction
-    
-    cat_features = ['Type of Food', 'Event Type', 'Seasonality', 'Geographical Location']
-    num_features = ['Number of Guests', 'Quantity of Food']
-    # 1. Encode categoricals
-    X_cat = encoder.transform([[input_dict[feat] for feat in cat_features]])
-    # 2. Scale numerics
-    X_num = scaler.transform([[input_dict[feat] for feat in num_features]])
-    # 3. Combine
-    X_full = np.concatenate([X_cat, X_num], axis=1)
-    # 4. Predict
-    pred = rf_model.predict(X_full)
-    return float(pred[0])
-
-from fastapi import APIRouter, Depends, HTTPException, status
+from ..model_registry import CAT_FEATURES, NUM_FEATURES, model_registry
+
+# Load the active model version (or the pickles in backend/) at import
+model_registry.load_initial()
+
+# Helper functions for prediction
+def predict_wastage_batch(input_dicts, model=None):
+    """Predict wastage for many inputs with ``model`` (default: the one being served)."""
+    return (model or model_registry.current).predict(input_dicts)
+
+import base64
+import datetime
+import hashlib
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from .auth import router as auth_router
+from .stream import router as stream_router
+from .matching import router as matching_router
+from .export import router as export_router
+from .model_admin import router as model_admin_router
 from .. import schemas, crud, models
+from ..cache import LRUCacheBackend, TTLCache, cache
+from ..inference import InferenceQueueFull, create_inference_executor
+from ..config import settings
 from ..database import SessionLocal
 
 router = APIRouter()
 router.include_router(auth_router)
+router.include_router(stream_router)
+router.include_router(matching_router)
+router.include_router(export_router)
+router.include_router(model_admin_router)
 
 # Dependency for DB
 
@@ -54,6 +45,20 @@ def get_db():
 
 # --- Surplus Listing Endpoints ---
 
+def listing_validation_error(listing: schemas.SurplusListingCreate):
+    """Return why a listing is rejected, or None if it is valid."""
+    if listing.quantity_kg <= 0:
+        return "Quantity must be greater than 0"
+    if not listing.description or len(listing.description.strip()) < 5:
+        return "Description must be at least 5 characters long"
+    return None
+
+def with_owner_location(listing: schemas.SurplusListingCreate, user: models.User):
+    # Listings without their own coordinates are placed at the owner's location
+    if listing.latitude is None and user.latitude is not None:
+        return listing.model_copy(update={"latitude": user.latitude, "longitude": user.longitude})
+    return listing
+
 @router.post("/surplus-listings", response_model=schemas.SurplusListingResponse)
 def create_surplus_listing(listing: schemas.SurplusListingCreate, user_id: int, db: Session = Depends(get_db)):
     try:
@@ -63,35 +68,205 @@ def create_surplus_listing(listing: schemas.SurplusListingCreate, user_id: int,
             raise HTTPException(status_code=404, detail="User not found")
         
         # Validate listing data
-        if listing.quantity_kg <= 0:
-            raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
+        error = listing_validation_error(listing)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         
-        if not listing.description or len(listing.description.strip()) < 5:
-            raise HTTPException(status_code=400, detail="Description must be at least 5 characters long")
-        
-        result = crud.create_surplus_listing(db, listing, user_id=user_id)
+        result = crud.create_surplus_listing(db, with_owner_location(listing, user), user_id=user_id)
         return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating listing: {str(e)}")
 
+MAX_BULK_LISTINGS = 500
+
+@router.post("/surplus-listings/bulk", response_model=schemas.BulkSurplusListingResponse)
+def create_surplus_listings_bulk(listings: list[dict], user_id: int, db: Session = Depends(get_db)):
+    """Create many listings in one transaction.
+
+    Items are validated one by one; invalid items are reported in ``errors``
+    by their position and the remaining items are still inserted.
+    """
+    if len(listings) > MAX_BULK_LISTINGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_LISTINGS} listings per request")
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        errors = []
+        parsed = []
+        for index, item in enumerate(listings):
+            try:
+                listing = schemas.SurplusListingCreate(**item)
+            except ValidationError as e:
+                detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                errors.append(schemas.BulkListingError(index=index, detail=detail))
+                continue
+            error = listing_validation_error(listing)
+            if error:
+                errors.append(schemas.BulkListingError(index=index, detail=error))
+                continue
+            parsed.append((index, with_owner_location(listing, user)))
+        
+        # Check referenced events up front so one bad foreign key cannot abort the batch
+        event_ids = {listing.event_id for _, listing in parsed if listing.event_id is not None}
+        if event_ids:
+            known_events = {row.id for row in db.query(models.Event.id).filter(models.Event.id.in_(event_ids))}
+            valid = []
+            for index, listing in parsed:
+                if listing.event_id is not None and listing.event_id not in known_events:
+                    errors.append(schemas.BulkListingError(index=index, detail="Event not found"))
+                else:
+                    valid.append((index, listing))
+            parsed = valid
+        
+        created_ids = crud.create_surplus_listings_bulk(db, [listing for _, listing in parsed], user_id=user_id)
+        errors.sort(key=lambda error: error.index)
+        return schemas.BulkSurplusListingResponse(created_ids=created_ids, errors=errors)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating listings: {str(e)}")
+
+# Keyset cursors are the (created_at, id) of the last row served, base64 encoded
+# so clients treat them as opaque.
+
+def encode_listing_cursor(listing) -> str:
+    raw = f"{listing.created_at.isoformat()}|{listing.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_listing_cursor(cursor: str):
+    try:
+        created_at, listing_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), int(listing_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Conditional GETs: the ETag combines the change versions of the scopes a
+# response depends on with a hash of the query string, so a matching
+# If-None-Match is answered with 304 before the main query runs.
+
+def listing_etag(db: Session, request: Request, *scopes):
+    versions = crud.get_change_versions(db, scopes)
+    query_hash = hashlib.blake2s(request.url.query.encode(), digest_size=6).hexdigest()
+    return 'W/"' + ".".join(str(versions[scope]) for scope in scopes) + f'-{query_hash}"'
+
+def etag_matches(etag: str, if_none_match: Optional[str]):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+def conditional_get(db: Session, request: Request, response: Response, if_none_match: Optional[str], *scopes):
+    """Return a 304 response if the client's copy is current, else set the ETag and return None."""
+    etag = listing_etag(db, request, *scopes)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
 @router.get("/surplus-listings", response_model=list[schemas.SurplusListingResponse])
-def list_surplus_listings(db: Session = Depends(get_db)):
+def list_surplus_listings(
+    request: Request,
+    response: Response,
+    status: Optional[str] = "available",
+    owner_id: Optional[int] = None,
+    claimed_by: Optional[int] = None,
+    min_quantity_kg: Optional[float] = None,
+    created_after: Optional[datetime.datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """List listings newest first, one page at a time.
+
+    Defaults to available listings; pass ``status=all`` for every status and
+    ``claimed_by`` for one NGO's claims. When
+    more rows remain, the ``X-Next-Cursor`` header carries the cursor for the
+    next page. Supports conditional GETs via ``ETag``/``If-None-Match``.
+    """
+    after = decode_listing_cursor(cursor) if cursor else None
+    not_modified = conditional_get(db, request, response, if_none_match, crud.LISTINGS_SCOPE)
+    if not_modified:
+        return not_modified
     try:
-        listings = db.query(models.SurplusListing).all()
+        listings = crud.list_surplus_listings(
+            db,
+            status=None if status == "all" else status,
+            user_id=owner_id,
+            claimed_by_id=claimed_by,
+            min_quantity_kg=min_quantity_kg,
+            created_after=created_after,
+            after=after,
+            limit=limit
+        )
+        if len(listings) == limit:
+            response.headers["X-Next-Cursor"] = encode_listing_cursor(listings[-1])
         return listings
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching listings: {str(e)}")
 
+@router.get("/surplus-listings/nearby", response_model=list[schemas.NearbySurplusListingResponse])
+def list_nearby_surplus_listings(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(10, gt=0, le=200),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """List available listings within ``radius_km`` of a point, nearest first."""
+    try:
+        nearby = crud.list_nearby_surplus_listings(db, lat, lon, radius_km, limit=limit)
+        return [
+            schemas.NearbySurplusListingResponse(
+                **schemas.SurplusListingResponse.model_validate(listing, from_attributes=True).model_dump(),
+                distance_km=distance
+            )
+            for listing, distance in nearby
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching nearby listings: {str(e)}")
+
+@router.get("/surplus-listings/search", response_model=list[schemas.SurplusListingResponse])
+def search_surplus_listings(
+    q: str = Query(..., min_length=2, max_length=200),
+    status: Optional[str] = "available",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over listing descriptions, ranked by relevance."""
+    try:
+        return crud.search_surplus_listings(
+            db, q,
+            status=None if status == "all" else status,
+            limit=limit,
+            offset=offset
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching listings: {str(e)}")
+
 @router.get("/surplus-listings/mine", response_model=list[schemas.SurplusListingResponse])
-def list_my_surplus_listings(user_id: int, db: Session = Depends(get_db)):
+def list_my_surplus_listings(
+    user_id: int,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    # Validate user exists, before a matching ETag can answer for an unknown user
+    if not db.query(models.User.id).filter(models.User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+    not_modified = conditional_get(db, request, response, if_none_match, crud.user_listings_scope(user_id))
+    if not_modified:
+        return not_modified
     try:
-        # Validate user exists
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
         listings = db.query(models.SurplusListing).filter(
             models.SurplusListing.user_id == user_id
         ).all()
@@ -105,20 +280,16 @@ def list_my_surplus_listings(user_id: int, db: Session = Depends(get_db)):
 def claim_surplus_listing(listing_id: int, ngo_id: int, db: Session = Depends(get_db)):
     try:
         # Validate NGO exists
-        ngo = db.query(models.User).filter(models.User.id == ngo_id).first()
-        if not ngo or ngo.role != "ngo":
+        if crud.get_user_role(db, ngo_id) != "ngo":
             raise HTTPException(status_code=400, detail="Invalid NGO user")
         
-        listing = db.query(models.SurplusListing).filter(models.SurplusListing.id == listing_id).first()
-        if not listing:
-            raise HTTPException(status_code=404, detail="Listing not found")
-        if listing.status != "available":
+        listing = crud.claim_surplus_listing(db, listing_id, ngo_id)
+        if listing is None:
+            # Only the losing path pays for telling "missing" from "taken"
+            exists = db.query(models.SurplusListing.id).filter(models.SurplusListing.id == listing_id).first()
+            if not exists:
+                raise HTTPException(status_code=404, detail="Listing not found")
             raise HTTPException(status_code=400, detail="Listing not available")
-        
-        listing.status = "claimed"
-        listing.claimed_by_id = ngo_id
-        db.commit()
-        db.refresh(listing)
         return listing
     except HTTPException:
         raise
@@ -127,31 +298,113 @@ def claim_surplus_listing(listing_id: int, ngo_id: int, db: Session = Depends(ge
 
 @router.patch("/surplus-listings/{listing_id}/collect", response_model=schemas.SurplusListingResponse)
 def collect_surplus_listing(listing_id: int, db: Session = Depends(get_db)):
-    listing = db.query(models.SurplusListing).filter(models.SurplusListing.id == listing_id).first()
-    if not listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    if listing.status != "claimed":
+    listing = crud.collect_surplus_listing(db, listing_id)
+    if listing is None:
+        exists = db.query(models.SurplusListing.id).filter(models.SurplusListing.id == listing_id).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Listing not found")
         raise HTTPException(status_code=400, detail="Listing not claimed yet")
-    listing.status = "collected"
-    db.commit()
-    db.refresh(listing)
     return listing
 
+# --- Event Endpoints ---
+
+@router.post("/events", response_model=schemas.EventResponse)
+def create_event(event: schemas.EventCreate, user_id: int, db: Session = Depends(get_db)):
+    try:
+        user = db.query(models.User.id).filter(models.User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        if event.guest_count <= 0:
+            raise HTTPException(status_code=400, detail="Guest count must be greater than 0")
+        return crud.create_event(db, event, user_id=user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating event: {str(e)}")
+
 # Real ML model predictive logic
 
-def run_predictive_shorting(request: schemas.PredictiveShortingRequest) -> schemas.PredictiveShortingResponse:
-    # Prepare input for the model
-    input_dict = {
-        'Type of Food': request.food_types.split(',')[0],  # Use first food type
-        'Event Type': request.event_type,
-        'Seasonality': request.seasonality,
-        'Geographical Location': request.location,
-        'Number of Guests': request.guest_count,
-        'Quantity of Food': request.quantity_of_food
-    }
-    
-    # Get prediction from ML model
-    predicted_wastage_kg = predict_wastage(input_dict)
+# Users re-run the same prediction while tweaking the form, so predictions are
+# memoized on the normalized feature tuple; the model version is part of the
+# key. Numeric inputs are exact by default. Optional buckets round them before
+# predicting, so every request in a bucket gets the same answer.
+
+prediction_cache = TTLCache(LRUCacheBackend(max_entries=settings.PREDICTION_CACHE_SIZE))
+_prediction_cache_version = model_registry.current.version
+
+def bucketed(value, bucket):
+    if not bucket or bucket <= 0:
+        return value
+    return round(value / bucket) * bucket
+
+def normalize_features(input_dict):
+    normalized = {feat: str(input_dict[feat]).strip() for feat in CAT_FEATURES}
+    normalized['Number of Guests'] = int(bucketed(input_dict['Number of Guests'], settings.PREDICTION_CACHE_GUEST_BUCKET))
+    normalized['Quantity of Food'] = float(bucketed(input_dict['Quantity of Food'], settings.PREDICTION_CACHE_QUANTITY_BUCKET_KG))
+    return normalized
+
+def cached_predict_wastage_batch(input_dicts, model):
+    """``predict_wastage_batch`` through the prediction cache; only misses reach the model."""
+    global _prediction_cache_version
+    version = model.version
+    if version != _prediction_cache_version:
+        # A new model was loaded: nothing cached for the old one is reusable
+        prediction_cache.invalidate()
+        _prediction_cache_version = version
+    normalized = {}
+    keys = []
+    for input_dict in input_dicts:
+        features = normalize_features(input_dict)
+        key = "|".join([version] + [str(features[feat]) for feat in CAT_FEATURES + NUM_FEATURES])
+        normalized[key] = features
+        keys.append(key)
+    return prediction_cache.get_many(
+        keys,
+        settings.PREDICTION_CACHE_TTL_SECONDS,
+        lambda missing: predict_wastage_batch([normalized[key] for key in missing], model)
+    )
+
+def allocate_food_types(request: schemas.PredictiveShortingRequest):
+    """Split the event's guests and planned quantity evenly across its food types.
+
+    Returns (food_type, guest_count, quantity_of_food) per distinct type;
+    guest counts are whole and still add up to the event's total.
+    """
+    food_types = list(dict.fromkeys(crud.split_food_types(request.food_types)))
+    guests_each, extra_guests = divmod(request.guest_count, len(food_types))
+    quantity_each = request.quantity_of_food / len(food_types)
+    return [
+        (food_type, guests_each + (1 if index < extra_guests else 0), quantity_each)
+        for index, food_type in enumerate(food_types)
+    ]
+
+def shorting_inputs(request: schemas.PredictiveShortingRequest):
+    # Prepare one model input per food type on the menu
+    return [
+        {
+            'Type of Food': food_type,
+            'Event Type': request.event_type,
+            'Seasonality': request.seasonality,
+            'Geographical Location': request.location,
+            'Number of Guests': guest_count,
+            'Quantity of Food': quantity_of_food
+        }
+        for food_type, guest_count, quantity_of_food in allocate_food_types(request)
+    ]
+
+def shorting_response(request: schemas.PredictiveShortingRequest, inputs, predictions, model_version: str) -> schemas.PredictiveShortingResponse:
+    # A food type cannot waste more than was allocated to it, nor less than nothing
+    food_type_breakdown = [
+        schemas.FoodTypeWastage(
+            food_type=input_dict['Type of Food'],
+            guest_count=input_dict['Number of Guests'],
+            quantity_of_food=input_dict['Quantity of Food'],
+            predicted_wastage_kg=min(max(predicted, 0.0), input_dict['Quantity of Food'])
+        )
+        for input_dict, predicted in zip(inputs, predictions)
+    ]
+    # Event wastage is the sum over its food types, within the food supplied
+    predicted_wastage_kg = min(sum(item.predicted_wastage_kg for item in food_type_breakdown), request.quantity_of_food)
     
     # Calculate suggested shorting (reduce by predicted wastage)
     suggested_shorting_kg = max(0, predicted_wastage_kg * 0.8)  # Suggest reducing by 80% of predicted wastage
@@ -177,87 +430,198 @@ def run_predictive_shorting(request: schemas.PredictiveShortingRequest) -> schem
         suggested_shorting_kg=suggested_shorting_kg,
         ai_suggestion=ai_suggestion,
         estimated_savings_rupees=estimated_savings_rupees,
-        risk_level=risk_level
+        risk_level=risk_level,
+        model_version=model_version,
+        food_type_breakdown=food_type_breakdown
     )
 
+# Predictions run on the inference executor's own threads, batched with other
+# requests that arrive within a few milliseconds
+inference_executor = create_inference_executor(cached_predict_wastage_batch)
+
+async def predict_in_executor(input_dicts, model):
+    try:
+        return await inference_executor.predict(input_dicts, model)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Prediction service is busy, please retry",
+            headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)}
+        )
+
+async def run_predictive_shorting(request: schemas.PredictiveShortingRequest) -> schemas.PredictiveShortingResponse:
+    return (await run_predictive_shorting_batch([request]))[0]
+
+async def run_predictive_shorting_batch(requests: list[schemas.PredictiveShortingRequest]) -> list[schemas.PredictiveShortingResponse]:
+    # Get predictions from ML model; a hot reload mid-request does not affect this one.
+    # Every food type of every event goes through one stacked predict call.
+    model = model_registry.current
+    inputs_per_request = [shorting_inputs(request) for request in requests]
+    predictions = await predict_in_executor([input_dict for inputs in inputs_per_request for input_dict in inputs], model)
+    responses = []
+    start = 0
+    for request, inputs in zip(requests, inputs_per_request):
+        responses.append(shorting_response(request, inputs, predictions[start:start + len(inputs)], model.version))
+        start += len(inputs)
+    return responses
+
 @router.post("/predictive-shorting", response_model=schemas.PredictiveShortingResponse)
-def predictive_shorting(request: schemas.PredictiveShortingRequest):
+async def predictive_shorting(request: schemas.PredictiveShortingRequest):
     """Run predictive shorting for food waste minimization."""
-    return run_predictive_shorting(request)
+    return await run_predictive_shorting(request)
+
+MAX_SHORTING_BATCH = 500
+
+@router.post("/predictive-shorting/batch", response_model=list[schemas.PredictiveShortingResponse])
+async def predictive_shorting_batch(requests: list[schemas.PredictiveShortingRequest]):
+    """Run predictive shorting for many events at once.
+
+    Every food type of every event is encoded, scaled and predicted as one
+    stacked matrix; responses come back in request order.
+    """
+    if len(requests) > MAX_SHORTING_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SHORTING_BATCH} events per request")
+    return await run_predictive_shorting_batch(requests)
 
 # Dashboard Statistics Endpoints
+
+def dashboard_stats(stats: models.UserListingStats):
+    """Owner dashboard numbers from a user's rollup row."""
+    # Calculate statistics
+    total_listings = stats.total_listings
+    active_listings = stats.available_listings
+    claimed_listings = stats.claimed_listings
+    collected_listings = stats.collected_listings
+    
+    total_quantity = stats.total_quantity_kg
+    ai_optimized_count = stats.ai_optimized_count
+    
+    # Calculate estimated impact (assuming each kg feeds 4 people)
+    estimated_meals = total_quantity * 4
+    
+    # Calculate savings from AI optimization
+    ai_savings = ai_optimized_count * 50  # Assume ₹50 savings per AI-optimized listing
+    
+    return {
+        "total_donations": total_listings,
+        "active_listings": active_listings,
+        "claimed_listings": claimed_listings,
+        "collected_listings": collected_listings,
+        "total_quantity_kg": total_quantity,
+        "estimated_meals_provided": estimated_meals,
+        "ai_optimized_count": ai_optimized_count,
+        "estimated_savings_rupees": ai_savings,
+        "success_rate": (collected_listings / max(1, total_listings)) * 100
+    }
+
+def recent_activity_item(listing):
+    return {
+        "id": listing.id,
+        "description": listing.description,
+        "quantity_kg": listing.quantity_kg,
+        "status": listing.status,
+        "created_at": listing.created_at,
+        "ai_optimized": listing.ai_optimized
+    }
+
 @router.get("/dashboard/stats/{user_id}")
 def get_dashboard_stats(user_id: int, db: Session = Depends(get_db)):
     """Get dashboard statistics for a user."""
     try:
-        # Get user's surplus listings
-        user_listings = db.query(models.SurplusListing).filter(
-            models.SurplusListing.user_id == user_id
-        ).all()
-        
-        # Calculate statistics
-        total_listings = len(user_listings)
-        active_listings = len([l for l in user_listings if l.status == "available"])
-        claimed_listings = len([l for l in user_listings if l.status == "claimed"])
-        collected_listings = len([l for l in user_listings if l.status == "collected"])
-        
-        total_quantity = sum(l.quantity_kg for l in user_listings)
-        ai_optimized_count = len([l for l in user_listings if l.ai_optimized])
-        
-        # Calculate estimated impact (assuming each kg feeds 4 people)
-        estimated_meals = total_quantity * 4
-        
-        # Calculate savings from AI optimization
-        ai_savings = ai_optimized_count * 50  # Assume ₹50 savings per AI-optimized listing
-        
-        return {
-            "total_donations": total_listings,
-            "active_listings": active_listings,
-            "claimed_listings": claimed_listings,
-            "collected_listings": collected_listings,
-            "total_quantity_kg": total_quantity,
-            "estimated_meals_provided": estimated_meals,
-            "ai_optimized_count": ai_optimized_count,
-            "estimated_savings_rupees": ai_savings,
-            "success_rate": (collected_listings / max(1, total_listings)) * 100
-        }
+        return dashboard_stats(crud.get_user_stats(db, user_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating statistics: {str(e)}")
 
 @router.get("/dashboard/recent-activity/{user_id}")
-def get_recent_activity(user_id: int, db: Session = Depends(get_db)):
+def get_recent_activity(
+    user_id: int,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """Get recent activity for a user."""
+    not_modified = conditional_get(db, request, response, if_none_match, crud.user_listings_scope(user_id))
+    if not_modified:
+        return not_modified
     try:
         # Get recent listings (last 5)
         recent_listings = db.query(models.SurplusListing).filter(
             models.SurplusListing.user_id == user_id
         ).order_by(models.SurplusListing.created_at.desc()).limit(5).all()
         
-        return [
-            {
-                "id": listing.id,
-                "description": listing.description,
-                "quantity_kg": listing.quantity_kg,
-                "status": listing.status,
-                "created_at": listing.created_at,
-                "ai_optimized": listing.ai_optimized
-            }
-            for listing in recent_listings
-        ]
+        return [recent_activity_item(listing) for listing in recent_listings]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching recent activity: {str(e)}")
 
+DASHBOARD_FIELDS = {
+    "ngo": ("stats", "recent_activity", "ngo_analytics", "available_listings"),
+    "default": ("stats", "recent_activity"),
+}
+DASHBOARD_RECENT_LIMIT = 5
+DASHBOARD_AVAILABLE_LIMIT = 50
+
+@router.get("/dashboard/{user_id}")
+def get_dashboard(user_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """Everything a dashboard renders, in one call and at most two queries.
+
+    One query reads the user's role and rollup row, a second fetches the
+    listing pages (recent activity, plus available listings for NGOs) with
+    UNION ALL. ``fields`` is a comma-separated subset of ``stats``,
+    ``recent_activity`` and, for NGOs, ``ngo_analytics`` and
+    ``available_listings``; the default is every field for the role.
+    """
+    user = crud.get_user_with_stats(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    role, stats = user
+    allowed = DASHBOARD_FIELDS.get(role, DASHBOARD_FIELDS["default"])
+    if fields is None:
+        selected = set(allowed)
+    else:
+        selected = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = selected - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields for role {role}: {', '.join(sorted(unknown))}; choose from {', '.join(allowed)}"
+            )
+    try:
+        listing = models.SurplusListing
+        sections = {}
+        if "recent_activity" in selected:
+            # NGOs' activity is what they claimed, everyone else's what they listed
+            owner = listing.claimed_by_id if role == "ngo" else listing.user_id
+            sections["recent_activity"] = ([owner == user_id], DASHBOARD_RECENT_LIMIT)
+        if "available_listings" in selected:
+            sections["available_listings"] = ([listing.status == "available"], DASHBOARD_AVAILABLE_LIMIT)
+        pages = crud.dashboard_listings(db, sections)
+
+        dashboard = {"user_id": user_id, "role": role}
+        if "stats" in selected:
+            dashboard["stats"] = dashboard_stats(stats)
+        if "recent_activity" in selected:
+            dashboard["recent_activity"] = [recent_activity_item(row) for row in pages["recent_activity"]]
+        if "ngo_analytics" in selected:
+            dashboard["ngo_analytics"] = ngo_analytics(stats)
+        if "available_listings" in selected:
+            dashboard["available_listings"] = [
+                schemas.SurplusListingResponse.model_validate(row, from_attributes=True)
+                for row in pages["available_listings"]
+            ]
+        return dashboard
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building dashboard: {str(e)}")
+
 # Analytics Endpoints
 @router.get("/analytics/user/{user_id}")
 def get_user_analytics(user_id: int, db: Session = Depends(get_db)):
     """Get detailed analytics for a specific user."""
     try:
-        # Get user's listings
-        user_listings = db.query(models.SurplusListing).filter(
-            models.SurplusListing.user_id == user_id
-        ).all()
+        # Read the user's rollup row
+        stats = crud.get_user_stats(db, user_id)
         
-        if not user_listings:
+        if not stats.total_listings:
             return {
                 "user_id": user_id,
                 "total_listings": 0,
@@ -272,10 +636,10 @@ def get_user_analytics(user_id: int, db: Session = Depends(get_db)):
             }
         
         # Calculate metrics
-        total_listings = len(user_listings)
-        total_quantity = sum(l.quantity_kg for l in user_listings)
-        collected_listings = len([l for l in user_listings if l.status == "collected"])
-        ai_optimized_listings = len([l for l in user_listings if l.ai_optimized])
+        total_listings = stats.total_listings
+        total_quantity = stats.total_quantity_kg
+        collected_listings = stats.collected_listings
+        ai_optimized_listings = stats.ai_optimized_count
         
         success_rate = (collected_listings / total_listings) * 100 if total_listings > 0 else 0
         ai_optimization_rate = (ai_optimized_listings / total_listings) * 100 if total_listings > 0 else 0
@@ -298,171 +662,340 @@ def get_user_analytics(user_id: int, db: Session = Depends(get_db)):
             "success_rate": success_rate,
             "ai_optimization_rate": ai_optimization_rate,
             "avg_listing_size": avg_listing_size,
-            "most_common_food_types": ["Mixed", "Vegetables", "Grains"],  # Placeholder
-            "peak_activity_hours": [10, 14, 18],  # Placeholder
+            "most_common_food_types": crud.popular_food_types(db, models.Event.user_id == user_id),
+            "peak_activity_hours": crud.peak_activity_hours(db, models.SurplusListing.user_id == user_id),
             "total_savings_rupees": total_savings,
             "impact_score": impact_score
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating user analytics: {str(e)}")
 
+def compute_platform_analytics(db: Session, top_k: int, roles):
+    """Uncached body of GET /analytics/platform."""
+    # Aggregate platform metrics in the database
+    stats = crud.listing_aggregates(db)
+    total_users = db.query(func.count(models.User.id)).scalar()
+    
+    # Calculate platform metrics
+    total_listings = stats.total
+    total_quantity = stats.total_quantity_kg
+    active_listings = stats.available
+    claimed_listings = stats.claimed
+    collected_listings = stats.collected
+    ai_optimized_listings = stats.ai_optimized
+    
+    # Calculate rates
+    platform_success_rate = (collected_listings / total_listings) * 100 if total_listings > 0 else 0
+    ai_optimization_rate = (ai_optimized_listings / total_listings) * 100 if total_listings > 0 else 0
+    
+    # Calculate total impact
+    total_meals_provided = total_quantity * 4  # 4 meals per kg
+    total_savings = (ai_optimized_listings * 50) + (total_quantity * 10)
+    food_waste_reduction = total_quantity * 0.8  # Assume 80% waste reduction
+    
+    # Get top performing users (by impact score)
+    top_users = [
+        {
+            "user_id": row.user_id,
+            "name": row.name,
+            "impact_score": min(100, row.impact_score),
+            "total_quantity": row.total_quantity_kg,
+            "success_rate": (row.collected_listings / row.total_listings) * 100
+        }
+        for row in crud.top_users_by_impact(db, top_k, roles=roles)
+    ]
+    
+    return {
+        "total_users": total_users,
+        "total_listings": total_listings,
+        "total_quantity_kg": total_quantity,
+        "total_meals_provided": total_meals_provided,
+        "total_savings_rupees": total_savings,
+        "active_listings": active_listings,
+        "claimed_listings": claimed_listings,
+        "collected_listings": collected_listings,
+        "ai_optimization_rate": ai_optimization_rate,
+        "platform_success_rate": platform_success_rate,
+        "top_performing_users": top_users,
+        "food_waste_reduction_kg": food_waste_reduction
+    }
+
 @router.get("/analytics/platform")
-def get_platform_analytics(db: Session = Depends(get_db)):
-    """Get platform-wide analytics."""
+def get_platform_analytics(
+    top_k: int = Query(5, ge=1, le=100),
+    roles: Optional[list[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Get platform-wide analytics.
+
+    ``top_performing_users`` is the ``top_k`` leaderboard by impact score,
+    optionally limited to the given ``roles``.
+    """
     try:
-        # Get all data
-        all_users = db.query(models.User).all()
-        all_listings = db.query(models.SurplusListing).all()
-        
-        # Calculate platform metrics
-        total_users = len(all_users)
-        total_listings = len(all_listings)
-        total_quantity = sum(l.quantity_kg for l in all_listings)
-        active_listings = len([l for l in all_listings if l.status == "available"])
-        claimed_listings = len([l for l in all_listings if l.status == "claimed"])
-        collected_listings = len([l for l in all_listings if l.status == "collected"])
-        ai_optimized_listings = len([l for l in all_listings if l.ai_optimized])
-        
-        # Calculate rates
-        platform_success_rate = (collected_listings / total_listings) * 100 if total_listings > 0 else 0
-        ai_optimization_rate = (ai_optimized_listings / total_listings) * 100 if total_listings > 0 else 0
-        
-        # Calculate total impact
-        total_meals_provided = total_quantity * 4  # 4 meals per kg
-        total_savings = (ai_optimized_listings * 50) + (total_quantity * 10)
-        food_waste_reduction = total_quantity * 0.8  # Assume 80% waste reduction
-        
-        # Get top performing users (by impact score)
-        top_users = []
-        for user in all_users[:5]:  # Top 5 users
-            user_listings = [l for l in all_listings if l.user_id == user.id]
-            if user_listings:
-                user_quantity = sum(l.quantity_kg for l in user_listings)
-                user_success = len([l for l in user_listings if l.status == "collected"])
-                user_ai = len([l for l in user_listings if l.ai_optimized])
-                
-                impact_score = min(100, (
-                    (user_success / len(user_listings)) * 30 +
-                    (user_ai / len(user_listings)) * 30 +
-                    min(user_quantity / 100, 1) * 40
-                ))
-                
-                top_users.append({
-                    "user_id": user.id,
-                    "name": user.name,
-                    "impact_score": impact_score,
-                    "total_quantity": user_quantity,
-                    "success_rate": (user_success / len(user_listings)) * 100
-                })
-        
-        # Sort by impact score
-        top_users.sort(key=lambda x: x["impact_score"], reverse=True)
-        
-        return {
-            "total_users": total_users,
-            "total_listings": total_listings,
-            "total_quantity_kg": total_quantity,
-            "total_meals_provided": total_meals_provided,
-            "total_savings_rupees": total_savings,
-            "active_listings": active_listings,
-            "claimed_listings": claimed_listings,
-            "collected_listings": collected_listings,
-            "ai_optimization_rate": ai_optimization_rate,
-            "platform_success_rate": platform_success_rate,
-            "top_performing_users": top_users,
-            "food_waste_reduction_kg": food_waste_reduction
-        }
+        return cache.get_or_compute(
+            f"analytics:platform:{top_k}:{','.join(sorted(roles or []))}",
+            settings.ANALYTICS_PLATFORM_TTL_SECONDS,
+            lambda: compute_platform_analytics(db, top_k, roles)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating platform analytics: {str(e)}")
 
+def compute_analytics_trends(db: Session):
+    """Uncached body of GET /analytics/trends."""
+    stats = crud.listing_aggregates(db)
+    
+    # Calculate trends
+    total_listings = stats.total
+    ai_optimized = stats.ai_optimized
+    collected = stats.collected
+    
+    # Generate recommendations
+    recommendations = []
+    
+    if ai_optimized / max(1, total_listings) < 0.5:
+        recommendations.append("Consider using AI optimization more frequently to reduce waste")
+    
+    if collected / max(1, total_listings) < 0.7:
+        recommendations.append("Improve listing descriptions and photos to increase claim rates")
+    
+    if total_listings < 10:
+        recommendations.append("Create more listings to increase your impact on the community")
+    
+    # Week-over-week change in new listings
+    growth = crud.listing_growth(db, datetime.datetime.utcnow())
+    growth_rate_pct = ((growth.recent - growth.previous) / max(1, growth.previous)) * 100
+    if growth_rate_pct > 5:
+        growth_rate = "increasing"
+    elif growth_rate_pct < -5:
+        growth_rate = "decreasing"
+    else:
+        growth_rate = "stable"
+    
+    # Calculate trends
+    trends = {
+        "ai_adoption_rate": (ai_optimized / max(1, total_listings)) * 100,
+        "success_rate": (collected / max(1, total_listings)) * 100,
+        "avg_listing_size": stats.total_quantity_kg / max(1, total_listings),
+        "growth_rate": growth_rate,
+        "growth_rate_pct": growth_rate_pct,
+        "peak_hours": crud.peak_activity_hours(db),
+        "popular_food_types": crud.popular_food_types(db)
+    }
+    
+    return {
+        "trends": trends,
+        "recommendations": recommendations
+    }
+
 @router.get("/analytics/trends")
 def get_analytics_trends(db: Session = Depends(get_db)):
     """Get trending analytics and recommendations."""
     try:
-        all_listings = db.query(models.SurplusListing).all()
-        
-        # Calculate trends
-        total_listings = len(all_listings)
-        ai_optimized = len([l for l in all_listings if l.ai_optimized])
-        collected = len([l for l in all_listings if l.status == "collected"])
-        
-        # Generate recommendations
+        return cache.get_or_compute(
+            "analytics:trends",
+            settings.ANALYTICS_TRENDS_TTL_SECONDS,
+            lambda: compute_analytics_trends(db)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating trends: {str(e)}")
+
+def parse_analytics_date(value: Optional[str], field: str):
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be an ISO 8601 date")
+
+@router.post("/analytics/query", response_model=schemas.AnalyticsResponse)
+def query_analytics(request: schemas.AnalyticsRequest, db: Session = Depends(get_db)):
+    """Analytics over listings created in ``[start_date, end_date)``.
+
+    ``user_id`` limits the listings to one owner and ``event_type``/``location``
+    to listings from matching events. User analytics are returned when
+    ``user_id`` is given, platform analytics otherwise.
+    """
+    start = parse_analytics_date(request.start_date, "start_date")
+    end = parse_analytics_date(request.end_date, "end_date")
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    try:
+        filters = crud.analytics_filters(start, end, request.user_id, request.event_type, request.location)
+        stats = crud.listing_aggregates(db, *filters)
+
+        total_listings = stats.total
+        total_quantity = stats.total_quantity_kg
+        success_rate = (stats.collected / total_listings) * 100 if total_listings > 0 else 0
+        ai_optimization_rate = (stats.ai_optimized / total_listings) * 100 if total_listings > 0 else 0
+        total_savings = (stats.ai_optimized * 50) + (total_quantity * 10)
+        peak_hours = crud.peak_activity_hours(db, *filters)
+
+        user_analytics = None
+        platform_analytics = None
+        if request.user_id is not None:
+            user_analytics = {
+                "user_id": request.user_id,
+                "total_listings": total_listings,
+                "total_quantity_kg": total_quantity,
+                "success_rate": success_rate,
+                "ai_optimization_rate": ai_optimization_rate,
+                "avg_listing_size": total_quantity / total_listings if total_listings > 0 else 0,
+                "most_common_food_types": crud.popular_food_types(
+                    db,
+                    models.Event.user_id == request.user_id,
+                    *crud.event_filters(request.event_type, request.location)
+                ),
+                "peak_activity_hours": peak_hours,
+                "total_savings_rupees": total_savings,
+                "impact_score": min(100, (
+                    success_rate * 0.3 +
+                    ai_optimization_rate * 0.3 +
+                    min(total_quantity / 100, 1) * 40
+                ))
+            }
+        else:
+            platform_analytics = {
+                "total_users": db.query(func.count(func.distinct(models.SurplusListing.user_id))).filter(*filters).scalar(),
+                "total_listings": total_listings,
+                "total_quantity_kg": total_quantity,
+                "total_meals_provided": int(total_quantity * 4),  # 4 meals per kg
+                "total_savings_rupees": total_savings,
+                "active_listings": stats.available,
+                "claimed_listings": stats.claimed,
+                "collected_listings": stats.collected,
+                "ai_optimization_rate": ai_optimization_rate,
+                "platform_success_rate": success_rate,
+                "top_performing_users": [
+                    {
+                        "user_id": row.user_id,
+                        "name": row.name,
+                        "impact_score": min(100, row.impact_score),
+                        "total_quantity": row.total_quantity_kg,
+                        "success_rate": (row.collected_listings / row.total_listings) * 100
+                    }
+                    for row in crud.top_contributors(db, *filters)
+                ],
+                "food_waste_reduction_kg": total_quantity * 0.8  # Assume 80% waste reduction
+            }
+
         recommendations = []
-        
-        if ai_optimized / max(1, total_listings) < 0.5:
+        if ai_optimization_rate < 50:
             recommendations.append("Consider using AI optimization more frequently to reduce waste")
-        
-        if collected / max(1, total_listings) < 0.7:
+        if success_rate < 70:
             recommendations.append("Improve listing descriptions and photos to increase claim rates")
-        
-        if total_listings < 10:
-            recommendations.append("Create more listings to increase your impact on the community")
-        
-        # Calculate trends
-        trends = {
-            "ai_adoption_rate": (ai_optimized / max(1, total_listings)) * 100,
-            "success_rate": (collected / max(1, total_listings)) * 100,
-            "avg_listing_size": sum(l.quantity_kg for l in all_listings) / max(1, total_listings),
-            "growth_rate": "increasing",  # Placeholder
-            "peak_hours": [10, 14, 18],  # Placeholder
-            "popular_food_types": ["Mixed", "Vegetables", "Grains"]  # Placeholder
-        }
-        
+
         return {
-            "trends": trends,
+            "user_analytics": user_analytics,
+            "platform_analytics": platform_analytics,
+            "event_analytics": crud.event_analytics(
+                db, start, end, request.user_id, request.event_type, request.location
+            ),
+            "trends": {
+                "ai_adoption_rate": ai_optimization_rate,
+                "success_rate": success_rate,
+                "avg_listing_size": total_quantity / max(1, total_listings),
+                "peak_hours": peak_hours
+            },
             "recommendations": recommendations
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error calculating trends: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error running analytics query: {str(e)}")
+
+@router.get("/analytics/events", response_model=list[schemas.EventAnalytics])
+def get_event_analytics(
+    event_type: Optional[str] = None,
+    seasonality: Optional[str] = None,
+    location: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Per event type guest counts, surplus, AI savings and claim success.
+
+    Read from the event summary tables, with seasonal and location
+    breakdowns; events without a season or location are grouped as "Unknown".
+    """
+    try:
+        return crud.event_type_summaries(db, event_type, seasonality, location)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating event analytics: {str(e)}")
+
+@router.get("/analytics/timeseries")
+def get_analytics_timeseries(
+    granularity: str = Query("day", pattern="^(hour|day|week|month)$"),
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Listings created per hour/day/week/month.
+
+    Defaults to the last 30 days; ``user_id`` limits it to one owner.
+    """
+    end = end or datetime.datetime.utcnow()
+    start = start or end - datetime.timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        filters = [models.SurplusListing.user_id == user_id] if user_id is not None else []
+        rows = crud.listing_timeseries(db, granularity, start, end, *filters)
+        return {
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "buckets": [
+                {
+                    "bucket": str(row.bucket),
+                    "listings": row.listings,
+                    "quantity_kg": row.quantity_kg,
+                    "collected": row.collected
+                }
+                for row in rows
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating timeseries: {str(e)}")
+
+def ngo_analytics(stats: models.UserListingStats):
+    """NGO collection metrics from the NGO's rollup row."""
+    # Calculate metrics
+    total_collections = stats.ngo_collections
+    total_quantity = stats.ngo_collected_kg
+    total_meals_provided = total_quantity * 4  # 4 meals per kg
+    active_claims = stats.ngo_active_claims
+    completed_collections = stats.ngo_collections
+    total_claims = stats.ngo_active_claims + stats.ngo_collections
+    
+    avg_collection_size = total_quantity / max(1, total_collections)
+    
+    # Calculate impact score (0-100)
+    impact_score = min(100, (
+        (total_collections * 10) +  # 10 points per collection
+        (total_quantity / 10) +     # 1 point per 10kg
+        (completed_collections / max(1, total_claims) * 30)  # Success rate weight
+    ))
+    
+    # Calculate collection success rate
+    collection_success_rate = (completed_collections / max(1, total_claims)) * 100
+    
+    # Estimate savings (₹10 per kg collected)
+    total_savings = total_quantity * 10
+    
+    return {
+        "total_collections": total_collections,
+        "total_quantity_kg": total_quantity,
+        "total_meals_provided": total_meals_provided,
+        "active_claims": active_claims,
+        "completed_collections": completed_collections,
+        "avg_collection_size": avg_collection_size,
+        "impact_score": impact_score,
+        "total_savings_rupees": total_savings,
+        "collection_success_rate": collection_success_rate
+    }
 
 @router.get("/analytics/ngo/{ngo_id}")
 def get_ngo_analytics(ngo_id: int, db: Session = Depends(get_db)):
     """Get analytics specific to an NGO."""
     try:
-        # Get all listings claimed by this NGO
-        claimed_listings = db.query(models.SurplusListing).filter(
-            models.SurplusListing.claimed_by_id == ngo_id
-        ).all()
-        
-        # Get all listings collected by this NGO
-        collected_listings = db.query(models.SurplusListing).filter(
-            models.SurplusListing.claimed_by_id == ngo_id,
-            models.SurplusListing.status == "collected"
-        ).all()
-        
-        # Calculate metrics
-        total_collections = len(collected_listings)
-        total_quantity = sum(l.quantity_kg for l in collected_listings)
-        total_meals_provided = total_quantity * 4  # 4 meals per kg
-        active_claims = len([l for l in claimed_listings if l.status == "claimed"])
-        completed_collections = len([l for l in claimed_listings if l.status == "collected"])
-        
-        avg_collection_size = total_quantity / max(1, total_collections)
-        
-        # Calculate impact score (0-100)
-        impact_score = min(100, (
-            (total_collections * 10) +  # 10 points per collection
-            (total_quantity / 10) +     # 1 point per 10kg
-            (completed_collections / max(1, len(claimed_listings)) * 30)  # Success rate weight
-        ))
-        
-        # Calculate collection success rate
-        collection_success_rate = (completed_collections / max(1, len(claimed_listings))) * 100
-        
-        # Estimate savings (₹10 per kg collected)
-        total_savings = total_quantity * 10
-        
-        return {
-            "total_collections": total_collections,
-            "total_quantity_kg": total_quantity,
-            "total_meals_provided": total_meals_provided,
-            "active_claims": active_claims,
-            "completed_collections": completed_collections,
-            "avg_collection_size": avg_collection_size,
-            "impact_score": impact_score,
-            "total_savings_rupees": total_savings,
-            "collection_success_rate": collection_success_rate
-        }
+        return ngo_analytics(crud.get_user_stats(db, ngo_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating NGO analytics: {str(e)}")
 
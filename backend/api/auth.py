@@ -26,8 +26,30 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def require_admin(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Dependency for admin-only endpoints; returns the token payload.
+
+    The role is read from the database, so a token cannot grant more than
+    its user has and demoting a user takes effect immediately.
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user = db.query(models.User.role).filter(models.User.id == payload.get("user_id")).first()
+    if user is None or user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return payload
+
 @router.post("/register", response_model=schemas.UserResponse)
 def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    if user.role == "admin":
+        # Admins are created out of band; anyone could otherwise sign up as one
+        raise HTTPException(status_code=403, detail="Admin accounts cannot be registered")
     db_user = crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
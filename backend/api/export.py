@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from .auth import require_admin
+from ..export import EXPORT_TABLES, MEDIA_TYPES, iter_csv, iter_ndjson
+
+# Full dumps include every user's rows, so they are admin-only
+router = APIRouter(prefix="/export", tags=["export"], dependencies=[Depends(require_admin)])
+
+@router.get("/{table}")
+def export_table(table: str, format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """Stream every row of ``table`` as CSV or NDJSON.
+
+    Rows come off a server-side cursor in batches, so the export never holds
+    the whole table in memory. For Parquet use ``python -m backend.export``.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table; choose from {', '.join(sorted(EXPORT_TABLES))}")
+    chunks = iter_csv(table) if format == "csv" else iter_ndjson(table)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
@@ -0,0 +1,64 @@
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .auth import require_admin
+from .. import schemas, crud
+from ..database import SessionLocal
+from ..matching import solve_assignment
+
+# A committed run claims listings on behalf of every NGO, so it is admin-only
+router = APIRouter(prefix="/matching", tags=["matching"], dependencies=[Depends(require_admin)])
+
+# Dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.post("/run", response_model=schemas.MatchingRunResponse)
+def run_matching(request: schemas.MatchingRunRequest, db: Session = Depends(get_db)):
+    """Assign available listings to nearby NGOs within their capacity.
+
+    With ``dry_run`` the proposed assignment is only returned; otherwise every
+    claim is written in a single transaction and only the assignments that
+    were actually claimed are reported (listings claimed by someone else
+    since the solve are left out).
+    """
+    if request.max_distance_km <= 0 or request.candidates_per_listing < 1:
+        raise HTTPException(status_code=400, detail="max_distance_km and candidates_per_listing must be positive")
+    try:
+        listings, ngos = crud.load_matching_inputs(db)
+        started = time.perf_counter()
+        assignments = solve_assignment(listings, ngos, request.max_distance_km, request.candidates_per_listing)
+        solve_ms = (time.perf_counter() - started) * 1000
+
+        claimed_count = 0
+        planned_ids = {listing_id for listing_id, _, _, _ in assignments}
+        if not request.dry_run and assignments:
+            listing_ids_by_ngo = {}
+            for listing_id, ngo_id, _, _ in assignments:
+                listing_ids_by_ngo.setdefault(ngo_id, []).append(listing_id)
+            claimed = {(row.id, row.claimed_by_id) for row in crud.claim_listings_bulk(db, listing_ids_by_ngo)}
+            assignments = [assignment for assignment in assignments if assignment[:2] in claimed]
+            claimed_count = len(assignments)
+
+        unmatched = [row for row in listings if row.id not in planned_ids]
+        return schemas.MatchingRunResponse(
+            dry_run=request.dry_run,
+            assignments=[
+                schemas.MatchingAssignment(listing_id=listing_id, ngo_id=ngo_id, distance_km=distance, quantity_kg=quantity)
+                for listing_id, ngo_id, distance, quantity in assignments
+            ],
+            claimed_count=claimed_count,
+            matched_kg=sum(quantity for _, _, _, quantity in assignments),
+            unmatched_kg=sum(row.quantity_kg or 0.0 for row in unmatched),
+            unmatched_listing_ids=[row.id for row in unmatched],
+            total_distance_km=sum(distance for _, _, distance, _ in assignments),
+            solve_ms=solve_ms
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running matching: {str(e)}")
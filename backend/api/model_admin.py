@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from .auth import require_admin
+from ..model_registry import model_registry
+
+router = APIRouter(prefix="/admin/model", tags=["admin"], dependencies=[Depends(require_admin)])
+
+def reload_in_background(version):
+    try:
+        model_registry.reload(version, activate=True)
+    except Exception:
+        pass  # recorded in model_registry.metrics and shown by GET /admin/model
+
+@router.get("")
+def model_status():
+    """Served and active model versions, registered versions and reload counters."""
+    return model_registry.status()
+
+@router.post("/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_model(background_tasks: BackgroundTasks, version: Optional[str] = None):
+    """Load ``version`` (default: the manifest's active one) in the background.
+
+    The new model is checked on the holdout sample before it replaces the
+    served one; requests already running finish on the old model. On success
+    the manifest is updated so every other worker switches too.
+    """
+    manifest = model_registry.read_manifest()
+    if version is not None and (not manifest or version not in manifest["versions"]):
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version}")
+    background_tasks.add_task(reload_in_background, version)
+    return {"status": "loading", "version": version or (manifest["active"] if manifest else None)}
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from .. import schemas, crud
+from ..broker import broker
+from ..database import SessionLocal
+
+router = APIRouter(tags=["stream"])
+
+HEARTBEAT_SECONDS = 15
+SNAPSHOT_LIMIT = 500
+
+def format_sse(event_type: str, data, cursor=None) -> str:
+    message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+    if cursor is not None:
+        message = f"id: {cursor}\n" + message
+    return message
+
+def load_snapshot():
+    db = SessionLocal()
+    try:
+        listings = crud.list_surplus_listings(db, status="available", limit=SNAPSHOT_LIMIT)
+        return [
+            schemas.SurplusListingResponse.model_validate(listing, from_attributes=True).model_dump(mode="json")
+            for listing in listings
+        ]
+    finally:
+        db.close()
+
+@router.get("/surplus-listings/stream")
+async def stream_surplus_listings(
+    request: Request,
+    cursor: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events feed of listing changes.
+
+    A new client gets one ``snapshot`` event with the available listings,
+    then ``created``/``claimed``/``collected``/``expired`` deltas. Clients that
+    reconnect with ``cursor`` (or the standard Last-Event-ID header) only get
+    the deltas they missed, falling back to a fresh snapshot when those are no
+    longer retained. A ``resync`` event means the client fell behind and
+    should reconnect.
+    """
+    if cursor is None and last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    # Subscribe before reading the snapshot or backlog so no delta falls between them
+    subscription = broker.subscribe()
+
+    async def events():
+        try:
+            backlog = broker.events_since(cursor) if cursor is not None else None
+            if backlog is None:
+                last_cursor = broker.latest_cursor
+                listings = await run_in_threadpool(load_snapshot)
+                yield format_sse("snapshot", {"listings": listings}, last_cursor)
+            else:
+                last_cursor = cursor
+                for event in backlog:
+                    yield format_sse(event["type"], event["data"], event["cursor"])
+                    last_cursor = event["cursor"]
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    yield format_sse("resync", {"cursor": last_cursor})
+                    break
+                if event["cursor"] <= last_cursor:
+                    continue  # already sent as part of the backlog
+                yield format_sse(event["type"], event["data"], event["cursor"])
+                last_cursor = event["cursor"]
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,309 @@
+"""Pub/sub broker behind the live listing feed.
+
+Writers call ``publish`` from request threads; each SSE connection holds a
+``Subscription`` whose bounded asyncio queue is filled on its own event loop.
+A subscriber that falls too far behind is cut off with a resync marker rather
+than letting its queue grow without limit. Every event carries a cursor so a
+reconnecting client can resume from the last event it saw.
+
+Backends:
+- ``InMemoryBroker``: single process, keeps a ring buffer of recent events.
+- ``FileLogBroker``: an append-only JSON-lines log on local disk that every
+  uvicorn worker on the host tails. It stands in for a shared bus such as
+  Redis streams; cursors are byte offsets, so any retained position can be
+  replayed. Once the log passes ``max_bytes`` its older half is dropped; the
+  header line records how many bytes were dropped so cursors keep counting
+  up, and clients resuming from before the cut get a fresh snapshot.
+"""
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from .config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class Subscription:
+    """One consumer's bounded queue of events."""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def _offer(self, event):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._cut_off()
+
+    def _cut_off(self):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        self.overflowed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        """Return the next event, or None if this subscriber overflowed."""
+        return await self.queue.get()
+
+
+class Broker:
+    """Interface shared by broker backends."""
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+
+    @property
+    def latest_cursor(self):
+        raise NotImplementedError
+
+    def publish(self, event_type, payload):
+        raise NotImplementedError
+
+    def events_since(self, cursor):
+        """Return events after ``cursor``, or None if they are no longer available."""
+        raise NotImplementedError
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._subscribers_lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._subscribers_lock:
+            self._subscribers.discard(subscription)
+
+    def _fan_out(self, event):
+        self._notify_subscribers("_offer", event)
+
+    def _cut_off_subscribers(self):
+        """Send every subscriber the resync marker, e.g. after events were lost."""
+        self._notify_subscribers("_cut_off")
+
+    def _notify_subscribers(self, method, *args):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(getattr(subscription, method), *args)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+
+class InMemoryBroker(Broker):
+    def __init__(self, history_size=1000, queue_size=256):
+        super().__init__(queue_size)
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._history = deque(maxlen=history_size)
+
+    @property
+    def latest_cursor(self):
+        return self._cursor
+
+    def publish(self, event_type, payload):
+        with self._lock:
+            self._cursor += 1
+            event = {"cursor": self._cursor, "type": event_type, "data": payload}
+            self._history.append(event)
+            # Fan out under the lock so every subscriber sees cursor order
+            self._fan_out(event)
+        return event["cursor"]
+
+    def events_since(self, cursor):
+        with self._lock:
+            if cursor > self._cursor:
+                return None  # cursor from another process or before a restart
+            if cursor == self._cursor:
+                return []
+            if not self._history or self._history[0]["cursor"] > cursor + 1:
+                return None
+            return [event for event in self._history if event["cursor"] > cursor]
+
+
+class CursorTooOld(Exception):
+    pass
+
+
+# The log starts with a fixed-width header holding the cursor of its first
+# byte, i.e. how many bytes earlier compactions dropped
+HEADER_SIZE = 21
+
+
+def _header(base):
+    return b"%020d\n" % base
+
+
+class FileLogBroker(Broker):
+    def __init__(self, path, history_size=1000, queue_size=256, poll_interval=0.1, max_bytes=64 * 1024 * 1024):
+        super().__init__(queue_size)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        with self._open_locked() as log:
+            base = self._read_base(log)
+            # Only events written after this worker starts are fanned out live
+            self._offset = base + log.seek(0, os.SEEK_END) - HEADER_SIZE
+        threading.Thread(target=self._tail, name="broker-tail", daemon=True).start()
+
+    @property
+    def latest_cursor(self):
+        return self._offset
+
+    @contextmanager
+    def _open_locked(self):
+        """Open the current log for appending under the writers' lock."""
+        while True:
+            log = open(self.path, "a+b")
+            if fcntl:
+                fcntl.flock(log, fcntl.LOCK_EX)
+            # A compaction may have replaced the file while we waited
+            if not fcntl or os.fstat(log.fileno()).st_ino == os.stat(self.path).st_ino:
+                break
+            log.close()
+        try:
+            try:
+                self._read_base(log)
+            except ValueError:
+                # New, or written before logs had a header: start it over
+                log.truncate(0)
+                log.write(_header(0))
+                log.flush()
+            yield log
+        finally:
+            if fcntl:
+                fcntl.flock(log, fcntl.LOCK_UN)
+            log.close()
+
+    @staticmethod
+    def _read_base(log):
+        log.seek(0)
+        header = log.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or not header[:-1].isdigit() or header[-1:] != b"\n":
+            raise ValueError("event log has no header")
+        return int(header)
+
+    def publish(self, event_type, payload):
+        line = (json.dumps({"type": event_type, "data": payload}, default=str) + "\n").encode()
+        with self._open_locked() as log:
+            base = self._read_base(log)
+            log.write(line)
+            log.flush()
+            size = log.tell()
+            if size > self.max_bytes:
+                self._compact(log, base)
+        return base + size - HEADER_SIZE
+
+    def _compact(self, log, base):
+        """Replace the log with its newer half; the caller holds the writers' lock."""
+        log.seek(max(HEADER_SIZE, log.tell() - self.max_bytes // 2))
+        if log.tell() > HEADER_SIZE:
+            log.readline()  # skip to the next event boundary
+        keep_from = log.tell()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as compacted:
+            compacted.write(_header(base + keep_from - HEADER_SIZE))
+            shutil.copyfileobj(log, compacted)
+        os.replace(tmp_path, self.path)
+
+    def _read_from(self, cursor):
+        events = []
+        with open(self.path, "rb") as log:
+            base = self._read_base(log)
+            if cursor < base:
+                raise CursorTooOld(cursor)
+            position = cursor - base + HEADER_SIZE
+            if position > HEADER_SIZE:
+                log.seek(position - 1)
+                if log.read(1) != b"\n":
+                    raise ValueError("cursor is not at an event boundary")
+            log.seek(position)
+            for line in log:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-line; pick it up next poll
+                cursor += len(line)
+                event = json.loads(line)
+                event["cursor"] = cursor
+                events.append(event)
+        return events
+
+    def _tail(self):
+        while True:
+            time.sleep(self.poll_interval)
+            self._tail_once()
+
+    def _tail_once(self):
+        try:
+            events = self._read_from(self._offset)
+        except CursorTooOld:
+            # Compacted past events this worker had not read yet: its
+            # subscribers missed them and have to start over
+            try:
+                with open(self.path, "rb") as log:
+                    base = self._read_base(log)
+            except (OSError, ValueError):
+                return
+            with self._lock:
+                self._history.clear()
+                self._offset = base
+            self._cut_off_subscribers()
+            return
+        except (OSError, ValueError):
+            return
+        for event in events:
+            with self._lock:
+                self._history.append(event)
+                self._offset = event["cursor"]
+            self._fan_out(event)
+
+    def events_since(self, cursor):
+        with self._lock:
+            if cursor > self._offset:
+                return None
+            if self._history and self._history[0]["cursor"] <= cursor:
+                return [event for event in self._history if event["cursor"] > cursor]
+            offset = self._offset
+        # Older than the in-memory window: replay from the log itself
+        try:
+            events = self._read_from(cursor)
+        except (CursorTooOld, OSError, ValueError):
+            return None
+        return [event for event in events if event["cursor"] <= offset]
+
+
+def create_broker():
+    if settings.BROKER_BACKEND == "file":
+        return FileLogBroker(
+            settings.BROKER_LOG_PATH,
+            history_size=settings.BROKER_HISTORY_SIZE,
+            queue_size=settings.BROKER_SUBSCRIBER_QUEUE_SIZE,
+            max_bytes=settings.BROKER_LOG_MAX_BYTES,
+        )
+    return InMemoryBroker(
+        history_size=settings.BROKER_HISTORY_SIZE,
+        queue_size=settings.BROKER_SUBSCRIBER_QUEUE_SIZE,
+    )
+
+
+broker = create_broker()
@@ -0,0 +1,241 @@
+"""TTL cache for expensive read endpoints.
+
+``TTLCache.get_or_compute`` serves a cached value until its TTL runs out. On a
+miss only one thread computes the value; concurrent callers for the same key
+wait for that result instead of repeating the work (single flight). Listing
+writes call ``invalidate`` so cached analytics never outlive a change by more
+than the time it takes to commit it.
+
+Backends:
+- ``LRUCacheBackend``: per process, bounded, least recently used evicted first.
+- ``SQLiteCacheBackend``: a SQLite file shared by every uvicorn worker on the
+  host, standing in for memcached/Redis. Values are stored as JSON, so cached
+  values must be JSON serializable.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .config import settings
+
+
+class CacheBackend:
+    """Interface shared by cache backends."""
+
+    def __init__(self):
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the value stored under ``key``, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl_seconds):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    def __init__(self, max_entries=256):
+        super().__init__()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    def __init__(self, path, max_entries=256):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads and processes
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        # Wall-clock time, since entries are shared between processes
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache_entries SET used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now + ttl_seconds, now)
+            )
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            evicted = conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        self.evictions += evicted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._flights = {}
+        # Bumped by invalidate(); results computed across a bump are not stored
+        self._generation = 0
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "invalidations": 0,
+        }
+
+    def get_or_compute(self, key, ttl_seconds, compute):
+        """Return the cached value for ``key``, computing it with ``compute()`` on a miss."""
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.metrics["hits"] += 1
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.metrics["misses"] += 1
+            else:
+                self.metrics["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            with self._lock:
+                fresh = generation == self._generation
+            if fresh and flight.value is not None:
+                self.backend.set(key, flight.value, ttl_seconds)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def get_many(self, keys, ttl_seconds, compute_many):
+        """Batch form of ``get_or_compute``.
+
+        ``compute_many(missing_keys)`` returns the values for every miss in
+        one call. Misses are not coalesced with concurrent callers.
+        """
+        values = {key: self.backend.get(key) for key in set(keys)}
+        missing = [key for key, value in values.items() if value is None]
+        hits = sum(1 for key in keys if values[key] is not None)
+        with self._lock:
+            self.metrics["hits"] += hits
+            self.metrics["misses"] += len(keys) - hits
+            generation = self._generation
+        if missing:
+            computed = compute_many(missing)
+            with self._lock:
+                fresh = generation == self._generation
+            for key, value in zip(missing, computed):
+                values[key] = value
+                if fresh and value is not None:
+                    self.backend.set(key, value, ttl_seconds)
+        return [values[key] for key in keys]
+
+    def invalidate(self):
+        """Drop every cached value (called after listing writes commit)."""
+        with self._lock:
+            self._generation += 1
+            self.metrics["invalidations"] += 1
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.metrics)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0
+        stats["evictions"] = self.backend.evictions
+        stats["entries"] = len(self.backend)
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+def create_cache():
+    if settings.CACHE_BACKEND == "sqlite":
+        backend = SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, max_entries=settings.CACHE_MAX_ENTRIES)
+    else:
+        backend = LRUCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+    return TTLCache(backend)
+
+
+cache = create_cache()
@@ -0,0 +1,222 @@
+"""Compiled random-forest inference without sklearn.
+
+``export_compiled_model`` flattens the fitted OneHotEncoder, StandardScaler and
+RandomForestRegressor from train_rf_model.py into contiguous NumPy arrays and
+writes them to one file: a JSON header followed by 64-byte aligned arrays, so
+``CompiledModel.load`` can memory-map every array in place. The mapping is
+read-only, so all uvicorn workers on a host share one page-cache copy of the
+forest instead of each unpickling its own.
+
+The evaluator walks all trees of the forest at once: each step gathers the
+current node of every (row, tree) pair and moves it left or right in one
+vectorized comparison, until all of them have reached a leaf. Leaves point at
+themselves so finished trees simply stay put. Predictions are identical to
+sklearn's single-threaded ``predict``:
+
+- inputs are compared as float32, as sklearn does, against each threshold
+  rounded down to the nearest float32, which decides every float32 input
+  exactly as the float64 threshold would;
+- per-tree leaf values are summed in tree order with ``cumsum`` (sequential,
+  unlike the pairwise ``sum``) before dividing by the number of trees.
+
+Usage: python -m backend.compiled_forest [--model-dir DIR] [--output PATH]
+"""
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+
+MODEL_FILES = ("rf_model.pkl", "encoder.pkl", "scaler.pkl")
+MAGIC = b"SSFOREST1\n"
+ALIGNMENT = 64
+COMPILED_MODEL_FILE = "rf_model.forest"
+
+
+def artifact_version(model_dir):
+    """Short fingerprint of the model files' contents.
+
+    Hashing the bytes rather than size and mtime means a copy keeps its
+    version and a rewrite that happens to keep both still gets a new one.
+    """
+    digest = hashlib.sha1()
+    for name in MODEL_FILES:
+        digest.update(f"{name}\0".encode())
+        with open(os.path.join(model_dir, name), "rb") as source:
+            for chunk in iter(lambda: source.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _float32_at_most(values):
+    """Largest float32 <= each float64 value."""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def export_compiled_model(rf_model, encoder, scaler, path, source_version=None):
+    """Write the fitted encoder, scaler and forest to ``path`` as one compiled file."""
+    if encoder.drop is not None or encoder.handle_unknown != "ignore":
+        raise ValueError("only OneHotEncoder(drop=None, handle_unknown='ignore') can be compiled")
+    if getattr(rf_model, "n_outputs_", 1) != 1:
+        raise ValueError("only single-output forests can be compiled")
+
+    trees = [estimator.tree_ for estimator in rf_model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    features, thresholds, children, values = [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        left = tree.children_left.astype(np.int64)
+        is_leaf = left == -1
+        node_ids = np.arange(tree.node_count) + offset
+        # Leaves loop back to themselves so extra steps are harmless
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        children.append(np.column_stack([
+            np.where(is_leaf, node_ids, left + offset),
+            np.where(is_leaf, node_ids, tree.children_right.astype(np.int64) + offset),
+        ]).astype(np.int32).ravel())
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+
+    arrays = {
+        "feature": np.concatenate(features),
+        "threshold": _float32_at_most(np.concatenate(thresholds)),
+        "children": np.concatenate(children),
+        "value": np.concatenate(values),
+        "roots": offsets[:-1].astype(np.int32),
+        "scaler_mean": np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(scaler.n_features_in_), dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_ if scaler.with_std else np.ones(scaler.n_features_in_), dtype=np.float64),
+    }
+    meta = {
+        "n_trees": len(trees),
+        "max_depth": int(max(tree.max_depth for tree in trees)),
+        "n_features": int(rf_model.n_features_in_),
+        "categories": [[str(category) for category in categories] for categories in encoder.categories_],
+        "source_version": source_version,
+    }
+
+    header = {"meta": meta, "arrays": {}}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(MAGIC)
+        out.write(len(header_bytes).to_bytes(8, "little"))
+        out.write(header_bytes)
+        for name, array in arrays.items():
+            out.seek(data_start + header["arrays"][name]["offset"])
+            out.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+class CompiledModel:
+    """Encoder, scaler and forest evaluated from flat arrays."""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.source_version = meta.get("source_version")
+        self.n_trees = meta["n_trees"]
+        self.max_depth = meta["max_depth"]
+        self.categories = meta["categories"]
+        self._category_index = [
+            {category: index for index, category in enumerate(categories)} for categories in self.categories
+        ]
+        self._category_offsets = np.cumsum([0] + [len(categories) for categories in self.categories])
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.children = arrays["children"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.scaler_mean = arrays["scaler_mean"]
+        self.scaler_scale = arrays["scaler_scale"]
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Open a compiled model; with ``mmap`` the arrays stay in the page cache, shared between processes."""
+        with open(path, "rb") as source:
+            if source.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a compiled forest")
+            header_size = int.from_bytes(source.read(8), "little")
+            header = json.loads(source.read(header_size))
+        data_start = -(-(len(MAGIC) + 8 + header_size) // ALIGNMENT) * ALIGNMENT
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            shape = tuple(spec["shape"])
+            if mmap:
+                arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=data_start + spec["offset"], shape=shape)
+            else:
+                count = int(np.prod(shape))
+                arrays[name] = np.fromfile(path, dtype=spec["dtype"], count=count, offset=data_start + spec["offset"]).reshape(shape)
+        return cls(header["meta"], arrays)
+
+    def transform(self, categorical_rows, numeric_rows):
+        """One-hot encode and scale like the fitted sklearn transformers."""
+        n_rows = len(categorical_rows)
+        X_cat = np.zeros((n_rows, int(self._category_offsets[-1])), dtype=np.float64)
+        for row_index, row in enumerate(categorical_rows):
+            for feature_index, category in enumerate(row):
+                # Unknown categories encode as all zeros (handle_unknown='ignore')
+                column = self._category_index[feature_index].get(str(category))
+                if column is not None:
+                    X_cat[row_index, self._category_offsets[feature_index] + column] = 1.0
+        X_num = (np.asarray(numeric_rows, dtype=np.float64) - self.scaler_mean) / self.scaler_scale
+        return np.concatenate([X_cat, X_num.reshape(n_rows, -1)], axis=1)
+
+    def predict(self, X):
+        """Predict for a feature matrix laid out like the training data."""
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X32.shape
+        flat_X = X32.ravel()
+        row_starts = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_starts + self.feature[nodes]] > self.threshold[nodes]
+            next_nodes = self.children[2 * nodes + go_right]
+            if np.array_equal(next_nodes, nodes):
+                break  # every (row, tree) pair has reached a leaf
+            nodes = next_nodes
+        return np.cumsum(self.value[nodes], axis=1)[:, -1] / self.n_trees
+
+
+def load_compiled_model(model_dir, source_version):
+    """Map ``model_dir``'s compiled model if it was built from the current pickles, else return None."""
+    path = os.path.join(model_dir, COMPILED_MODEL_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        model = CompiledModel.load(path)
+    except Exception as e:
+        print(f"❌ Error loading compiled model: {e}")
+        return None
+    if model.source_version != source_version:
+        print(f"⚠️ {COMPILED_MODEL_FILE} is stale, rebuild it with python -m backend.compiled_forest")
+        return None
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile rf_model.pkl, encoder.pkl and scaler.pkl into one file")
+    parser.add_argument("--model-dir", default=os.path.dirname(__file__))
+    parser.add_argument("--output", help=f"defaults to MODEL_DIR/{COMPILED_MODEL_FILE}")
+    args = parser.parse_args()
+
+    import joblib  # only the exporter needs the pickled sklearn objects
+
+    rf_model = joblib.load(os.path.join(args.model_dir, "rf_model.pkl"))
+    encoder = joblib.load(os.path.join(args.model_dir, "encoder.pkl"))
+    scaler = joblib.load(os.path.join(args.model_dir, "scaler.pkl"))
+    output = args.output or os.path.join(args.model_dir, COMPILED_MODEL_FILE)
+    export_compiled_model(rf_model, encoder, scaler, output, source_version=artifact_version(args.model_dir))
+    print(f"✅ Compiled {len(rf_model.estimators_)} trees to {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
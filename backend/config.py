@@ -10,6 +10,50 @@ class Settings(BaseSettings):
        ALGORITHM: str = "HS256"
        ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+       # Live listing feed: "memory" (single worker) or "file" (shared log on this host)
+       BROKER_BACKEND: str = "memory"
+       BROKER_LOG_PATH: str = os.path.join(os.path.dirname(__file__), "listing_events.log")
+       BROKER_HISTORY_SIZE: int = 1000
+       BROKER_SUBSCRIBER_QUEUE_SIZE: int = 256
+       # The file log drops its older half once it grows past this size
+       BROKER_LOG_MAX_BYTES: int = 64 * 1024 * 1024
+
+       # Perishable listings: default shelf life and the background expiry sweeper
+       LISTING_DEFAULT_TTL_HOURS: int = 24
+       EXPIRY_SWEEP_ENABLED: bool = True
+       EXPIRY_SWEEP_INTERVAL_SECONDS: float = 60
+       EXPIRY_SWEEP_BATCH_SIZE: int = 500
+       EXPIRY_SWEEP_MAX_BATCHES: int = 20
+
+       # Analytics cache: "memory" (per-process LRU) or "sqlite" (shared file on this host)
+       CACHE_BACKEND: str = "memory"
+       CACHE_SQLITE_PATH: str = os.path.join(os.path.dirname(__file__), "cache.sqlite3")
+       CACHE_MAX_ENTRIES: int = 256
+       ANALYTICS_PLATFORM_TTL_SECONDS: float = 60
+       ANALYTICS_TRENDS_TTL_SECONDS: float = 300
+
+       # Predictive shorting cache; numeric inputs are rounded to these buckets (0 = exact).
+       # The rounded values are what the model sees, so buckets trade accuracy for hit rate
+       PREDICTION_CACHE_SIZE: int = 4096
+       PREDICTION_CACHE_TTL_SECONDS: float = 3600
+       PREDICTION_CACHE_GUEST_BUCKET: int = 1
+       PREDICTION_CACHE_QUANTITY_BUCKET_KG: float = 0
+
+       # Model registry: MODEL_REGISTRY_DIR/<version>/ plus manifest.json; workers poll the
+       # manifest and hot-swap to its active version (0 disables polling)
+       MODEL_REGISTRY_DIR: str = os.path.join(os.path.dirname(__file__), "model_versions")
+       MODEL_REGISTRY_POLL_SECONDS: float = 5
+       # A new version may be at most this much worse (relative MAE) on the holdout sample
+       MODEL_HOLDOUT_TOLERANCE: float = 0.1
+
+       # Inference executor: threads running predictions, max requests waiting or running
+       # (503 beyond that), and the window within which requests are batched together
+       INFERENCE_WORKERS: int = 2
+       INFERENCE_QUEUE_SIZE: int = 256
+       INFERENCE_BATCH_WINDOW_MS: float = 2
+       INFERENCE_MAX_BATCH_ROWS: int = 512
+       INFERENCE_RETRY_AFTER_SECONDS: int = 1
+
        class Config:
            env_file = ".env"
 
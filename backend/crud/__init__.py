@@ -1,9 +1,27 @@
+import datetime
+import re
+import threading
+from collections import Counter, OrderedDict
+from sqlalchemy import case, column, extract, func, insert, literal, literal_column, or_, select, table, text, tuple_, union_all, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .. import models, schemas
+from .. import models, schemas, geo
+from ..broker import broker
+from ..cache import cache
+from ..config import settings
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Roles are fixed at registration, so role checks on hot paths are served from
+# a bounded LRU instead of a users query per request.
+USER_ROLE_CACHE_SIZE = 4096
+_user_role_cache = OrderedDict()
+_user_role_lock = threading.Lock()
+
+# Listing columns returned by UPDATE ... RETURNING (the search vector is never needed)
+_listing_columns = [col for col in models.SurplusListing.__table__.c if col.key != "search_vector"]
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
@@ -12,7 +30,8 @@ def verify_password(plain_password, hashed_password):
 
 def create_user(db: Session, user: schemas.UserCreate):
     hashed_password = get_password_hash(user.password)
-    db_user = models.User(email=user.email, hashed_password=hashed_password, name=user.name, role=user.role)
+    db_user = models.User(email=user.email, hashed_password=hashed_password, name=user.name, role=user.role,
+                          latitude=user.latitude, longitude=user.longitude, capacity_kg=user.capacity_kg)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
@@ -21,35 +40,898 @@ def create_user(db: Session, user: schemas.UserCreate):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
+def get_user_role(db: Session, user_id: int):
+    with _user_role_lock:
+        if user_id in _user_role_cache:
+            _user_role_cache.move_to_end(user_id)
+            return _user_role_cache[user_id]
+    role = db.query(models.User.role).filter(models.User.id == user_id).scalar()
+    if role is not None:
+        with _user_role_lock:
+            _user_role_cache[user_id] = role
+            if len(_user_role_cache) > USER_ROLE_CACHE_SIZE:
+                _user_role_cache.popitem(last=False)
+    return role
+
 def create_event(db: Session, event: schemas.EventCreate, user_id: int, ai_suggestion=None, ai_savings_kg=None, ai_savings_rupees=None):
     db_event = models.Event(
         user_id=user_id,
         event_type=event.event_type,
         guest_count=event.guest_count,
         food_types=event.food_types,
+        location=event.location,
+        seasonality=event.seasonality,
         ai_suggestion=ai_suggestion,
         ai_savings_kg=ai_savings_kg,
         ai_savings_rupees=ai_savings_rupees
     )
     db.add(db_event)
+    bump_event_stats(db, db_event)
     db.commit()
     db.refresh(db_event)
     return db_event
 
-def create_surplus_listing(db: Session, listing: schemas.SurplusListingCreate, user_id: int, ai_optimized=False):
-    db_listing = models.SurplusListing(
+def notify_listing_change(db: Session, event_type: str, listings):
+    """Announce committed listing changes.
+
+    Moves the ETag versions, drops cached analytics and publishes to the live
+    feed. ``event_type`` is one of created, claimed, collected or expired; each
+    listing is sent in full so subscribers can upsert it.
+
+    The write has already committed, so a failing step is logged and the
+    remaining steps still run; the caller's request succeeds either way.
+    """
+    if not listings:
+        return
+    payloads = [
+        schemas.SurplusListingResponse.model_validate(listing, from_attributes=True).model_dump(mode="json")
+        for listing in listings
+    ]
+    _after_commit(event_type, "bump change versions", bump_change_versions, db, [LISTINGS_SCOPE] + [
+        user_listings_scope(user_id)
+        for listing in listings
+        for user_id in (listing.user_id, listing.claimed_by_id)
+        if user_id is not None
+    ])
+    _after_commit(event_type, "invalidate the analytics cache", cache.invalidate)
+    for payload in payloads:
+        _after_commit(event_type, "publish to the live feed", broker.publish, event_type, payload)
+
+def _after_commit(event_type, step, action, *args):
+    try:
+        action(*args)
+    except Exception as e:
+        print(f"❌ Could not {step} for {event_type} listings: {e}")
+
+def _increment_row(db: Session, table, key, deltas):
+    """Add ``deltas`` to the counters of the row at ``key``, creating it at zero if missing (no commit)."""
+    increment = update(table).where(*(table.c[name] == value for name, value in key.items())).values(
+        {name: table.c[name] + delta for name, delta in deltas.items()}
+    )
+    if db.execute(increment).rowcount:
+        return
+    zeros = {col.key: 0 for col in table.c if col.key not in key}
+    try:
+        with db.begin_nested():
+            db.execute(insert(table).values(zeros | deltas | key))
+    except IntegrityError:
+        # Another transaction created the row first
+        db.execute(increment)
+
+# --- Change versions ---
+# Monotonic per-scope counters that read endpoints turn into ETags, so a
+# conditional GET costs one primary-key lookup instead of the full query.
+# They are bumped after each listing write commits, in a short transaction of
+# their own: every write touches the "listings" row, and holding its lock for
+# the whole write transaction would serialize all writers. A version is
+# therefore never older than the data it covers; if the process dies between
+# the two commits, clients revalidate again after the next write.
+
+LISTINGS_SCOPE = "listings"
+
+def user_listings_scope(user_id: int):
+    return f"listings:user:{user_id}"
+
+def bump_change_versions(db: Session, scopes):
+    """Increment the version of each scope in a separate, committed transaction.
+
+    Runs on its own session so the caller's objects are not expired.
+    """
+    versions_table = models.ChangeVersion.__table__
+    with Session(bind=db.get_bind()) as versions_db:
+        for scope in sorted(set(scopes)):
+            _increment_row(versions_db, versions_table, {"scope": scope}, {"version": 1})
+        versions_db.commit()
+
+def get_change_versions(db: Session, scopes):
+    """Return ``{scope: version}``; scopes never written are at version 0."""
+    versions = dict.fromkeys(scopes, 0)
+    rows = db.query(models.ChangeVersion.scope, models.ChangeVersion.version).filter(
+        models.ChangeVersion.scope.in_(scopes)
+    )
+    versions.update(rows)
+    return versions
+
+# --- Per-user rollups ---
+# user_listing_stats is kept exact by applying counter deltas in the same
+# transaction as every listing write, so stats reads are primary-key lookups.
+
+ROLLUP_COUNTERS = (
+    "total_listings", "available_listings", "claimed_listings", "collected_listings",
+    "expired_listings", "total_quantity_kg", "ai_optimized_count",
+    "ngo_active_claims", "ngo_collections", "ngo_collected_kg",
+)
+
+def bump_user_stats(db: Session, deltas_by_user):
+    """Apply ``{user_id: {counter: delta}}`` to the rollup table (no commit).
+
+    Rows are touched in user_id order so concurrent writers lock them in the
+    same order.
+    """
+    stats_table = models.UserListingStats.__table__
+    for user_id in sorted(deltas_by_user):
+        deltas = {name: delta for name, delta in deltas_by_user[user_id].items() if delta}
+        if user_id is None or not deltas:
+            continue
+        _increment_row(db, stats_table, {"user_id": user_id}, deltas)
+
+def _add_deltas(deltas_by_user, user_id, **deltas):
+    user_deltas = deltas_by_user.setdefault(user_id, {})
+    for name, delta in deltas.items():
+        user_deltas[name] = user_deltas.get(name, 0) + delta
+
+def get_user_stats(db: Session, user_id: int):
+    """Return the user's rollup row, or an all-zero row if they have none yet."""
+    stats = db.get(models.UserListingStats, user_id)
+    if stats is None:
+        stats = models.UserListingStats(user_id=user_id, **{name: 0 for name in ROLLUP_COUNTERS})
+    return stats
+
+def get_user_with_stats(db: Session, user_id: int):
+    """Return ``(role, rollup row)`` in one query, or None if the user does not exist."""
+    row = db.query(models.User.role, models.UserListingStats).outerjoin(
+        models.UserListingStats, models.UserListingStats.user_id == models.User.id
+    ).filter(models.User.id == user_id).first()
+    if row is None:
+        return None
+    role, stats = row
+    if stats is None:
+        stats = models.UserListingStats(user_id=user_id, **{name: 0 for name in ROLLUP_COUNTERS})
+    return role, stats
+
+def dashboard_listings(db: Session, sections):
+    """Fetch several independent listing pages in one round trip.
+
+    ``sections`` maps a name to ``(filters, limit)``; each section is its own
+    newest-first page and they are combined with UNION ALL. Returns
+    ``{name: [row, ...]}``.
+    """
+    listings_table = models.SurplusListing.__table__
+    pages = [
+        select(literal(name).label("section"), *_listing_columns)
+        .where(*filters)
+        .order_by(listings_table.c.created_at.desc(), listings_table.c.id.desc())
+        .limit(limit)
+        .subquery()
+        for name, (filters, limit) in sections.items()
+    ]
+    results = {name: [] for name in sections}
+    if not pages:
+        return results
+    for row in db.execute(union_all(*(select(page) for page in pages))):
+        results[row.section].append(row)
+    # UNION ALL does not keep each page's ORDER BY
+    for rows in results.values():
+        rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+    return results
+
+def top_users_by_impact(db: Session, k: int, roles=None):
+    """Return the ``k`` users with the highest impact score.
+
+    The score (collection rate and AI usage at 30 points each, quantity up to
+    40 points at 100 kg) is computed over every user's rollup row in SQL, so
+    the database does the ORDER BY ... LIMIT and only ``k`` rows come back.
+    """
+    stats = models.UserListingStats
+    success_points = stats.collected_listings * 30.0 / stats.total_listings
+    ai_points = stats.ai_optimized_count * 30.0 / stats.total_listings
+    quantity_points = case((stats.total_quantity_kg >= 100, 40.0), else_=stats.total_quantity_kg * 0.4)
+    impact_score = (success_points + ai_points + quantity_points).label("impact_score")
+
+    query = db.query(
+        models.User.id.label("user_id"),
+        models.User.name,
+        impact_score,
+        stats.total_quantity_kg,
+        stats.collected_listings,
+        stats.total_listings
+    ).join(stats, stats.user_id == models.User.id).filter(stats.total_listings > 0)
+    if roles:
+        query = query.filter(models.User.role.in_(roles))
+    return query.order_by(impact_score.desc(), models.User.id).limit(k).all()
+
+# --- Event summaries ---
+# event_stats and event_food_type_stats are bumped in the same transaction as
+# every event and every listing tied to an event, so event analytics read a
+# handful of summary rows however many events there are.
+
+UNKNOWN_EVENT_KEY = "Unknown"
+
+def split_food_types(food_types):
+    return [food_type.strip() for food_type in (food_types or "").split(",") if food_type.strip()]
+
+def _event_stats_key(event_type, seasonality, location):
+    return {
+        "event_type": event_type or UNKNOWN_EVENT_KEY,
+        "seasonality": seasonality or UNKNOWN_EVENT_KEY,
+        "location": location or UNKNOWN_EVENT_KEY,
+    }
+
+def bump_event_stats(db: Session, event: models.Event):
+    """Count a newly added event in the summary tables (no commit)."""
+    key = _event_stats_key(event.event_type, event.seasonality, event.location)
+    _increment_row(db, models.EventStats.__table__, key, {
+        "events": 1,
+        "guest_count": event.guest_count or 0,
+        "ai_savings_kg": event.ai_savings_kg or 0.0,
+        "ai_savings_rupees": event.ai_savings_rupees or 0.0,
+    })
+    for food_type in sorted(set(split_food_types(event.food_types))):
+        _increment_row(db, models.EventFoodTypeStats.__table__,
+                       {"event_type": key["event_type"], "food_type": food_type}, {"events": 1})
+
+def bump_event_listing_stats(db: Session, deltas_by_event):
+    """Apply ``{event_id: {counter: delta}}`` for listings to their events' summary rows (no commit)."""
+    event_ids = [event_id for event_id in deltas_by_event if event_id is not None]
+    if not event_ids:
+        return
+    event = models.Event
+    deltas_by_key = {}
+    for row in db.query(event.id, event.event_type, event.seasonality, event.location).filter(event.id.in_(event_ids)):
+        key = tuple(_event_stats_key(row.event_type, row.seasonality, row.location).items())
+        key_deltas = deltas_by_key.setdefault(key, {})
+        for name, delta in deltas_by_event[row.id].items():
+            key_deltas[name] = key_deltas.get(name, 0) + delta
+    for key in sorted(deltas_by_key):
+        _increment_row(db, models.EventStats.__table__, dict(key), deltas_by_key[key])
+
+def _event_breakdown(rows):
+    events = sum(row.events for row in rows)
+    listings = sum(row.listings for row in rows)
+    return {
+        "events": events,
+        "avg_guest_count": sum(row.guest_count for row in rows) / events if events else 0,
+        "avg_wastage_kg": sum(row.surplus_kg for row in rows) / events if events else 0,
+        "success_rate": (sum(row.collected_listings for row in rows) / listings) * 100 if listings else 0,
+        "avg_ai_savings_kg": sum(row.ai_savings_kg for row in rows) / events if events else 0,
+        "total_ai_savings_rupees": sum(row.ai_savings_rupees for row in rows),
+    }
+
+def build_event_analytics(rows, food_type_counts):
+    """Shape per (event type, season, location) rows as ``schemas.EventAnalytics`` dicts, most events first.
+
+    Rows carry the ``event_stats`` counters (events, guest_count, surplus_kg,
+    listings, collected_listings, ai_savings_kg, ai_savings_rupees);
+    ``food_type_counts`` maps an event type to a ``Counter`` of food types.
+    Both event analytics endpoints go through here so they agree on every field.
+    """
+    rows_by_type = {}
+    for row in rows:
+        rows_by_type.setdefault(row.event_type or UNKNOWN_EVENT_KEY, []).append(row)
+
+    ranked = sorted(rows_by_type.items(), key=lambda item: (-sum(row.events for row in item[1]), item[0]))
+    results = []
+    for type_name, type_rows in ranked:
+        by_season, by_location = {}, {}
+        for row in type_rows:
+            by_season.setdefault(row.seasonality or UNKNOWN_EVENT_KEY, []).append(row)
+            by_location.setdefault(row.location or UNKNOWN_EVENT_KEY, []).append(row)
+        counts = food_type_counts.get(type_name, Counter())
+        summary = _event_breakdown(type_rows)
+        results.append({
+            "event_type": type_name,
+            "avg_guest_count": summary["avg_guest_count"],
+            "avg_wastage_kg": summary["avg_wastage_kg"],
+            "success_rate": summary["success_rate"],
+            "avg_ai_savings_kg": summary["avg_ai_savings_kg"],
+            "total_ai_savings_rupees": summary["total_ai_savings_rupees"],
+            # Most common first, ties alphabetical
+            "common_food_types": sorted(counts, key=lambda food_type: (-counts[food_type], food_type))[:3],
+            "seasonal_trends": {season: _event_breakdown(season_rows) for season, season_rows in by_season.items()},
+            "location_performance": {place: _event_breakdown(place_rows) for place, place_rows in by_location.items()}
+        })
+    return results
+
+def event_type_summaries(db: Session, event_type=None, seasonality=None, location=None):
+    """Event analytics for all time, read from the summary tables."""
+    stats = models.EventStats
+    query = db.query(stats)
+    if event_type is not None:
+        query = query.filter(stats.event_type == event_type)
+    if seasonality is not None:
+        query = query.filter(stats.seasonality == seasonality)
+    if location is not None:
+        query = query.filter(stats.location == location)
+    rows = query.all()
+
+    food_type_counts = {}
+    food_query = db.query(models.EventFoodTypeStats).filter(
+        models.EventFoodTypeStats.event_type.in_({row.event_type for row in rows})
+    )
+    for row in food_query:
+        food_type_counts.setdefault(row.event_type, Counter())[row.food_type] = row.events
+    return build_event_analytics(rows, food_type_counts)
+
+# --- Time-bucketed activity ---
+
+TIME_GRANULARITIES = ("hour", "day", "week", "month")
+
+def _sql_constant(value: str):
+    """Inline a trusted string constant instead of binding it.
+
+    A bound parameter is a separate placeholder at every use, so positional
+    drivers (pg8000, MySQL) give the SELECT and GROUP BY copies of a bucket
+    expression different parameters and the database no longer sees them as
+    the same expression.
+    """
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+def time_bucket(db: Session, column, granularity: str):
+    """SQL expression truncating ``column`` to the start of its hour/day/week/month.
+
+    Weeks start on Monday on every backend.
+    """
+    if granularity not in TIME_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(TIME_GRANULARITIES)}")
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return func.date_trunc(_sql_constant(granularity), column)
+    formats = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d", "month": "%Y-%m-01"}
+    if dialect == "sqlite":
+        if granularity == "week":
+            return func.date(column, _sql_constant("weekday 0"), _sql_constant("-6 days"))
+        return func.strftime(_sql_constant(formats[granularity]), column)
+    # MySQL
+    if granularity == "week":
+        return func.subdate(func.date(column), func.weekday(column))
+    return func.date_format(column, _sql_constant(formats[granularity]))
+
+def listing_timeseries(db: Session, granularity: str, start: datetime.datetime, end: datetime.datetime, *filters):
+    """Listing counts and kilograms per time bucket in ``[start, end)``."""
+    listing = models.SurplusListing
+    bucket = time_bucket(db, listing.created_at, granularity).label("bucket")
+    return db.query(
+        bucket,
+        func.count(listing.id).label("listings"),
+        func.coalesce(func.sum(listing.quantity_kg), 0.0).label("quantity_kg"),
+        func.count(case((listing.status == "collected", 1))).label("collected")
+    ).filter(
+        listing.created_at >= start,
+        listing.created_at < end,
+        *filters
+    ).group_by(bucket).order_by(bucket).all()
+
+def peak_activity_hours(db: Session, *filters, limit=3):
+    """Hours of the day (UTC) with the most listings created."""
+    hour = extract("hour", models.SurplusListing.created_at).label("hour")
+    rows = db.query(hour, func.count(models.SurplusListing.id).label("listings")).filter(
+        *filters
+    ).group_by(hour).order_by(func.count(models.SurplusListing.id).desc(), hour).limit(limit).all()
+    return [int(row.hour) for row in rows]
+
+def popular_food_types(db: Session, *filters, limit=3):
+    """Most frequent food types across events.
+
+    ``food_types`` is a comma-separated list, so the database groups identical
+    lists and only the distinct lists are split here.
+    """
+    counts = Counter()
+    rows = db.query(models.Event.food_types, func.count(models.Event.id)).filter(
+        models.Event.food_types.isnot(None), *filters
+    ).group_by(models.Event.food_types)
+    for food_types, count in rows:
+        for food_type in split_food_types(food_types):
+            counts[food_type] += count
+    return [food_type for food_type, _ in counts.most_common(limit)]
+
+def listing_growth(db: Session, now: datetime.datetime, days=7):
+    """Listings created in the last ``days`` and in the ``days`` before that."""
+    listing = models.SurplusListing
+    recent_start = now - datetime.timedelta(days=days)
+    previous_start = recent_start - datetime.timedelta(days=days)
+    return db.query(
+        func.count(case((listing.created_at >= recent_start, 1))).label("recent"),
+        func.count(case((listing.created_at < recent_start, 1))).label("previous")
+    ).filter(listing.created_at >= previous_start, listing.created_at < now).one()
+
+# --- Filtered analytics ---
+# Listing filters are plain predicates on surplus_listings so the created_at
+# range is a scan of one of its (…, created_at, id) indexes; event filters are
+# a semi-join through ix_events_type_location and ix_surplus_listings_event_created.
+
+def analytics_filters(start=None, end=None, user_id=None, event_type=None, location=None):
+    """Build the listing predicates for an ``AnalyticsRequest``."""
+    listing = models.SurplusListing
+    filters = []
+    if start is not None:
+        filters.append(listing.created_at >= start)
+    if end is not None:
+        filters.append(listing.created_at < end)
+    if user_id is not None:
+        filters.append(listing.user_id == user_id)
+    scoped_events = event_filters(event_type, location)
+    if scoped_events:
+        filters.append(listing.event_id.in_(select(models.Event.id).where(*scoped_events)))
+    return filters
+
+def event_filters(event_type=None, location=None):
+    filters = []
+    if event_type is not None:
+        filters.append(models.Event.event_type == event_type)
+    if location is not None:
+        filters.append(models.Event.location == location)
+    return filters
+
+def top_contributors(db: Session, *filters, limit=5):
+    """Rank listing owners by impact score over the listings matching ``filters``.
+
+    Same scoring as ``top_users_by_impact`` but aggregated from the listings
+    themselves, since the rollups cover all time.
+    """
+    listing = models.SurplusListing
+    total = func.count(listing.id)
+    collected = func.count(case((listing.status == "collected", 1)))
+    ai_optimized = func.count(case((listing.ai_optimized.is_(True), 1)))
+    quantity = func.coalesce(func.sum(listing.quantity_kg), 0.0)
+    impact_score = (
+        collected * 30.0 / total
+        + ai_optimized * 30.0 / total
+        + case((quantity >= 100, 40.0), else_=quantity * 0.4)
+    ).label("impact_score")
+    return db.query(
+        models.User.id.label("user_id"),
+        models.User.name,
+        impact_score,
+        quantity.label("total_quantity_kg"),
+        collected.label("collected_listings"),
+        total.label("total_listings")
+    ).join(listing, listing.user_id == models.User.id).filter(*filters).group_by(
+        models.User.id, models.User.name
+    ).order_by(impact_score.desc(), models.User.id).limit(limit).all()
+
+def event_analytics(db: Session, start=None, end=None, user_id=None, event_type=None, location=None):
+    """Event analytics over the listings matching an ``AnalyticsRequest``.
+
+    Only events with listings in the date range count, and only those
+    listings' kilograms and claims. Same shape and rules as
+    ``event_type_summaries``, computed with grouped SQL instead of read
+    from the summary tables.
+    """
+    listing = models.SurplusListing
+    event = models.Event
+    per_event = select(
+        listing.event_id,
+        func.count(listing.id).label("listings"),
+        func.count(case((listing.status == "collected", 1))).label("collected"),
+        func.coalesce(func.sum(listing.quantity_kg), 0.0).label("quantity_kg")
+    ).where(
+        listing.event_id.isnot(None),
+        *analytics_filters(start, end, user_id)
+    ).group_by(listing.event_id).subquery()
+
+    def grouped(*columns):
+        return db.query(*columns).join(
+            per_event, per_event.c.event_id == event.id
+        ).filter(*event_filters(event_type, location))
+
+    rows = grouped(
+        event.event_type,
+        event.seasonality,
+        event.location,
+        func.count(event.id).label("events"),
+        func.coalesce(func.sum(event.guest_count), 0).label("guest_count"),
+        func.coalesce(func.sum(per_event.c.quantity_kg), 0.0).label("surplus_kg"),
+        func.coalesce(func.sum(per_event.c.listings), 0).label("listings"),
+        func.coalesce(func.sum(per_event.c.collected), 0).label("collected_listings"),
+        func.coalesce(func.sum(event.ai_savings_kg), 0.0).label("ai_savings_kg"),
+        func.coalesce(func.sum(event.ai_savings_rupees), 0.0).label("ai_savings_rupees")
+    ).group_by(event.event_type, event.seasonality, event.location).all()
+
+    food_type_counts = {}
+    for row in grouped(event.event_type, event.food_types, func.count(event.id)).filter(
+        event.food_types.isnot(None)
+    ).group_by(event.event_type, event.food_types):
+        counts = food_type_counts.setdefault(row[0] or UNKNOWN_EVENT_KEY, Counter())
+        # An event counts once per food type, as in event_food_type_stats
+        for food_type in set(split_food_types(row[1])):
+            counts[food_type] += row[2]
+    return build_event_analytics(rows, food_type_counts)
+
+# --- Full-text search ---
+# PostgreSQL keeps a tsvector column under a GIN index, SQLite a contentless
+# FTS5 table keyed by listing id. Other backends fall back to LIKE matching.
+
+_listings_fts = table("surplus_listings_fts", column("rowid"), column("description"), column("rank"))
+
+def _index_for_search(db: Session, listing_ids):
+    """Add freshly inserted listings to the full-text index (same transaction)."""
+    if not listing_ids:
+        return
+    dialect = db.get_bind().dialect.name
+    listings_table = models.SurplusListing.__table__
+    if dialect == "postgresql":
+        db.execute(
+            update(listings_table)
+            .where(listings_table.c.id.in_(listing_ids))
+            .values(search_vector=func.to_tsvector("english", func.coalesce(listings_table.c.description, "")))
+        )
+    elif dialect == "sqlite":
+        db.execute(
+            insert(_listings_fts).from_select(
+                ["rowid", "description"],
+                select(listings_table.c.id, func.coalesce(listings_table.c.description, "")).where(listings_table.c.id.in_(listing_ids))
+            )
+        )
+
+def search_surplus_listings(db: Session, q: str, status="available", limit=20, offset=0):
+    """Return listings matching every word of ``q``, best match first."""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return []
+    query = db.query(models.SurplusListing)
+    if status is not None:
+        query = query.filter(models.SurplusListing.status == status)
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        ts_query = func.plainto_tsquery("english", " ".join(terms))
+        query = query.filter(models.SurplusListing.search_vector.op("@@")(ts_query)).order_by(
+            func.ts_rank(models.SurplusListing.search_vector, ts_query).desc(),
+            models.SurplusListing.id.desc()
+        )
+    elif dialect == "sqlite":
+        # Quote each term so FTS5 treats user input as plain words
+        match = " ".join('"%s"' % term for term in terms)
+        query = query.join(_listings_fts, _listings_fts.c.rowid == models.SurplusListing.id).filter(
+            text("surplus_listings_fts MATCH :match").bindparams(match=match)
+        ).order_by(_listings_fts.c.rank, models.SurplusListing.id.desc())
+    else:
+        for term in terms:
+            query = query.filter(models.SurplusListing.description.ilike(f"%{term}%"))
+        query = query.order_by(models.SurplusListing.created_at.desc(), models.SurplusListing.id.desc())
+    return query.offset(offset).limit(limit).all()
+
+def _new_surplus_listing(listing: schemas.SurplusListingCreate, user_id: int, ai_optimized=False):
+    expires_at = listing.expires_at
+    if expires_at is None and settings.LISTING_DEFAULT_TTL_HOURS > 0:
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=settings.LISTING_DEFAULT_TTL_HOURS)
+    return models.SurplusListing(
+        expires_at=expires_at,
         user_id=user_id,
         event_id=listing.event_id,
         description=listing.description,
         quantity_kg=listing.quantity_kg,
         photo_url=listing.photo_url,
-        ai_optimized=ai_optimized
+        ai_optimized=ai_optimized,
+        latitude=listing.latitude,
+        longitude=listing.longitude,
+        geo_cell=geo.cell_for(listing.latitude, listing.longitude)
     )
+
+def create_surplus_listing(db: Session, listing: schemas.SurplusListingCreate, user_id: int, ai_optimized=False):
+    db_listing = _new_surplus_listing(listing, user_id, ai_optimized)
     db.add(db_listing)
+    db.flush()
+    _index_for_search(db, [db_listing.id])
+    bump_user_stats(db, {user_id: {
+        "total_listings": 1,
+        "available_listings": 1,
+        "total_quantity_kg": db_listing.quantity_kg or 0.0,
+        "ai_optimized_count": 1 if ai_optimized else 0,
+    }})
+    bump_event_listing_stats(db, {db_listing.event_id: {
+        "listings": 1,
+        "surplus_kg": db_listing.quantity_kg or 0.0,
+    }})
     db.commit()
     db.refresh(db_listing)
+    notify_listing_change(db, "created", [db_listing])
     return db_listing
 
+def create_surplus_listings_bulk(db: Session, listings, user_id: int):
+    """Insert many listings in one transaction and return their ids.
+
+    Uses a single executemany INSERT ... RETURNING and never refreshes rows
+    one at a time. Only PostgreSQL gets the rows batched into multi-row
+    VALUES: SQLite cannot match ordered RETURNING rows to a batch and MySQL
+    has no RETURNING, so both still send one INSERT per row. There the gain
+    is only the single transaction and the once-per-batch search index,
+    rollup and change-feed writes.
+    """
+    if not listings:
+        return []
+    db_listings = [_new_surplus_listing(listing, user_id) for listing in listings]
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        listings_table = models.SurplusListing.__table__
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                col.key: getattr(db_listing, col.key)
+                for col in listings_table.c if col.key not in ("id", "created_at", "status")
+            } | {"status": "available", "created_at": now}
+            for db_listing in db_listings
+        ]
+        # RETURNING rows do not have to come back in VALUES order; ask
+        # SQLAlchemy to match them to the parameter sets
+        result = db.execute(
+            insert(listings_table).returning(listings_table.c.id, sort_by_parameter_order=True), rows
+        )
+        ids = list(result.scalars())
+        for db_listing, listing_id, row in zip(db_listings, ids, rows):
+            db_listing.id = listing_id
+            db_listing.status = row["status"]
+            db_listing.created_at = row["created_at"]
+    else:
+        db.add_all(db_listings)
+        db.flush()
+        ids = [db_listing.id for db_listing in db_listings]
+    _index_for_search(db, ids)
+    bump_user_stats(db, {user_id: {
+        "total_listings": len(db_listings),
+        "available_listings": len(db_listings),
+        "total_quantity_kg": sum(db_listing.quantity_kg or 0.0 for db_listing in db_listings),
+    }})
+    deltas_by_event = {}
+    for db_listing in db_listings:
+        event_deltas = deltas_by_event.setdefault(db_listing.event_id, {"listings": 0, "surplus_kg": 0.0})
+        event_deltas["listings"] += 1
+        event_deltas["surplus_kg"] += db_listing.quantity_kg or 0.0
+    bump_event_listing_stats(db, deltas_by_event)
+    # Serialize before commit expires the ORM objects
+    created = [schemas.SurplusListingResponse.model_validate(l, from_attributes=True) for l in db_listings]
+    db.commit()
+    notify_listing_change(db, "created", created)
+    return ids
+
+def listing_aggregates(db: Session, *filters):
+    """Count listings per status and sum their quantity in one aggregate row.
+
+    ``COUNT(CASE WHEN ...)`` is the portable spelling of
+    ``COUNT(*) FILTER (WHERE ...)``, which MySQL lacks.
+    """
+    listing = models.SurplusListing
+    return db.query(
+        func.count(listing.id).label("total"),
+        func.count(case((listing.status == "available", 1))).label("available"),
+        func.count(case((listing.status == "claimed", 1))).label("claimed"),
+        func.count(case((listing.status == "collected", 1))).label("collected"),
+        func.count(case((listing.status == "expired", 1))).label("expired"),
+        func.count(case((listing.ai_optimized.is_(True), 1))).label("ai_optimized"),
+        func.coalesce(func.sum(listing.quantity_kg), 0.0).label("total_quantity_kg")
+    ).filter(*filters).one()
+
+def list_surplus_listings(db: Session, status=None, user_id=None, min_quantity_kg=None, created_after=None, after=None, limit=50, claimed_by_id=None):
+    """Return one keyset page of listings ordered newest first.
+
+    ``after`` is the ``(created_at, id)`` pair of the last row on the previous
+    page, so each page is an index range scan instead of an OFFSET walk.
+    """
+    query = db.query(models.SurplusListing)
+    if status is not None:
+        query = query.filter(models.SurplusListing.status == status)
+    if user_id is not None:
+        query = query.filter(models.SurplusListing.user_id == user_id)
+    if claimed_by_id is not None:
+        query = query.filter(models.SurplusListing.claimed_by_id == claimed_by_id)
+    if min_quantity_kg is not None:
+        query = query.filter(models.SurplusListing.quantity_kg >= min_quantity_kg)
+    if created_after is not None:
+        query = query.filter(models.SurplusListing.created_at > created_after)
+    if after is not None:
+        query = query.filter(tuple_(models.SurplusListing.created_at, models.SurplusListing.id) < tuple_(*after))
+    return query.order_by(
+        models.SurplusListing.created_at.desc(),
+        models.SurplusListing.id.desc()
+    ).limit(limit).all()
+
+def _claim_deltas(rows):
+    deltas_by_user = {}
+    for row in rows:
+        _add_deltas(deltas_by_user, row.user_id, available_listings=-1, claimed_listings=1)
+        _add_deltas(deltas_by_user, row.claimed_by_id, ngo_active_claims=1)
+    return deltas_by_user
+
+def claim_surplus_listing(db: Session, listing_id: int, ngo_id: int):
+    """Atomically move a listing from available to claimed.
+
+    The availability check and the write are one conditional UPDATE, so two
+    NGOs racing for the same listing cannot both win. Returns the claimed row,
+    or None when the listing is missing or no longer available.
+    """
+    listings_table = models.SurplusListing.__table__
+    stmt = update(listings_table).where(
+        listings_table.c.id == listing_id,
+        listings_table.c.status == "available"
+    ).values(status="claimed", claimed_by_id=ngo_id)
+
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(*_listing_columns)).first()
+    else:
+        # e.g. MySQL: the row lock taken by the UPDATE keeps the re-read consistent
+        row = None
+        if db.execute(stmt).rowcount == 1:
+            row = db.execute(select(*_listing_columns).where(listings_table.c.id == listing_id)).first()
+    if row is not None:
+        bump_user_stats(db, _claim_deltas([row]))
+    db.commit()
+    if row is not None:
+        notify_listing_change(db, "claimed", [row])
+    return row
+
+def collect_surplus_listing(db: Session, listing_id: int):
+    """Atomically move a listing from claimed to collected.
+
+    Returns the collected row, or None when the listing is missing or not
+    currently claimed.
+    """
+    listings_table = models.SurplusListing.__table__
+    stmt = update(listings_table).where(
+        listings_table.c.id == listing_id,
+        listings_table.c.status == "claimed"
+    ).values(status="collected")
+
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(*_listing_columns)).first()
+    else:
+        row = None
+        if db.execute(stmt).rowcount == 1:
+            row = db.execute(select(*_listing_columns).where(listings_table.c.id == listing_id)).first()
+    if row is not None:
+        deltas_by_user = {}
+        _add_deltas(deltas_by_user, row.user_id, claimed_listings=-1, collected_listings=1)
+        _add_deltas(deltas_by_user, row.claimed_by_id,
+                    ngo_active_claims=-1, ngo_collections=1, ngo_collected_kg=row.quantity_kg or 0.0)
+        bump_user_stats(db, deltas_by_user)
+        bump_event_listing_stats(db, {row.event_id: {"collected_listings": 1}})
+    db.commit()
+    if row is not None:
+        notify_listing_change(db, "collected", [row])
+    return row
+
+def claim_listings_bulk(db: Session, listing_ids_by_ngo):
+    """Claim many listings for many NGOs in one transaction.
+
+    Each NGO's share is one conditional UPDATE, so listings claimed by
+    someone else in the meantime are skipped. Returns the claimed rows.
+    """
+    listings_table = models.SurplusListing.__table__
+    returning = db.get_bind().dialect.update_returning
+    claimed = []
+    for ngo_id, listing_ids in listing_ids_by_ngo.items():
+        stmt = update(listings_table).where(
+            listings_table.c.id.in_(listing_ids),
+            listings_table.c.status == "available"
+        ).values(status="claimed", claimed_by_id=ngo_id)
+        if returning:
+            claimed.extend(db.execute(stmt.returning(*_listing_columns)).all())
+        else:
+            db.execute(stmt)
+            claimed.extend(db.execute(select(*_listing_columns).where(
+                listings_table.c.id.in_(listing_ids),
+                listings_table.c.claimed_by_id == ngo_id,
+                listings_table.c.status == "claimed"
+            )).all())
+    bump_user_stats(db, _claim_deltas(claimed))
+    db.commit()
+    notify_listing_change(db, "claimed", claimed)
+    return claimed
+
+def load_matching_inputs(db: Session):
+    """Return (listings, ngos) rows for the matching solver.
+
+    NGO capacity is reduced by what they have claimed but not yet collected.
+    """
+    listings = db.query(
+        models.SurplusListing.id,
+        models.SurplusListing.latitude,
+        models.SurplusListing.longitude,
+        models.SurplusListing.quantity_kg
+    ).filter(
+        models.SurplusListing.status == "available",
+        models.SurplusListing.latitude.isnot(None),
+        models.SurplusListing.longitude.isnot(None)
+    ).all()
+
+    outstanding = dict(db.query(
+        models.SurplusListing.claimed_by_id,
+        func.sum(models.SurplusListing.quantity_kg)
+    ).filter(
+        models.SurplusListing.status == "claimed"
+    ).group_by(models.SurplusListing.claimed_by_id).all())
+
+    ngos = []
+    for ngo in db.query(
+        models.User.id,
+        models.User.latitude,
+        models.User.longitude,
+        models.User.capacity_kg
+    ).filter(
+        models.User.role == "ngo",
+        models.User.latitude.isnot(None),
+        models.User.longitude.isnot(None)
+    ):
+        capacity = ngo.capacity_kg
+        if capacity is not None:
+            capacity = max(0.0, capacity - (outstanding.get(ngo.id) or 0.0))
+        ngos.append((ngo.id, ngo.latitude, ngo.longitude, capacity))
+    return listings, ngos
+
+def expire_due_listings(db: Session, now: datetime.datetime, batch_size: int):
+    """Expire up to ``batch_size`` available listings whose expiry has passed.
+
+    Due rows are found by a range scan on (status, expires_at), oldest first,
+    and the UPDATE re-checks the status so a concurrent claim always wins.
+    Returns the expired rows.
+    """
+    listings_table = models.SurplusListing.__table__
+    due_ids = select(listings_table.c.id).where(
+        listings_table.c.status == "available",
+        listings_table.c.expires_at <= now
+    ).order_by(listings_table.c.expires_at).limit(batch_size)
+    ids = list(db.execute(due_ids).scalars())
+    if not ids:
+        return []
+
+    stmt = update(listings_table).where(
+        listings_table.c.id.in_(ids),
+        listings_table.c.status == "available"
+    ).values(status="expired")
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*_listing_columns)).all()
+    else:
+        db.execute(stmt)
+        rows = db.execute(select(*_listing_columns).where(
+            listings_table.c.id.in_(ids),
+            listings_table.c.status == "expired"
+        )).all()
+    deltas_by_user = {}
+    for row in rows:
+        _add_deltas(deltas_by_user, row.user_id, available_listings=-1, expired_listings=1)
+    bump_user_stats(db, deltas_by_user)
+    db.commit()
+    notify_listing_change(db, "expired", rows)
+    return rows
+
+def oldest_due_expiry(db: Session, now: datetime.datetime):
+    """Return the earliest expires_at still waiting to be swept, if any."""
+    return db.query(func.min(models.SurplusListing.expires_at)).filter(
+        models.SurplusListing.status == "available",
+        models.SurplusListing.expires_at <= now
+    ).scalar()
+
+def list_nearby_surplus_listings(db: Session, lat: float, lon: float, radius_km: float, limit=50):
+    """Return ``(listing, distance_km)`` pairs within the radius, nearest first.
+
+    Only rows in the grid cells covering the circle are loaded; exact
+    distances are computed for those candidates alone.
+    """
+    cell_filters = [
+        models.SurplusListing.geo_cell.between(low, high)
+        for low, high in geo.cell_ranges(lat, lon, radius_km)
+    ]
+    candidates = db.query(models.SurplusListing).filter(
+        models.SurplusListing.status == "available",
+        or_(*cell_filters)
+    ).all()
+
+    nearby = []
+    for listing in candidates:
+        distance = geo.haversine_km(lat, lon, listing.latitude, listing.longitude)
+        if distance <= radius_km:
+            nearby.append((listing, distance))
+    nearby.sort(key=lambda pair: pair[1])
+    return nearby[:limit]
+
 def create_feedback(db: Session, feedback: schemas.FeedbackCreate, user_id: int):
     db_feedback = models.Feedback(
         user_id=user_id,
@@ -0,0 +1,145 @@
+"""Streaming table exports.
+
+Rows are read with a server-side cursor (``stream_results`` + ``yield_per``)
+and encoded one batch at a time, so memory stays flat however large the
+table is. The API serves CSV and NDJSON; Parquet is for offline jobs and
+needs pyarrow.
+
+Usage: python -m backend.export TABLE OUTPUT [--format csv|ndjson|parquet]
+"""
+import argparse
+import csv
+import datetime
+import io
+import json
+from sqlalchemy import select
+from . import models
+from .database import engine
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for Parquet
+    pyarrow = None
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_TABLES = {
+    "surplus_listings": models.SurplusListing.__table__,
+    "events": models.Event.__table__,
+    "feedbacks": models.Feedback.__table__,
+}
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_columns(table_name):
+    table = EXPORT_TABLES[table_name]
+    # The search vector is an index, not data
+    return [col for col in table.c if col.key != "search_vector"]
+
+
+def iter_batches(table_name, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of row tuples in primary-key order, ``batch_size`` at a time.
+
+    Opens its own connection so it can outlive the request's session.
+    """
+    table = EXPORT_TABLES[table_name]
+    query = select(*export_columns(table_name)).order_by(*table.primary_key.columns)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+def _plain_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(table_name, batch_size=EXPORT_BATCH_SIZE):
+    """Yield CSV text, one chunk per batch, starting with the header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([col.key for col in export_columns(table_name)])
+    for batch in iter_batches(table_name, batch_size):
+        writer.writerows([_plain_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(table_name, batch_size=EXPORT_BATCH_SIZE):
+    """Yield newline-delimited JSON, one chunk per batch."""
+    keys = [col.key for col in export_columns(table_name)]
+    for batch in iter_batches(table_name, batch_size):
+        yield "".join(
+            json.dumps({key: _plain_value(value) for key, value in zip(keys, row)}) + "\n"
+            for row in batch
+        )
+
+
+def _arrow_type(col):
+    python_type = col.type.python_type
+    if python_type is bool:
+        return pyarrow.bool_()
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is float:
+        return pyarrow.float64()
+    if python_type is datetime.datetime:
+        return pyarrow.timestamp("us")
+    return pyarrow.string()
+
+
+def write_parquet(table_name, path, batch_size=EXPORT_BATCH_SIZE):
+    """Write the table to a Parquet file one row group per batch; returns the row count."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    columns = export_columns(table_name)
+    schema = pyarrow.schema([(col.key, _arrow_type(col)) for col in columns])
+    rows = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for batch in iter_batches(table_name, batch_size):
+            arrays = [
+                pyarrow.array([row[index] for row in batch], type=schema.field(index).type)
+                for index in range(len(columns))
+            ]
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+            rows += len(batch)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="defaults to the output file's extension")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    export_format = args.format or args.output.rsplit(".", 1)[-1]
+    if export_format not in EXPORT_FORMATS:
+        parser.error(f"cannot infer the format from {args.output!r}; pass --format")
+
+    if export_format == "parquet":
+        rows = write_parquet(args.table, args.output, args.batch_size)
+        print(f"✅ Exported {rows} rows from {args.table} to {args.output}")
+        return
+    chunks = iter_csv if export_format == "csv" else iter_ndjson
+    with open(args.output, "w", newline="") as output:
+        for chunk in chunks(args.table, args.batch_size):
+            output.write(chunk)
+    print(f"✅ Exported {args.table} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
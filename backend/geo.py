@@ -0,0 +1,74 @@
+"""Grid bucketing for listing coordinates.
+
+The globe is cut into fixed CELL_DEGREES squares numbered row-major, so a
+radius search becomes a handful of contiguous ``geo_cell`` ranges (one per
+grid row) that the composite ``(status, geo_cell)`` index can range-scan.
+Exact distances are then only computed for the rows inside those cells.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.05  # roughly 5.5 km at the equator
+
+_COLUMNS = int(round(360 / CELL_DEGREES))
+_ROWS = int(round(180 / CELL_DEGREES))
+
+
+def _row(lat):
+    return min(max(int((lat + 90) / CELL_DEGREES), 0), _ROWS - 1)
+
+
+def _column(lon):
+    return int(((lon + 180) % 360) / CELL_DEGREES) % _COLUMNS
+
+
+def cell_for(lat, lon):
+    """Return the grid cell number containing the given point."""
+    if lat is None or lon is None:
+        return None
+    return _row(lat) * _COLUMNS + _column(lon)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_ranges(lat, lon, radius_km):
+    """Return inclusive ``(low, high)`` cell ranges covering a search circle.
+
+    The bounding box is widened using the latitude furthest from the equator,
+    so every point within ``radius_km`` falls inside one of the ranges.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    widest = max(abs(lat_lo), abs(lat_hi))
+
+    if widest >= 89.9:
+        spans = [(0, _COLUMNS - 1)]
+    else:
+        dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(widest))))
+        if dlon >= 180:
+            spans = [(0, _COLUMNS - 1)]
+        else:
+            col_lo, col_hi = _column(lon - dlon), _column(lon + dlon)
+            if col_lo <= col_hi:
+                spans = [(col_lo, col_hi)]
+            else:
+                # The box crosses the antimeridian; listed in cell order so a
+                # row's eastern span merges with the next row's western one
+                spans = [(0, col_hi), (col_lo, _COLUMNS - 1)]
+
+    ranges = []
+    for row in range(_row(lat_lo), _row(lat_hi) + 1):
+        for col_lo, col_hi in spans:
+            low, high = row * _COLUMNS + col_lo, row * _COLUMNS + col_hi
+            if ranges and ranges[-1][1] + 1 == low:
+                ranges[-1] = (ranges[-1][0], high)
+            else:
+                ranges.append((low, high))
+    return ranges
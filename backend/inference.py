@@ -0,0 +1,139 @@
+"""Dedicated executor for model inference.
+
+Shorting routes await ``InferenceExecutor.predict`` instead of running the
+forest in Starlette's threadpool, so a burst of predictions cannot starve
+the database-bound endpoints that share that pool.
+
+- Requests that arrive within INFERENCE_BATCH_WINDOW_MS are merged into one
+  call of the predict function (one stacked matrix through the model); a
+  batch is sent early once it reaches INFERENCE_MAX_BATCH_ROWS.
+- At most INFERENCE_WORKERS batches run at once, on the executor's own
+  threads.
+- At most INFERENCE_QUEUE_SIZE requests may be waiting or running; beyond
+  that ``predict`` raises ``InferenceQueueFull`` and the route answers 503
+  with Retry-After.
+
+All bookkeeping happens on the event loop thread, so it needs no locks.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from .config import settings
+
+# Upper bounds of the histogram buckets; larger values land in "inf"
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+# Arrivals at an empty queue get a bucket of their own
+QUEUE_DEPTH_BUCKETS = (0,) + HISTOGRAM_BUCKETS
+
+
+class InferenceQueueFull(Exception):
+    pass
+
+
+def _histogram(buckets=HISTOGRAM_BUCKETS):
+    return {str(bound): 0 for bound in buckets} | {"inf": 0}
+
+
+def _observe(histogram, value):
+    # Keys are in bucket order, with "inf" last
+    for bound in histogram:
+        if bound == "inf" or value <= int(bound):
+            histogram[bound] += 1
+            return
+
+
+class InferenceExecutor:
+    def __init__(self, predict_fn, workers=2, queue_size=256, batch_window_ms=2, max_batch_rows=512):
+        """``predict_fn(input_dicts, model)`` returns one prediction per input."""
+        self.predict_fn = predict_fn
+        self.queue_size = queue_size
+        self.batch_window_seconds = batch_window_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        # Requests waiting for the batch window to close: (input_dicts, model, future)
+        self._pending = []
+        self._pending_rows = 0
+        self._flush_handle = None
+        self._batches = set()
+        self.queue_depth = 0
+        self.metrics = {
+            "requests": 0,
+            "rejected": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_queue_depth": 0,
+            "batch_rows": _histogram(),
+            "batch_requests": _histogram(),
+            "queue_depth_on_arrival": _histogram(QUEUE_DEPTH_BUCKETS),
+        }
+
+    async def predict(self, input_dicts, model):
+        """Predict ``input_dicts`` with ``model`` as part of the next batch."""
+        if self.queue_depth >= self.queue_size:
+            self.metrics["rejected"] += 1
+            raise InferenceQueueFull()
+        _observe(self.metrics["queue_depth_on_arrival"], self.queue_depth)
+        self.queue_depth += 1
+        self.metrics["requests"] += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self.queue_depth)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((input_dicts, model, future))
+        self._pending_rows += len(input_dicts)
+        if self._pending_rows >= self.max_batch_rows:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window_seconds, self._flush)
+        try:
+            return await future
+        finally:
+            self.queue_depth -= 1
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        # A hot reload can leave requests for two models in one window
+        by_model = {}
+        for item in pending:
+            by_model.setdefault(id(item[1]), []).append(item)
+        for items in by_model.values():
+            # Hold a reference so the task is not garbage collected mid-run
+            task = asyncio.ensure_future(self._run_batch(items))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, items):
+        model = items[0][1]
+        inputs = [input_dict for input_dicts, _, _ in items for input_dict in input_dicts]
+        self.metrics["batches"] += 1
+        _observe(self.metrics["batch_rows"], len(inputs))
+        _observe(self.metrics["batch_requests"], len(items))
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(self._pool, self.predict_fn, inputs, model)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        start = 0
+        for input_dicts, _, future in items:
+            # The caller may have gone away (client disconnect)
+            if not future.done():
+                future.set_result(predictions[start:start + len(input_dicts)])
+            start += len(input_dicts)
+
+    def stats(self):
+        return {**self.metrics, "queue_depth": self.queue_depth, "pending_requests": len(self._pending)}
+
+
+def create_inference_executor(predict_fn):
+    return InferenceExecutor(
+        predict_fn,
+        workers=settings.INFERENCE_WORKERS,
+        queue_size=settings.INFERENCE_QUEUE_SIZE,
+        batch_window_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+        max_batch_rows=settings.INFERENCE_MAX_BATCH_ROWS,
+    )
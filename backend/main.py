@@ -1,15 +1,18 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .database import Base, engine
 from .config import settings
-from .api import router as api_router
+from .api import router as api_router, inference_executor, prediction_cache
+from .sweeper import sweeper
+from .model_registry import model_registry
+from .cache import cache
 import os
 
-app = FastAPI(title="SurplusServe API", version="1.0.0")
-
-# Initialize database tables
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize database tables
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
@@ -17,6 +20,20 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
 
+    sweeper_task = None
+    if settings.EXPIRY_SWEEP_ENABLED:
+        sweeper_task = asyncio.create_task(sweeper.run())
+    model_watch_task = None
+    if settings.MODEL_REGISTRY_POLL_SECONDS > 0:
+        model_watch_task = asyncio.create_task(model_registry.watch(settings.MODEL_REGISTRY_POLL_SECONDS))
+    yield
+    if sweeper_task:
+        sweeper_task.cancel()
+    if model_watch_task:
+        model_watch_task.cancel()
+
+app = FastAPI(title="SurplusServe API", version="1.0.0", lifespan=lifespan)
+
 # Allow CORS for frontend (production and development)
 origins = [
     "http://localhost:3000",
@@ -34,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(api_router, prefix="/api")
@@ -46,6 +64,26 @@ def read_root():
 def health_check():
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/metrics/expiry")
+def expiry_metrics():
+    """Expiry sweeper counters: rows expired per tick, lag and errors."""
+    return sweeper.metrics
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    """Analytics cache counters: hits, misses, coalesced waits and evictions."""
+    return cache.stats()
+
+@app.get("/metrics/predictions")
+def prediction_metrics():
+    """Prediction cache counters and hit rate, and the model version being served."""
+    return {**prediction_cache.stats(), "model_version": model_registry.current.version}
+
+@app.get("/metrics/inference")
+async def inference_metrics():
+    """Inference executor queue depth, rejections and batch-size histograms."""
+    return inference_executor.stats()
+
 @app.get("/db/tables")
 def check_database_tables():
     """Check if database tables exist and are accessible"""
@@ -0,0 +1,75 @@
+"""Batch assignment of available listings to NGOs.
+
+The solver is greedy over candidate pairs: for every listing only its
+``candidates`` nearest NGOs within ``max_distance_km`` are considered, the
+pairs are sorted by distance (larger listings first on ties) and each pair is
+taken if the listing is still free and the NGO has capacity left. Distances
+are computed as one vectorized haversine matrix, so thousands of listings
+against hundreds of NGOs solve in well under a second.
+"""
+import numpy as np
+from .geo import EARTH_RADIUS_KM
+
+
+def distance_matrix_km(lat1, lon1, lat2, lon2):
+    """Haversine distances between every point in set 1 and every point in set 2."""
+    phi1 = np.radians(lat1)[:, None]
+    phi2 = np.radians(lat2)[None, :]
+    dphi = phi2 - phi1
+    dlmb = np.radians(lon2)[None, :] - np.radians(lon1)[:, None]
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def solve_assignment(listings, ngos, max_distance_km, candidates=10):
+    """Assign listings to NGOs.
+
+    ``listings`` rows are ``(id, latitude, longitude, quantity_kg)`` and
+    ``ngos`` rows are ``(id, latitude, longitude, remaining_capacity_kg)``
+    where a capacity of None means unlimited. Returns a list of
+    ``(listing_id, ngo_id, distance_km, quantity_kg)``.
+    """
+    if not listings or not ngos:
+        return []
+    listing_ids = np.array([row[0] for row in listings])
+    listing_lat = np.array([row[1] for row in listings], dtype=float)
+    listing_lon = np.array([row[2] for row in listings], dtype=float)
+    quantity = np.array([row[3] or 0.0 for row in listings], dtype=float)
+    ngo_ids = np.array([row[0] for row in ngos])
+    ngo_lat = np.array([row[1] for row in ngos], dtype=float)
+    ngo_lon = np.array([row[2] for row in ngos], dtype=float)
+    capacity = np.array([np.inf if row[3] is None else row[3] for row in ngos], dtype=float)
+
+    distances = distance_matrix_km(listing_lat, listing_lon, ngo_lat, ngo_lon)
+
+    # Keep only each listing's nearest NGOs as candidate pairs
+    k = min(candidates, len(ngos))
+    if k < len(ngos):
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        nearest = np.broadcast_to(np.arange(len(ngos)), distances.shape)
+    pair_listing = np.repeat(np.arange(len(listings)), k)
+    pair_ngo = nearest.reshape(-1)
+    pair_distance = distances[pair_listing, pair_ngo]
+
+    feasible = pair_distance <= max_distance_km
+    pair_listing, pair_ngo, pair_distance = pair_listing[feasible], pair_ngo[feasible], pair_distance[feasible]
+    order = np.lexsort((-quantity[pair_listing], pair_distance))
+
+    assigned = np.zeros(len(listings), dtype=bool)
+    remaining = capacity.copy()
+    assignments = []
+    for listing_index, ngo_index, distance in zip(pair_listing[order], pair_ngo[order], pair_distance[order]):
+        if assigned[listing_index] or remaining[ngo_index] < quantity[listing_index]:
+            continue
+        assigned[listing_index] = True
+        remaining[ngo_index] -= quantity[listing_index]
+        assignments.append((
+            int(listing_ids[listing_index]),
+            int(ngo_ids[ngo_index]),
+            float(distance),
+            float(quantity[listing_index]),
+        ))
+        if len(assignments) == len(listings):
+            break
+    return assignments
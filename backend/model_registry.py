@@ -0,0 +1,325 @@
+"""Versioned wastage models with hot reload.
+
+Layout of MODEL_REGISTRY_DIR:
+
+    manifest.json    {"active": "<version>", "versions": {"<version>": {...}}}
+    holdout.json     list of feature dicts with "Wastage Food Amount"; required to reload
+    <version>/       rf_model.pkl, encoder.pkl, scaler.pkl, rf_model.forest
+
+``ModelRegistry.reload`` loads a version next to the one being served,
+checks it on the holdout sample and only then replaces ``current`` in one
+assignment. Requests read ``current`` once and keep that model until they
+finish, so a swap never drops or mixes in-flight predictions. Every worker
+polls the manifest and reloads when its active version changes, so
+activating a version on one worker rolls it out to all of them.
+
+Without a manifest the pickles in backend/ are served, as before the
+registry existed; their version is the artifact fingerprint.
+
+Usage:
+    python -m backend.model_registry register SOURCE_DIR [--version V] [--activate]
+    python -m backend.model_registry activate VERSION
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import shutil
+import threading
+import joblib
+import numpy as np
+from .compiled_forest import COMPILED_MODEL_FILE, MODEL_FILES, artifact_version, export_compiled_model, load_compiled_model
+from .config import settings
+
+CAT_FEATURES = ['Type of Food', 'Event Type', 'Seasonality', 'Geographical Location']
+NUM_FEATURES = ['Number of Guests', 'Quantity of Food']
+TARGET = 'Wastage Food Amount'
+
+MANIFEST_FILE = "manifest.json"
+HOLDOUT_FILE = "holdout.json"
+LEGACY_MODEL_DIR = os.path.dirname(__file__)
+
+
+class ModelValidationError(ValueError):
+    pass
+
+
+class LoadedModel:
+    """One model version: the compiled forest, or the sklearn pickles it was built from."""
+
+    def __init__(self, version, compiled_model=None, rf_model=None, encoder=None, scaler=None):
+        self.version = version
+        self.compiled_model = compiled_model
+        self.rf_model = rf_model
+        self.encoder = encoder
+        self.scaler = scaler
+        self.holdout_mae = None
+
+    @property
+    def is_fallback(self):
+        return self.compiled_model is None and (self.rf_model is None or self.encoder is None or self.scaler is None)
+
+    def predict(self, input_dicts):
+        """Predict wastage for many inputs with one encode, scale and predict call each."""
+        if self.is_fallback:
+            # Fallback to dummy prediction
+            return [5.0] * len(input_dicts)  # Dummy wastage prediction
+        if not input_dicts:
+            return []
+        categorical_rows = [[input_dict[feat] for feat in CAT_FEATURES] for input_dict in input_dicts]
+        numeric_rows = [[input_dict[feat] for feat in NUM_FEATURES] for input_dict in input_dicts]
+        if self.compiled_model is not None:
+            pred = self.compiled_model.predict(self.compiled_model.transform(categorical_rows, numeric_rows))
+        else:
+            X_full = np.concatenate([self.encoder.transform(categorical_rows), self.scaler.transform(numeric_rows)], axis=1)
+            pred = self.rf_model.predict(X_full)
+        return [float(value) for value in pred]
+
+
+FALLBACK_MODEL = LoadedModel("fallback")
+
+
+def load_model(model_dir, version=None):
+    """Load the model in ``model_dir``; the compiled forest is mapped read-only and shared by all workers.
+
+    Without an up-to-date compiled file the pickles are loaded instead. That
+    copy is private to each worker: sklearn's trees copy their node arrays
+    out of joblib's memory map while unpickling.
+    """
+    source_version = artifact_version(model_dir)
+    compiled_model = load_compiled_model(model_dir, source_version)
+    if compiled_model is not None:
+        return LoadedModel(version or source_version, compiled_model=compiled_model)
+    return LoadedModel(
+        version or source_version,
+        rf_model=joblib.load(os.path.join(model_dir, 'rf_model.pkl'), mmap_mode='r'),
+        encoder=joblib.load(os.path.join(model_dir, 'encoder.pkl'), mmap_mode='r'),
+        scaler=joblib.load(os.path.join(model_dir, 'scaler.pkl'), mmap_mode='r'),
+    )
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as out:
+        json.dump(data, out, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    def __init__(self, root, legacy_dir=LEGACY_MODEL_DIR, holdout_tolerance=0.1):
+        self.root = root
+        self.legacy_dir = legacy_dir
+        self.holdout_tolerance = holdout_tolerance
+        self.current = FALLBACK_MODEL
+        self._reload_lock = threading.Lock()
+        self._manifest_mtime = None
+        self.metrics = {
+            "reloads": 0,
+            "failed_reloads": 0,
+            "loading_version": None,
+            "last_error": None,
+            "last_reload_at": None,
+        }
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def read_manifest(self):
+        """The registry manifest, or None when no registry has been set up."""
+        try:
+            with open(self.manifest_path) as source:
+                return json.load(source)
+        except FileNotFoundError:
+            return None
+
+    def model_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def holdout(self):
+        path = os.path.join(self.root, HOLDOUT_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path) as source:
+            return json.load(source)
+
+    def validate(self, model, enforce=True):
+        """Check ``model`` on the holdout sample and record its MAE.
+
+        Rejects non-finite predictions and, with ``enforce``, a missing or
+        unlabelled holdout sample or an MAE worse than the served model's by
+        more than ``holdout_tolerance``.
+        """
+        sample = self.holdout()
+        if not sample:
+            if enforce:
+                raise ModelValidationError(f"no {HOLDOUT_FILE} sample to check model {model.version} on")
+            return
+        predictions = model.predict(sample)
+        if len(predictions) != len(sample) or not all(math.isfinite(value) for value in predictions):
+            raise ModelValidationError(f"model {model.version} returned invalid predictions on the holdout sample")
+        labelled = [(row[TARGET], predicted) for row, predicted in zip(sample, predictions) if TARGET in row]
+        if labelled:
+            model.holdout_mae = sum(abs(actual - predicted) for actual, predicted in labelled) / len(labelled)
+        elif enforce:
+            raise ModelValidationError(f"{HOLDOUT_FILE} has no rows labelled with {TARGET!r}")
+        baseline = self.current.holdout_mae
+        if enforce and model.holdout_mae is not None and baseline is not None:
+            if model.holdout_mae > baseline * (1 + self.holdout_tolerance):
+                raise ModelValidationError(
+                    f"model {model.version} holdout MAE {model.holdout_mae:.3f} is worse than "
+                    f"{self.current.version}'s {baseline:.3f}"
+                )
+
+    def _load_version(self, version):
+        if version is None:
+            return load_model(self.legacy_dir)
+        return load_model(self.model_dir(version), version)
+
+    def load_initial(self):
+        """Serve the manifest's active version (or the legacy pickles) at startup, else the fallback."""
+        manifest = self.read_manifest()
+        version = manifest["active"] if manifest else None
+        self._manifest_mtime = self._stat_manifest()
+        try:
+            model = self._load_version(version)
+            self.validate(model, enforce=False)
+            self.current = model
+            print(f"✅ ML models loaded successfully (version {model.version})")
+        except Exception as e:
+            print(f"❌ Error loading models: {e}")
+            self.current = FALLBACK_MODEL
+        return self.current
+
+    def reload(self, version=None, activate=False):
+        """Load, validate and swap in ``version`` (default: the manifest's active one).
+
+        With ``activate`` the manifest is updated as well, so other workers follow.
+        Raises if the version fails to load or validate; the served model is then unchanged.
+        """
+        with self._reload_lock:
+            manifest = self.read_manifest()
+            if version is None and manifest:
+                version = manifest["active"]
+            if version is not None and (not manifest or version not in manifest["versions"]):
+                raise KeyError(f"unknown model version {version}")
+            self.metrics["loading_version"] = version or "legacy"
+            try:
+                model = self._load_version(version)
+                self.validate(model)
+            except Exception as e:
+                self.metrics["failed_reloads"] += 1
+                self.metrics["last_error"] = f"{version}: {e}"
+                print(f"❌ Model reload failed: {e}")
+                raise
+            finally:
+                self.metrics["loading_version"] = None
+
+            # In-flight requests keep the model object they already hold
+            self.current = model
+            self.metrics["reloads"] += 1
+            self.metrics["last_reload_at"] = datetime.datetime.utcnow().isoformat()
+            if activate and manifest and manifest["active"] != version:
+                manifest["active"] = version
+                _write_json(self.manifest_path, manifest)
+            self._manifest_mtime = self._stat_manifest()
+            print(f"✅ Serving model version {model.version}")
+            return model
+
+    def _stat_manifest(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def check_manifest(self):
+        """Reload if the manifest's active version changed since the last look."""
+        mtime = self._stat_manifest()
+        if mtime == self._manifest_mtime:
+            return
+        self._manifest_mtime = mtime
+        manifest = self.read_manifest()
+        if manifest and manifest["active"] != self.current.version:
+            self.reload(manifest["active"])
+
+    async def watch(self, interval_seconds):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.check_manifest)
+            except Exception as e:
+                # Keep serving the current model
+                self.metrics["last_error"] = str(e)
+
+    def status(self):
+        manifest = self.read_manifest()
+        return {
+            "serving_version": self.current.version,
+            "active_version": manifest["active"] if manifest else None,
+            "versions": manifest["versions"] if manifest else {},
+            "holdout_mae": self.current.holdout_mae,
+            "compiled": self.current.compiled_model is not None,
+            **self.metrics,
+        }
+
+    def register(self, source_dir, version=None, activate=False):
+        """Copy the model files in ``source_dir`` into a new version directory and compile them."""
+        version = version or datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        target = self.model_dir(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"model version {version} already exists")
+        os.makedirs(self.root, exist_ok=True)
+        staging = target + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in MODEL_FILES:
+            shutil.copy2(os.path.join(source_dir, name), staging)
+        source_version = artifact_version(staging)
+        export_compiled_model(
+            joblib.load(os.path.join(staging, 'rf_model.pkl')),
+            joblib.load(os.path.join(staging, 'encoder.pkl')),
+            joblib.load(os.path.join(staging, 'scaler.pkl')),
+            os.path.join(staging, COMPILED_MODEL_FILE),
+            source_version=source_version,
+        )
+        os.rename(staging, target)
+
+        manifest = self.read_manifest() or {"active": None, "versions": {}}
+        manifest["versions"][version] = {
+            "registered_at": datetime.datetime.utcnow().isoformat(),
+            "source_version": source_version,
+        }
+        if activate:
+            manifest["active"] = version
+        _write_json(self.manifest_path, manifest)
+        return version
+
+
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR, holdout_tolerance=settings.MODEL_HOLDOUT_TOLERANCE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned wastage models")
+    commands = parser.add_subparsers(dest="command", required=True)
+    register = commands.add_parser("register", help="add the pickles in SOURCE_DIR as a new version")
+    register.add_argument("source_dir")
+    register.add_argument("--version")
+    register.add_argument("--activate", action="store_true")
+    activate = commands.add_parser("activate", help="make VERSION the one every worker serves")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "register":
+        version = model_registry.register(args.source_dir, args.version, args.activate)
+        print(f"✅ Registered model version {version}")
+        return
+    # Validate here first so a broken version never reaches the workers
+    model_registry.load_initial()
+    model_registry.reload(args.version, activate=True)
+    print(f"✅ Activated model version {args.version}; workers pick it up within {settings.MODEL_REGISTRY_POLL_SECONDS:g}s")
+
+
+if __name__ == "__main__":
+    main()
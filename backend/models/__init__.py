@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Text, Index, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from ..database import Base
 import datetime
 
@@ -10,6 +11,9 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     role = Column(String(50), nullable=False)  # 'restaurant', 'store', 'ngo', 'admin'
     name = Column(String(255), nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    capacity_kg = Column(Float, nullable=True)  # NGOs: most food they can hold at once; null is unlimited
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
     events = relationship("Event", back_populates="owner")
@@ -31,9 +35,16 @@ class Event(Base):
     ai_suggestion = Column(Text)
     ai_savings_kg = Column(Float)
     ai_savings_rupees = Column(Float)
+    location = Column(String(100), nullable=True)
+    seasonality = Column(String(50), nullable=True)
 
     owner = relationship("User", back_populates="events")
 
+    __table_args__ = (
+        Index("ix_events_type_location", "event_type", "location"),
+        Index("ix_events_user_food_types", "user_id", "food_types"),
+    )
+
 class SurplusListing(Base):
     __tablename__ = "surplus_listings"
     id = Column(Integer, primary_key=True, index=True)
@@ -45,12 +56,84 @@ class SurplusListing(Base):
     status = Column(String(50), default="available")  # available, claimed, collected, expired
     ai_optimized = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, nullable=True)
     claimed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True)  # see backend/geo.py
+    # Full-text index of description; only populated on PostgreSQL (SQLite uses surplus_listings_fts)
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
 
     owner = relationship("User", foreign_keys=[user_id], back_populates="surplus_listings")
     event = relationship("Event")
     claimed_by = relationship("User", foreign_keys=[claimed_by_id])
 
+    # Keyset pagination walks (created_at, id) newest first; each list filter
+    # has an index whose trailing columns match that order.
+    __table_args__ = (
+        Index("ix_surplus_listings_created_id", "created_at", "id"),
+        Index("ix_surplus_listings_status_created_id", "status", "created_at", "id"),
+        Index("ix_surplus_listings_owner_created_id", "user_id", "created_at", "id"),
+        Index("ix_surplus_listings_claimer_created_id", "claimed_by_id", "created_at", "id"),
+        Index("ix_surplus_listings_event_created", "event_id", "created_at"),
+        Index("ix_surplus_listings_status_quantity", "status", "quantity_kg"),
+        Index("ix_surplus_listings_status_geo_cell", "status", "geo_cell"),
+        Index("ix_surplus_listings_status_expires", "status", "expires_at"),
+        Index("ix_surplus_listings_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+# Contentless FTS5 index keyed by listing id (rowid); kept in sync by crud
+event.listen(
+    SurplusListing.__table__,
+    "after_create",
+    DDL("CREATE VIRTUAL TABLE IF NOT EXISTS surplus_listings_fts USING fts5(description, content='')").execute_if(dialect="sqlite")
+)
+
+class EventStats(Base):
+    """Event totals per (event type, season, location), maintained by crud as events and their listings are written."""
+    __tablename__ = "event_stats"
+    event_type = Column(String(100), primary_key=True)
+    seasonality = Column(String(50), primary_key=True)
+    location = Column(String(100), primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+    guest_count = Column(Integer, nullable=False, default=0)
+    ai_savings_kg = Column(Float, nullable=False, default=0.0)
+    ai_savings_rupees = Column(Float, nullable=False, default=0.0)
+    # Surplus listed against these events
+    listings = Column(Integer, nullable=False, default=0)
+    surplus_kg = Column(Float, nullable=False, default=0.0)
+    collected_listings = Column(Integer, nullable=False, default=0)
+
+class EventFoodTypeStats(Base):
+    """Number of events per (event type, food type)."""
+    __tablename__ = "event_food_type_stats"
+    event_type = Column(String(100), primary_key=True)
+    food_type = Column(String(100), primary_key=True)
+    events = Column(Integer, nullable=False, default=0)
+
+class ChangeVersion(Base):
+    """Counter bumped on every write to a scope; ETags are built from it."""
+    __tablename__ = "change_versions"
+    scope = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class UserListingStats(Base):
+    """Per-user listing counters, maintained by crud in the same transaction as each write."""
+    __tablename__ = "user_listing_stats"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    # As listing owner
+    total_listings = Column(Integer, nullable=False, default=0)
+    available_listings = Column(Integer, nullable=False, default=0)
+    claimed_listings = Column(Integer, nullable=False, default=0)
+    collected_listings = Column(Integer, nullable=False, default=0)
+    expired_listings = Column(Integer, nullable=False, default=0)
+    total_quantity_kg = Column(Float, nullable=False, default=0.0)
+    ai_optimized_count = Column(Integer, nullable=False, default=0)
+    # As claiming NGO
+    ngo_active_claims = Column(Integer, nullable=False, default=0)
+    ngo_collections = Column(Integer, nullable=False, default=0)
+    ngo_collected_kg = Column(Float, nullable=False, default=0.0)
+
 class Feedback(Base):
     __tablename__ = "feedbacks"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,113 @@
+"""Rebuild the user_listing_stats rollup from surplus_listings.
+
+Recomputes every user's counters with two grouped queries, reports drift
+against the stored rollups and (unless --dry-run) writes the fixes.
+
+Usage: python -m backend.rebuild_stats [--dry-run]
+"""
+import argparse
+from sqlalchemy import case, func
+from . import crud, models
+from .database import SessionLocal
+
+FLOAT_TOLERANCE = 1e-6
+
+
+def compute_rollups(db):
+    """Return ``{user_id: {counter: value}}`` computed from the listings table."""
+    listing = models.SurplusListing
+    rollups = {}
+
+    def row_for(user_id):
+        return rollups.setdefault(user_id, {name: 0 for name in crud.ROLLUP_COUNTERS})
+
+    owner_rows = db.query(
+        listing.user_id,
+        func.count(listing.id),
+        func.count(case((listing.status == "available", 1))),
+        func.count(case((listing.status == "claimed", 1))),
+        func.count(case((listing.status == "collected", 1))),
+        func.count(case((listing.status == "expired", 1))),
+        func.coalesce(func.sum(listing.quantity_kg), 0.0),
+        func.count(case((listing.ai_optimized.is_(True), 1)))
+    ).filter(listing.user_id.isnot(None)).group_by(listing.user_id)
+    for user_id, total, available, claimed, collected, expired, quantity, ai_optimized in owner_rows:
+        row_for(user_id).update(
+            total_listings=total,
+            available_listings=available,
+            claimed_listings=claimed,
+            collected_listings=collected,
+            expired_listings=expired,
+            total_quantity_kg=quantity,
+            ai_optimized_count=ai_optimized,
+        )
+
+    ngo_rows = db.query(
+        listing.claimed_by_id,
+        func.count(case((listing.status == "claimed", 1))),
+        func.count(case((listing.status == "collected", 1))),
+        func.coalesce(func.sum(case((listing.status == "collected", listing.quantity_kg), else_=0.0)), 0.0)
+    ).filter(listing.claimed_by_id.isnot(None)).group_by(listing.claimed_by_id)
+    for ngo_id, active_claims, collections, collected_kg in ngo_rows:
+        row_for(ngo_id).update(
+            ngo_active_claims=active_claims,
+            ngo_collections=collections,
+            ngo_collected_kg=collected_kg,
+        )
+    return rollups
+
+
+def reconcile(db, apply=True):
+    """Compare stored rollups with recomputed ones.
+
+    Returns a list of ``(user_id, counter, stored, actual)`` drift entries and,
+    when ``apply`` is set, rewrites the drifted rows in one transaction.
+    """
+    actual = compute_rollups(db)
+    stored = {stats.user_id: stats for stats in db.query(models.UserListingStats)}
+    drift = []
+    for user_id in sorted(set(actual) | set(stored)):
+        expected = actual.get(user_id, {name: 0 for name in crud.ROLLUP_COUNTERS})
+        current = stored.get(user_id)
+        values = {name: (getattr(current, name) or 0) if current is not None else 0 for name in crud.ROLLUP_COUNTERS}
+        user_drift = [
+            (user_id, name, values[name], expected[name])
+            for name in crud.ROLLUP_COUNTERS
+            if abs(values[name] - expected[name]) > FLOAT_TOLERANCE
+        ]
+        drift.extend(user_drift)
+        if apply and user_drift:
+            if current is None:
+                db.add(models.UserListingStats(user_id=user_id, **expected))
+            else:
+                for name, value in expected.items():
+                    setattr(current, name, value)
+    if apply:
+        db.commit()
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="only report drift")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = reconcile(db, apply=not args.dry_run)
+    finally:
+        db.close()
+
+    users = sorted({entry[0] for entry in drift})
+    for user_id, name, stored, expected in drift:
+        print(f"  user {user_id}: {name} stored={stored} actual={expected}")
+    if not drift:
+        print("✅ Rollups match the listings table")
+    elif args.dry_run:
+        print(f"❌ Drift in {len(drift)} counters across {len(users)} users (dry run, nothing written)")
+    else:
+        print(f"✅ Fixed drift in {len(drift)} counters across {len(users)} users")
+
+
+if __name__ == "__main__":
+    main()
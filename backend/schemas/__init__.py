@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, List
 import datetime
 
@@ -6,6 +6,9 @@ class UserBase(BaseModel):
     email: EmailStr
     name: str
     role: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    capacity_kg: Optional[float] = None
 
 class UserCreate(UserBase):
     password: str
@@ -20,6 +23,8 @@ class EventBase(BaseModel):
     event_type: str
     guest_count: int
     food_types: str
+    location: Optional[str] = None
+    seasonality: Optional[str] = None
 
 class EventCreate(EventBase):
     pass
@@ -39,6 +44,9 @@ class SurplusListingBase(BaseModel):
     quantity_kg: float
     photo_url: Optional[str]
     ai_optimized: Optional[bool] = False
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    expires_at: Optional[datetime.datetime] = None
 
 class SurplusListingCreate(SurplusListingBase):
     event_id: Optional[int] = None
@@ -53,6 +61,17 @@ class SurplusListingResponse(SurplusListingBase):
     class Config:
         orm_mode = True
 
+class NearbySurplusListingResponse(SurplusListingResponse):
+    distance_km: float
+
+class BulkListingError(BaseModel):
+    index: int  # Position of the rejected item in the request
+    detail: str
+
+class BulkSurplusListingResponse(BaseModel):
+    created_ids: List[int]
+    errors: List[BulkListingError]
+
 class FeedbackBase(BaseModel):
     rating: int
     comment: Optional[str]
@@ -70,21 +89,61 @@ class FeedbackResponse(FeedbackBase):
     class Config:
         orm_mode = True
 
+# Matching Schemas
+class MatchingRunRequest(BaseModel):
+    dry_run: bool = True
+    max_distance_km: float = 25.0
+    candidates_per_listing: int = 10
+
+class MatchingAssignment(BaseModel):
+    listing_id: int
+    ngo_id: int
+    distance_km: float
+    quantity_kg: float
+
+class MatchingRunResponse(BaseModel):
+    dry_run: bool
+    assignments: List[MatchingAssignment]
+    claimed_count: int  # Listings actually claimed; 0 on a dry run
+    matched_kg: float
+    unmatched_kg: float
+    unmatched_listing_ids: List[int]
+    total_distance_km: float
+    solve_ms: float
+
 # Predictive Shorting Schemas
 class PredictiveShortingRequest(BaseModel):
     event_type: str
-    guest_count: int
+    guest_count: int = Field(ge=0)
     food_types: str  # Comma-separated
     seasonality: str
     location: str
-    quantity_of_food: float  # Planned quantity in kg
+    quantity_of_food: float = Field(gt=0)  # Planned quantity in kg
+
+    @field_validator("food_types")
+    @classmethod
+    def food_types_not_empty(cls, food_types):
+        if not any(food_type.strip() for food_type in food_types.split(",")):
+            raise ValueError("must list at least one food type")
+        return food_types
+
+class FoodTypeWastage(BaseModel):
+    food_type: str
+    guest_count: int  # Guests allocated to this food type
+    quantity_of_food: float  # Planned kg allocated to this food type
+    predicted_wastage_kg: float
 
 class PredictiveShortingResponse(BaseModel):
+    # model_version names the ML model, not a pydantic model_* attribute
+    model_config = ConfigDict(protected_namespaces=())
+
     predicted_wastage_kg: float
     suggested_shorting_kg: float
     ai_suggestion: str
     estimated_savings_rupees: float
     risk_level: str  # e.g., 'Low', 'Medium', 'High'
+    model_version: str  # Model that produced the prediction
+    food_type_breakdown: List[FoodTypeWastage] = []  # One entry per listed food type
 
 # Analytics Schemas
 class UserAnalytics(BaseModel):
@@ -118,6 +177,8 @@ class EventAnalytics(BaseModel):
     avg_guest_count: float
     avg_wastage_kg: float
     success_rate: float
+    avg_ai_savings_kg: float = 0.0
+    total_ai_savings_rupees: float = 0.0
     common_food_types: List[str]
     seasonal_trends: dict
     location_performance: dict
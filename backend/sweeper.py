@@ -0,0 +1,74 @@
+"""Background sweeper that expires perishable listings.
+
+Started from the app lifespan in main.py. Each tick expires due listings in
+batches of EXPIRY_SWEEP_BATCH_SIZE, stopping after EXPIRY_SWEEP_MAX_BATCHES so
+one tick never holds the database for long; anything left over is picked up
+on the next tick and shows up as lag in the metrics.
+"""
+import asyncio
+import datetime
+import time
+from . import crud
+from .config import settings
+from .database import SessionLocal
+
+
+class ExpirySweeper:
+    def __init__(self, interval_seconds, batch_size, max_batches):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.metrics = {
+            "ticks": 0,
+            "errors": 0,
+            "total_expired": 0,
+            "last_tick_at": None,
+            "last_tick_duration_ms": 0.0,
+            "last_tick_expired": 0,
+            "last_tick_batches": 0,
+            # Age of the oldest listing still due after the last tick
+            "lag_seconds": 0.0,
+        }
+
+    def tick(self):
+        """Run one sweep; returns the number of listings expired."""
+        started = time.perf_counter()
+        now = datetime.datetime.utcnow()
+        expired = 0
+        batches = 0
+        db = SessionLocal()
+        try:
+            while batches < self.max_batches:
+                rows = crud.expire_due_listings(db, now, self.batch_size)
+                batches += 1
+                expired += len(rows)
+                if len(rows) < self.batch_size:
+                    break
+            oldest_due = crud.oldest_due_expiry(db, now)
+        finally:
+            db.close()
+
+        self.metrics["ticks"] += 1
+        self.metrics["total_expired"] += expired
+        self.metrics["last_tick_at"] = now.isoformat()
+        self.metrics["last_tick_duration_ms"] = (time.perf_counter() - started) * 1000
+        self.metrics["last_tick_expired"] = expired
+        self.metrics["last_tick_batches"] = batches
+        self.metrics["lag_seconds"] = (now - oldest_due).total_seconds() if oldest_due else 0.0
+        return expired
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.tick)
+            except Exception as e:
+                self.metrics["errors"] += 1
+                print(f"❌ Expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+
+sweeper = ExpirySweeper(
+    interval_seconds=settings.EXPIRY_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.EXPIRY_SWEEP_BATCH_SIZE,
+    max_batches=settings.EXPIRY_SWEEP_MAX_BATCHES,
+)
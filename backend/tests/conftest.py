@@ -0,0 +1,229 @@
+"""Shared fixtures: the app on a throwaway SQLite database.
+
+The environment is set before ``backend`` is imported, because settings,
+the engine and the model registry are created at import time.
+"""
+import datetime
+import os
+import random
+import tempfile
+import pytest
+from contextlib import contextmanager
+
+TEST_DIR = tempfile.mkdtemp(prefix="surplusserve-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["MODEL_REGISTRY_DIR"] = os.path.join(TEST_DIR, "model_versions")
+os.environ["EXPIRY_SWEEP_ENABLED"] = "false"
+os.environ["MODEL_REGISTRY_POLL_SECONDS"] = "0"
+os.environ["BROKER_BACKEND"] = "memory"
+os.environ["CACHE_BACKEND"] = "memory"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, insert
+from backend import crud, models, schemas
+from backend.api import prediction_cache
+from backend.cache import cache
+from backend.database import Base, SessionLocal, engine
+from backend.main import app
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+LISTING_STATUSES = ("available", "claimed", "collected", "expired")
+
+
+def seed_users(db, count, role="restaurant"):
+    """Insert ``count`` users directly and return their ids."""
+    # Only touches columns every migration has, so it also seeds old schemas
+    start = db.query(func.count(models.User.id)).scalar()
+    db.execute(insert(models.User.__table__), [
+        {"email": f"seed{start + i}@example.com", "name": f"Seed {start + i}", "role": role, "hashed_password": "x"}
+        for i in range(count)
+    ])
+    db.commit()
+    return [row.id for row in db.query(models.User.id).filter(models.User.role == role).order_by(models.User.id)][-count:]
+
+
+def seed_listings(db, count, owner_ids, ngo_ids=(), seed=0, batch_size=10000):
+    """Insert ``count`` random listings directly, bypassing the rollups; returns nothing.
+
+    Claimed and collected listings get a random NGO from ``ngo_ids``.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 1, 1)
+    for offset in range(0, count, batch_size):
+        rows = []
+        for i in range(offset, min(count, offset + batch_size)):
+            status = rng.choice(LISTING_STATUSES) if ngo_ids else rng.choice(("available", "expired"))
+            rows.append({
+                "user_id": rng.choice(owner_ids),
+                "description": f"Seeded tray {i}",
+                "quantity_kg": round(rng.uniform(0.5, 40), 2),
+                "status": status,
+                "ai_optimized": rng.random() < 0.3,
+                "created_at": start + datetime.timedelta(minutes=i),
+                "claimed_by_id": rng.choice(ngo_ids) if status in ("claimed", "collected") else None,
+            })
+        db.execute(insert(models.SurplusListing.__table__), rows)
+    db.commit()
+
+
+@contextmanager
+def capture_queries():
+    """Record ``(statement, parameters)`` for every SQL statement sent inside the block."""
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+FOOD_TYPES = ("Meat", "Vegetables", "Fruits", "Baked Goods", "Dairy Products", "Rice", "Dal")
+EVENT_TYPES = ("Wedding", "Corporate", "Birthday", "Social Gathering")
+SEASONS = ("Summer", "Winter", "All Seasons")
+LOCATIONS = ("Urban", "Suburban", "Rural")
+
+
+def feature_rows(count, seed=0):
+    """Random model inputs shaped like ``predict_wastage_batch`` input dicts."""
+    rng = random.Random(seed)
+    return [
+        {
+            "Type of Food": rng.choice(FOOD_TYPES),
+            "Event Type": rng.choice(EVENT_TYPES),
+            "Seasonality": rng.choice(SEASONS),
+            "Geographical Location": rng.choice(LOCATIONS),
+            "Number of Guests": rng.randint(50, 500),
+            "Quantity of Food": rng.randint(100, 500),
+        }
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="session")
+def model_dir(tmp_path_factory):
+    """rf_model.pkl, encoder.pkl and scaler.pkl trained on synthetic data, like train_rf_model.py."""
+    joblib = pytest.importorskip("joblib")
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    preprocessing = pytest.importorskip("sklearn.preprocessing")
+    import numpy as np
+    from backend.model_registry import CAT_FEATURES, NUM_FEATURES
+
+    rows = feature_rows(1500)
+    encoder = preprocessing.OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    X_cat = encoder.fit_transform([[row[feat] for feat in CAT_FEATURES] for row in rows])
+    scaler = preprocessing.StandardScaler()
+    X_num = scaler.fit_transform([[row[feat] for feat in NUM_FEATURES] for row in rows])
+    rng = np.random.default_rng(0)
+    y = np.array([
+        row["Quantity of Food"] * 0.1 + row["Number of Guests"] * 0.02 + (row["Event Type"] == "Wedding") * 5
+        for row in rows
+    ]) + rng.normal(0, 3, len(rows))
+    rf_model = ensemble.RandomForestRegressor(n_estimators=30, random_state=42).fit(np.concatenate([X_cat, X_num], axis=1), y)
+
+    path = tmp_path_factory.mktemp("model")
+    joblib.dump(rf_model, path / "rf_model.pkl")
+    joblib.dump(encoder, path / "encoder.pkl")
+    joblib.dump(scaler, path / "scaler.pkl")
+    return path
+
+
+@pytest.fixture
+def serve_model(monkeypatch):
+    """Serve ``model`` from the registry for the rest of the test."""
+    from backend.model_registry import model_registry
+
+    def serve(model):
+        monkeypatch.setattr(model_registry, "current", model)
+        prediction_cache.invalidate()
+        return model
+
+    return serve
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # Ids are reused after the reset, so nothing cached may survive it
+    crud._user_role_cache.clear()
+    cache.invalidate()
+    prediction_cache.invalidate()
+    yield
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(client):
+    """Register a user through the API and return its JSON."""
+    count = 0
+
+    def make(role="restaurant", **fields):
+        nonlocal count
+        count += 1
+        response = client.post("/api/auth/register", json={
+            "email": f"{role}{count}@example.com",
+            "name": f"{role} {count}",
+            "role": role,
+            "password": "secret",
+            **fields,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make
+
+
+def login(client, email, password="secret"):
+    """Bearer headers for ``email``."""
+    response = client.post("/api/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin_headers(client, db):
+    """Bearer headers for an admin; admins cannot self-register, so it is created directly."""
+    crud.create_user(db, schemas.UserCreate(email="admin@example.com", name="Admin", role="admin", password="secret"))
+    return login(client, "admin@example.com")
+
+
+@pytest.fixture
+def make_listing(client):
+    """Create a listing through the API and return its JSON."""
+
+    def make(user_id, quantity_kg=5.0, description="Vegetable biryani", **fields):
+        response = client.post(f"/api/surplus-listings?user_id={user_id}", json={
+            "description": description,
+            "quantity_kg": quantity_kg,
+            "photo_url": None,
+            **fields,
+        })
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make
@@ -0,0 +1,85 @@
+import os
+import time
+import tracemalloc
+from backend import crud, models
+from backend.rebuild_stats import reconcile
+from conftest import seed_listings, seed_users
+
+AGGREGATE_BENCH_ROWS = int(os.getenv("AGGREGATE_BENCH_ROWS", "20000"))
+
+
+def python_aggregates(listings):
+    """What the endpoints used to do: load every listing and walk the list."""
+    return {
+        "total": len(listings),
+        "available": len([l for l in listings if l.status == "available"]),
+        "claimed": len([l for l in listings if l.status == "claimed"]),
+        "collected": len([l for l in listings if l.status == "collected"]),
+        "expired": len([l for l in listings if l.status == "expired"]),
+        "ai_optimized": len([l for l in listings if l.ai_optimized]),
+        "total_quantity_kg": sum(l.quantity_kg for l in listings),
+    }
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def test_listing_aggregates_match_python_walk(db):
+    owners = seed_users(db, 5)
+    ngos = seed_users(db, 3, "ngo")
+    seed_listings(db, 500, owners, ngos)
+
+    row = crud.listing_aggregates(db)
+    expected = python_aggregates(db.query(models.SurplusListing).all())
+    for key in ("total", "available", "claimed", "collected", "expired", "ai_optimized"):
+        assert getattr(row, key) == expected[key], key
+    assert abs(row.total_quantity_kg - expected["total_quantity_kg"]) < 1e-6
+
+    owner_row = crud.listing_aggregates(db, models.SurplusListing.user_id == owners[0])
+    owner_expected = python_aggregates(db.query(models.SurplusListing).filter_by(user_id=owners[0]).all())
+    assert owner_row.total == owner_expected["total"]
+    assert owner_row.collected == owner_expected["collected"]
+
+
+def test_dashboard_stats_match_listings(client, db):
+    owners = seed_users(db, 3)
+    ngos = seed_users(db, 2, "ngo")
+    seed_listings(db, 300, owners, ngos)
+    reconcile(db)
+
+    for owner_id in owners:
+        stats = client.get(f"/api/dashboard/stats/{owner_id}").json()
+        expected = python_aggregates(db.query(models.SurplusListing).filter_by(user_id=owner_id).all())
+        assert stats["total_donations"] == expected["total"]
+        assert stats["active_listings"] == expected["available"]
+        assert stats["claimed_listings"] == expected["claimed"]
+        assert stats["collected_listings"] == expected["collected"]
+        assert abs(stats["total_quantity_kg"] - expected["total_quantity_kg"]) < 1e-6
+
+
+def test_aggregate_memory_is_constant_and_faster(db):
+    owners = seed_users(db, 10)
+    ngos = seed_users(db, 5, "ngo")
+    timings = []
+    for seeded in (AGGREGATE_BENCH_ROWS // 4, AGGREGATE_BENCH_ROWS):
+        seed_listings(db, seeded - db.query(models.SurplusListing).count(), owners, ngos, seed=seeded)
+        db.expunge_all()
+        _, sql_seconds, sql_peak = measure(lambda: crud.listing_aggregates(db))
+        _, python_seconds, python_peak = measure(lambda: python_aggregates(db.query(models.SurplusListing).all()))
+        db.expunge_all()
+        timings.append((seeded, sql_seconds, sql_peak, python_seconds, python_peak))
+        print(f"\n{seeded} listings: SQL aggregate {sql_seconds * 1000:.1f} ms / {sql_peak / 1024:.0f} KiB peak, "
+              f"ORM walk {python_seconds * 1000:.1f} ms / {python_peak / 1024:.0f} KiB peak")
+
+    (_, _, small_peak, _, small_python_peak), (_, sql_seconds, large_peak, python_seconds, large_python_peak) = timings
+    # 4x the rows: the ORM walk's memory grows with them, the aggregate's does not
+    assert large_peak < small_peak * 1.5 + 64 * 1024
+    assert large_python_peak > small_python_peak * 2
+    assert sql_seconds < python_seconds
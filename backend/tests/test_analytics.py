@@ -0,0 +1,163 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects.postgresql import pg8000
+from backend import crud, models
+from backend.database import engine
+from conftest import capture_queries, seed_users
+
+
+def session_for(dialect):
+    """Just enough of a Session for ``time_bucket`` to pick its dialect."""
+    return SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+
+
+@pytest.mark.parametrize("dialect", [pg8000.dialect(), mysql.dialect()], ids=["postgresql", "mysql"])
+@pytest.mark.parametrize("granularity", crud.TIME_GRANULARITIES)
+def test_time_bucket_groups_by_the_selected_expression(dialect, granularity):
+    bucket = crud.time_bucket(session_for(dialect), models.SurplusListing.created_at, granularity).label("bucket")
+    compiled = select(bucket, func.count()).group_by(bucket).compile(dialect=dialect)
+
+    # Bound parameters would become different placeholders in SELECT and GROUP BY
+    assert compiled.params == {}
+    sql = str(compiled)
+    selected = sql[len("SELECT "):sql.index(" AS bucket")]
+    assert sql.rstrip().endswith(f"GROUP BY {selected}")
+    if dialect.name == "postgresql":
+        assert selected == f"date_trunc('{granularity}', surplus_listings.created_at)"
+
+
+def test_time_bucket_rejects_unknown_granularity(db):
+    with pytest.raises(ValueError):
+        crud.time_bucket(db, models.SurplusListing.created_at, "day'; DROP TABLE users; --")
+
+
+def test_timeseries_counts_per_bucket(client, db):
+    owner = seed_users(db, 1)[0]
+    created = [
+        datetime.datetime(2024, 3, 4, 9, 15),   # Monday
+        datetime.datetime(2024, 3, 4, 9, 45),
+        datetime.datetime(2024, 3, 6, 18, 0),   # Wednesday, same week
+        datetime.datetime(2024, 3, 11, 8, 0),   # next Monday
+        datetime.datetime(2024, 4, 2, 12, 0),
+    ]
+    db.execute(insert(models.SurplusListing.__table__), [
+        {"user_id": owner, "description": "Seeded tray", "quantity_kg": 2.0, "status": "available", "created_at": at}
+        for at in created
+    ])
+    db.commit()
+
+    def buckets(granularity):
+        body = client.get(f"/api/analytics/timeseries?granularity={granularity}"
+                          "&start=2024-03-01T00:00:00&end=2024-05-01T00:00:00").json()
+        return {bucket["bucket"]: bucket["listings"] for bucket in body["buckets"]}
+
+    assert buckets("hour") == {"2024-03-04 09:00:00": 2, "2024-03-06 18:00:00": 1,
+                               "2024-03-11 08:00:00": 1, "2024-04-02 12:00:00": 1}
+    assert buckets("day") == {"2024-03-04": 2, "2024-03-06": 1, "2024-03-11": 1, "2024-04-02": 1}
+    assert buckets("week") == {"2024-03-04": 3, "2024-03-11": 1, "2024-04-01": 1}
+    assert buckets("month") == {"2024-03-01": 4, "2024-04-01": 1}
+
+
+LARGE_TABLES = ("surplus_listings", "events", "users")
+
+
+def seed_events(db, owner, ngos):
+    events = models.Event.__table__
+    db.execute(insert(events), [
+        {"user_id": owner, "event_type": event_type, "guest_count": guests, "food_types": "Rice,Dal",
+         "location": location, "seasonality": "Summer", "date": datetime.datetime(2024, 1, day)}
+        for day, (event_type, location, guests) in enumerate(
+            [("Wedding", "Urban", 200), ("Wedding", "Rural", 120), ("Corporate", "Urban", 80)], start=1
+        )
+    ])
+    event_ids = [row.id for row in db.query(models.Event.id).order_by(models.Event.id)]
+    db.execute(insert(models.SurplusListing.__table__), [
+        {"user_id": owner, "event_id": event_ids[i % 3], "description": "Seeded tray", "quantity_kg": 4.0,
+         "status": "collected" if i % 2 else "claimed", "claimed_by_id": ngos[0],
+         "created_at": datetime.datetime(2024, 1, 10) + datetime.timedelta(hours=i)}
+        for i in range(12)
+    ])
+    db.commit()
+    return event_ids
+
+
+def test_analytics_query_filters_by_event(client, db):
+    owner = seed_users(db, 1)[0]
+    ngos = seed_users(db, 1, "ngo")
+    seed_events(db, owner, ngos)
+
+    body = client.post("/api/analytics/query", json={
+        "start_date": "2024-01-01T00:00:00", "end_date": "2024-02-01T00:00:00",
+        "event_type": "Wedding", "location": "Urban",
+    }).json()
+
+    assert body["platform_analytics"]["total_listings"] == 4
+    assert [row["event_type"] for row in body["event_analytics"]] == ["Wedding"]
+    assert body["event_analytics"][0]["avg_guest_count"] == 200
+
+    empty = client.post("/api/analytics/query", json={
+        "start_date": "2023-01-01T00:00:00", "end_date": "2023-02-01T00:00:00",
+    }).json()
+    assert empty["platform_analytics"]["total_listings"] == 0
+    assert empty["event_analytics"] == []
+
+
+@pytest.mark.parametrize("request_body", [
+    {"start_date": "2024-01-01T00:00:00", "end_date": "2024-02-01T00:00:00"},
+    {"start_date": "2024-01-01T00:00:00", "end_date": "2024-02-01T00:00:00", "user_id": 1},
+    {"start_date": "2024-01-01T00:00:00", "end_date": "2024-02-01T00:00:00", "event_type": "Wedding", "location": "Urban"},
+], ids=["date range", "owner", "event"])
+def test_analytics_query_never_scans_large_tables(client, db, request_body):
+    owner = seed_users(db, 1)[0]
+    ngos = seed_users(db, 1, "ngo")
+    seed_events(db, owner, ngos)
+
+    with capture_queries() as queries:
+        response = client.post("/api/analytics/query", json=request_body)
+    assert response.status_code == 200
+
+    selects = [(statement, parameters) for statement, parameters in queries if statement.lstrip().startswith("SELECT")]
+    assert selects
+    with engine.connect() as connection:
+        for statement, parameters in selects:
+            plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            scans = [step for step in plan if step.split()[:2] in (["SCAN", table] for table in LARGE_TABLES)]
+            assert not scans, f"{statement}\n{plan}"
+
+
+def test_event_endpoints_agree(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    events = [
+        ("Wedding", 200, "Rice, Dal, Paneer", "Urban", "Summer"),
+        ("Wedding", 150, "Rice, Paneer", "Rural", "Winter"),
+        ("Wedding", 90, "Dal", None, "Summer"),
+        ("Corporate", 60, "Sandwiches, Dal", "Urban", None),
+    ]
+    for index, (event_type, guests, food_types, location, season) in enumerate(events):
+        created = client.post(f"/api/events?user_id={owner['id']}", json={
+            "event_type": event_type, "guest_count": guests, "food_types": food_types,
+            "location": location, "seasonality": season,
+        }).json()
+        for tray in range(index + 1):
+            listing = make_listing(owner["id"], quantity_kg=2.0 + tray, event_id=created["id"])
+            if tray % 2 == 0:
+                client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+                client.patch(f"/api/surplus-listings/{listing['id']}/collect")
+
+    summaries = client.get("/api/analytics/events").json()
+    queried = client.post("/api/analytics/query", json={}).json()["event_analytics"]
+
+    assert summaries == queried
+    wedding = summaries[0]
+    assert wedding["event_type"] == "Wedding"
+    assert wedding["common_food_types"] == ["Dal", "Paneer", "Rice"]
+    assert set(wedding["seasonal_trends"]) == {"Summer", "Winter"}
+    assert wedding["seasonal_trends"]["Summer"]["events"] == 2
+    assert set(wedding["location_performance"]) == {"Urban", "Rural", "Unknown"}
+    # (2) + (2 + 3) + (2 + 3 + 4) kg over three events
+    assert wedding["avg_wastage_kg"] == pytest.approx(16 / 3)
+    assert list(summaries[1]["seasonal_trends"]) == ["Unknown"]
@@ -0,0 +1,82 @@
+import os
+import time
+import pytest
+from conftest import capture_queries
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+from backend.database import engine
+
+BULK_SIZE = int(os.getenv("BULK_BENCH_SIZE", "200"))
+
+
+def listing(index, **fields):
+    return {"description": f"Tray {index}", "quantity_kg": 1.0 + index, "photo_url": None, **fields}
+
+
+def test_bulk_ids_follow_request_order(client, make_user):
+    owner = make_user()
+    response = client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=[listing(i) for i in range(20)])
+
+    created_ids = response.json()["created_ids"]
+    stored = {row["id"]: row for row in client.get("/api/surplus-listings?limit=200").json()}
+    assert [stored[listing_id]["description"] for listing_id in created_ids] == [f"Tray {i}" for i in range(20)]
+
+
+def test_bulk_reports_invalid_items_by_position(client, make_user):
+    owner = make_user()
+    items = [listing(0), {"description": "no quantity"}, listing(2, quantity_kg=-1), listing(3, event_id=999)]
+
+    body = client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=items).json()
+
+    assert len(body["created_ids"]) == 1
+    assert [error["index"] for error in body["errors"]] == [1, 2, 3]
+    stats = client.get(f"/api/dashboard/stats/{owner['id']}").json()
+    assert stats["total_donations"] == 1
+
+
+# PostgreSQL batches ordered RETURNING rows into multi-row VALUES; SQLite has
+# no implicit sentinel to match them by and MySQL no RETURNING, so there
+# SQLAlchemy sends one INSERT per row
+BATCHES_ROWS = (
+    engine.dialect.insert_executemany_returning_sort_by_parameter_order
+    and engine.dialect.insertmanyvalues_implicit_sentinel != InsertmanyvaluesSentinelOpts.NOT_SUPPORTED
+)
+
+
+def test_bulk_bookkeeping_runs_once_per_batch(client, make_user):
+    owner = make_user()
+
+    with capture_queries() as queries:
+        response = client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=[listing(i) for i in range(50)])
+
+    assert len(response.json()["created_ids"]) == 50
+    statements = [statement for statement, _ in queries]
+    listing_inserts = [statement for statement in statements if statement.startswith("INSERT INTO surplus_listings ")]
+    # Search index, rollups and change versions are maintained once per batch
+    assert len(statements) - len(listing_inserts) < 20
+    assert len(listing_inserts) < 10 if BATCHES_ROWS else len(listing_inserts) == 50
+
+
+@pytest.mark.skipif(not BATCHES_ROWS, reason=f"{engine.dialect.name} sends one INSERT per row")
+def test_bulk_insert_beats_one_request_per_row(client, make_user, make_listing):
+    owner = make_user()
+    items = [listing(i) for i in range(BULK_SIZE)]
+
+    start = time.perf_counter()
+    with capture_queries() as bulk_queries:
+        response = client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=items)
+    bulk_seconds = time.perf_counter() - start
+    bulk_statements = [statement for statement, _ in bulk_queries]
+    assert len(response.json()["created_ids"]) == BULK_SIZE
+
+    start = time.perf_counter()
+    with capture_queries() as single_queries:
+        for item in items:
+            make_listing(owner["id"], item["quantity_kg"], item["description"])
+    single_seconds = time.perf_counter() - start
+    single_statements = [statement for statement, _ in single_queries]
+
+    print(f"\n{BULK_SIZE} listings: bulk {bulk_seconds * 1000:.0f} ms / {len(bulk_statements)} statements, "
+          f"one by one {single_seconds * 1000:.0f} ms / {len(single_statements)} statements")
+    assert len(bulk_statements) < 30
+    assert len(single_statements) >= BULK_SIZE
+    assert bulk_seconds < single_seconds
@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.cache import LRUCacheBackend, SQLiteCacheBackend, TTLCache
+
+CALLERS = 16
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    return LRUCacheBackend(max_entries=2)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_share_one_computation(backend):
+    cache = TTLCache(backend)
+    calls = []
+
+    def compute():
+        calls.append(threading.current_thread().name)
+        # Hold the flight open until every other caller is waiting on it
+        wait_for(lambda: cache.metrics["coalesced"] == CALLERS - 1)
+        return {"total": 42}
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        results = list(pool.map(lambda _: cache.get_or_compute("stats", 60, compute), range(CALLERS)))
+
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * CALLERS
+    assert cache.metrics["misses"] == 1
+    # Later callers hit the stored value
+    assert cache.get_or_compute("stats", 60, lambda: pytest.fail("recomputed")) == {"total": 42}
+    assert cache.metrics["hits"] == 1
+
+
+def test_a_failed_computation_reaches_every_waiter_and_is_not_cached(backend):
+    cache = TTLCache(backend)
+
+    def compute():
+        wait_for(lambda: cache.metrics["coalesced"] == CALLERS - 1)
+        raise RuntimeError("database down")
+
+    def call(_):
+        try:
+            return cache.get_or_compute("stats", 60, compute)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        assert list(pool.map(call, range(CALLERS))) == ["database down"] * CALLERS
+    assert cache.get_or_compute("stats", 60, lambda: {"total": 1}) == {"total": 1}
+
+
+def test_results_computed_across_an_invalidation_are_not_stored(backend):
+    cache = TTLCache(backend)
+
+    def compute_while_a_write_commits():
+        cache.invalidate()
+        return {"total": "stale"}
+
+    # The caller still gets its answer...
+    assert cache.get_or_compute("stats", 60, compute_while_a_write_commits) == {"total": "stale"}
+    # ...but the next reader computes afresh
+    assert cache.get_or_compute("stats", 60, lambda: {"total": "fresh"}) == {"total": "fresh"}
+
+    def compute_many_while_a_write_commits(keys):
+        cache.invalidate()
+        return [{"key": key, "stale": True} for key in keys]
+
+    cache.get_many(["a", "b"], 60, compute_many_while_a_write_commits)
+    assert cache.get_many(["a", "b"], 60, lambda keys: [{"key": key} for key in keys]) == [{"key": "a"}, {"key": "b"}]
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted(backend):
+    backend.set("short", {"v": 1}, 0.05)
+    assert backend.get("short") == {"v": 1}
+    time.sleep(0.1)
+    assert backend.get("short") is None
+
+    backend.set("a", {"v": "a"}, 60)
+    backend.set("b", {"v": "b"}, 60)
+    time.sleep(0.01)
+    backend.get("a")  # b is now the least recently used
+    backend.set("c", {"v": "c"}, 60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": "a"}
+    assert backend.get("c") == {"v": "c"}
+    assert len(backend) == 2
+    assert backend.evictions >= 1
+    backend.clear()
+    assert len(backend) == 0
+
+
+def test_sqlite_backend_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a, worker_b = TTLCache(SQLiteCacheBackend(path)), TTLCache(SQLiteCacheBackend(path))
+
+    worker_a.get_or_compute("trends", 60, lambda: {"days": [1, 2, 3], "at": "2024-01-01"})
+
+    # Values round-trip through JSON
+    assert worker_b.get_or_compute("trends", 60, lambda: pytest.fail("recomputed")) == {"days": [1, 2, 3], "at": "2024-01-01"}
+    # An invalidation in one worker clears the shared entries for all of them
+    worker_b.invalidate()
+    assert worker_a.backend.get("trends") is None
+    assert worker_a.stats()["backend"] == "SQLiteCacheBackend"
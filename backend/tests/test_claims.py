@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend import crud, models
+from backend.database import SessionLocal
+from conftest import percentile, seed_listings, seed_users
+
+CLAIMERS = int(os.getenv("CLAIM_STRESS_CLAIMERS", "8"))
+ROUNDS = int(os.getenv("CLAIM_STRESS_ROUNDS", "15"))
+# Generous so a slow CI box does not flake; tighten locally with the env var
+CLAIM_P99_BUDGET_MS = float(os.getenv("CLAIM_P99_BUDGET_MS", "2000"))
+
+
+def test_claim_moves_listing_to_claimed(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+
+    response = client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "claimed"
+    assert response.json()["claimed_by_id"] == ngo["id"]
+
+
+def test_claim_errors(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+
+    assert client.patch(f"/api/surplus-listings/999/claim?ngo_id={ngo['id']}").status_code == 404
+    assert client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={owner['id']}").status_code == 400
+    client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+    assert client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}").status_code == 400
+
+
+def test_concurrent_claims_have_exactly_one_winner(client, make_user, make_listing):
+    owner = make_user()
+    ngos = [make_user("ngo") for _ in range(CLAIMERS)]
+    latencies_ms = []
+
+    def claim(listing_id, ngo_id):
+        start = time.perf_counter()
+        response = client.patch(f"/api/surplus-listings/{listing_id}/claim?ngo_id={ngo_id}")
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        return response
+
+    with ThreadPoolExecutor(CLAIMERS) as pool:
+        for _ in range(ROUNDS):
+            listing = make_listing(owner["id"])
+            responses = list(pool.map(lambda ngo: claim(listing["id"], ngo["id"]), ngos))
+
+            codes = sorted(response.status_code for response in responses)
+            assert codes == [200] + [400] * (CLAIMERS - 1)
+            winner = next(response.json() for response in responses if response.status_code == 200)
+            stored = client.get(f"/api/surplus-listings?status=claimed&claimed_by={winner['claimed_by_id']}").json()
+            assert listing["id"] in [row["id"] for row in stored]
+
+    # Every losing claim left the winner's counters alone
+    stats = client.get(f"/api/dashboard/stats/{owner['id']}").json()
+    assert stats["claimed_listings"] == ROUNDS
+
+    p99 = percentile(latencies_ms, 0.99)
+    print(f"\nclaim latency over {len(latencies_ms)} contended claims: "
+          f"p50 {percentile(latencies_ms, 0.5):.1f} ms, p99 {p99:.1f} ms")
+    assert p99 < CLAIM_P99_BUDGET_MS
+
+
+def load_check_commit_claim(db, listing_id, ngo_id):
+    """The claim as it was before the conditional UPDATE, with today's bookkeeping."""
+    ngo = db.query(models.User).filter(models.User.id == ngo_id).first()
+    if not ngo or ngo.role != "ngo":
+        return None
+    listing = db.query(models.SurplusListing).filter(models.SurplusListing.id == listing_id).first()
+    if not listing or listing.status != "available":
+        return None
+    listing.status = "claimed"
+    listing.claimed_by_id = ngo_id
+    crud.bump_user_stats(db, crud._claim_deltas([listing]))
+    db.commit()
+    db.refresh(listing)
+    crud.notify_listing_change(db, "claimed", [listing])
+    return listing
+
+
+def conditional_update_claim(db, listing_id, ngo_id):
+    if crud.get_user_role(db, ngo_id) != "ngo":
+        return None
+    return crud.claim_surplus_listing(db, listing_id, ngo_id)
+
+
+def test_conditional_update_has_lower_p99_than_load_check_commit(db):
+    owner_ids = seed_users(db, 1)
+    ngo_ids = seed_users(db, CLAIMERS, role="ngo")
+    seed_listings(db, 2 * ROUNDS, owner_ids, seed=3)
+    db.query(models.SurplusListing).update({"status": "available"})
+    db.commit()
+    listing_ids = [row.id for row in db.query(models.SurplusListing.id).order_by(models.SurplusListing.id)]
+    paths = (load_check_commit_claim, conditional_update_claim)
+    latencies_ms = {path: [] for path in paths}
+    winners = {path: [] for path in paths}
+
+    def claim(path, listing_id, ngo_id, barrier):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            start = time.perf_counter()
+            won = path(session, listing_id, ngo_id) is not None
+            latencies_ms[path].append((time.perf_counter() - start) * 1000)
+            return won
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(CLAIMERS) as pool:
+        # Alternate the paths listing by listing so both see the same machine load
+        for index, listing_id in enumerate(listing_ids):
+            path = paths[index % 2]
+            barrier = threading.Barrier(CLAIMERS)
+            winners[path].append(sum(pool.map(lambda ngo_id: claim(path, listing_id, ngo_id, barrier), ngo_ids)))
+
+    assert winners[conditional_update_claim] == [1] * ROUNDS
+    p99 = {path: percentile(latencies_ms[path], 0.99) for path in paths}
+    for path in paths:
+        print(f"\n{path.__name__}: p50 {percentile(latencies_ms[path], 0.5):.1f} ms, p99 {p99[path]:.1f} ms, "
+              f"up to {max(winners[path])} winners per listing")
+    assert p99[conditional_update_claim] < p99[load_check_commit_claim]
@@ -0,0 +1,91 @@
+import os
+import shutil
+import time
+import joblib
+import numpy as np
+import pytest
+from backend.compiled_forest import COMPILED_MODEL_FILE, CompiledModel, artifact_version, export_compiled_model
+from backend.model_registry import CAT_FEATURES, NUM_FEATURES, LoadedModel, load_model
+from conftest import feature_rows
+
+LATENCY_REPEATS = int(os.getenv("COMPILED_BENCH_REPEATS", "50"))
+
+
+@pytest.fixture
+def compiled_dir(model_dir, tmp_path):
+    for name in ("rf_model.pkl", "encoder.pkl", "scaler.pkl"):
+        shutil.copy2(model_dir / name, tmp_path)
+    export_compiled_model(
+        joblib.load(tmp_path / "rf_model.pkl"),
+        joblib.load(tmp_path / "encoder.pkl"),
+        joblib.load(tmp_path / "scaler.pkl"),
+        str(tmp_path / COMPILED_MODEL_FILE),
+        source_version=artifact_version(tmp_path),
+    )
+    return tmp_path
+
+
+def sklearn_model(model_dir):
+    return LoadedModel(
+        "sklearn",
+        rf_model=joblib.load(model_dir / "rf_model.pkl"),
+        encoder=joblib.load(model_dir / "encoder.pkl"),
+        scaler=joblib.load(model_dir / "scaler.pkl"),
+    )
+
+
+def test_compiled_predictions_equal_sklearn(compiled_dir):
+    compiled = load_model(str(compiled_dir))
+    assert compiled.compiled_model is not None
+    reference = sklearn_model(compiled_dir)
+
+    rows = feature_rows(500, seed=7)
+    rows.append(dict(rows[0], **{"Type of Food": "Unseen food", "Geographical Location": "Moon"}))
+    assert compiled.predict(rows) == reference.predict(rows)
+
+
+def test_compiled_predictions_equal_sklearn_at_thresholds(compiled_dir):
+    """Inputs sitting exactly on split points are where float rounding would show."""
+    rf_model = joblib.load(compiled_dir / "rf_model.pkl")
+    scaler = joblib.load(compiled_dir / "scaler.pkl")
+    n_categorical = rf_model.n_features_in_ - len(NUM_FEATURES)
+    rows = []
+    for estimator in rf_model.estimators_[:5]:
+        tree = estimator.tree_
+        for feature, threshold in zip(tree.feature, tree.threshold):
+            if feature < n_categorical:
+                continue
+            numeric = list(scaler.mean_)
+            numeric[feature - n_categorical] += threshold * scaler.scale_[feature - n_categorical]
+            rows.append(dict(feature_rows(1, seed=len(rows))[0], **dict(zip(NUM_FEATURES, numeric))))
+
+    assert rows
+    assert load_model(str(compiled_dir)).predict(rows) == sklearn_model(compiled_dir).predict(rows)
+
+
+def test_compiled_model_loads_without_mmap(compiled_dir):
+    path = str(compiled_dir / COMPILED_MODEL_FILE)
+    mapped, loaded = CompiledModel.load(path), CompiledModel.load(path, mmap=False)
+    rows = feature_rows(50, seed=8)
+    X = mapped.transform([[row[feat] for feat in CAT_FEATURES] for row in rows],
+                         [[row[feat] for feat in NUM_FEATURES] for row in rows])
+    assert isinstance(mapped.value, np.memmap)
+    assert np.array_equal(mapped.predict(X), loaded.predict(X))
+
+
+def test_compiled_model_is_faster(compiled_dir):
+    compiled = load_model(str(compiled_dir))
+    reference = sklearn_model(compiled_dir)
+    timings = {}
+    for size in (1, 256):
+        rows = feature_rows(size, seed=9)
+        for name, model in (("compiled", compiled), ("sklearn", reference)):
+            model.predict(rows)  # warm up
+            start = time.perf_counter()
+            for _ in range(LATENCY_REPEATS):
+                model.predict(rows)
+            timings[name, size] = (time.perf_counter() - start) * 1000 / LATENCY_REPEATS
+
+    print("\n" + ", ".join(f"{name} batch {size}: {ms:.2f} ms" for (name, size), ms in timings.items()))
+    # Single requests are the common case; sklearn pays fixed per-call overhead there
+    assert timings["compiled", 1] < timings["sklearn", 1]
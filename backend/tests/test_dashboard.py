@@ -0,0 +1,57 @@
+import pytest
+from conftest import capture_queries
+
+
+@pytest.fixture
+def populated(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listings = [make_listing(owner["id"], quantity_kg=float(index + 1)) for index in range(8)]
+    for listing in listings[:3]:
+        client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+    return owner, ngo
+
+
+@pytest.mark.parametrize("role", ["restaurant", "ngo"])
+def test_full_dashboard_takes_two_queries(client, populated, role):
+    owner, ngo = populated
+    user = ngo if role == "ngo" else owner
+
+    with capture_queries() as queries:
+        response = client.get(f"/api/dashboard/{user['id']}")
+
+    assert response.status_code == 200
+    assert len(queries) == 2, [statement for statement, _ in queries]
+    body = response.json()
+    assert body["stats"] == client.get(f"/api/dashboard/stats/{user['id']}").json()
+    if role == "ngo":
+        # An NGO's activity is what it claimed
+        assert len(body["recent_activity"]) == 3
+        assert len(body["available_listings"]) == 5
+        assert "ngo_analytics" in body
+    else:
+        assert body["recent_activity"] == client.get(f"/api/dashboard/recent-activity/{user['id']}").json()
+
+
+def test_stats_alone_take_one_query(client, populated):
+    owner, _ = populated
+
+    with capture_queries() as queries:
+        body = client.get(f"/api/dashboard/{owner['id']}?fields=stats").json()
+
+    assert len(queries) == 1
+    assert set(body) == {"user_id", "role", "stats"}
+
+
+def test_invalid_fields_are_rejected(client, populated):
+    owner, ngo = populated
+
+    for user, fields in ((owner, "bogus"), (owner, "stats,ngo_analytics"), (ngo, "stats, available_listing")):
+        response = client.get(f"/api/dashboard/{user['id']}", params={"fields": fields})
+        assert response.status_code == 400
+        assert "choose from" in response.json()["detail"]
+    assert client.get("/api/dashboard/999999").status_code == 404
+    # Whitespace and empty entries are tolerated
+    assert set(client.get(f"/api/dashboard/{ngo['id']}", params={"fields": " stats, ,ngo_analytics "}).json()) == {
+        "user_id", "role", "stats", "ngo_analytics",
+    }
@@ -0,0 +1,128 @@
+from sqlalchemy import event
+from backend import crud
+from backend.broker import broker
+from backend.database import engine
+from conftest import capture_queries
+
+REVALIDATIONS = 20
+
+
+def test_conditional_get_round_trip(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+
+    first = client.get("/api/surplus-listings")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    with capture_queries() as queries:
+        cached = client.get("/api/surplus-listings", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    # Only the change-version lookup, never the listings query
+    assert len(queries) == 1
+    assert "change_versions" in queries[0][0]
+
+    # Another query string is another representation
+    assert client.get("/api/surplus-listings?limit=10", headers={"If-None-Match": etag}).status_code == 200
+
+    client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+    changed = client.get("/api/surplus-listings", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json() == []
+
+
+def test_my_listings_etag_follows_the_owner(client, make_user, make_listing):
+    owner = make_user()
+    other = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+
+    etag = client.get(f"/api/surplus-listings/mine?user_id={owner['id']}").headers["ETag"]
+    assert client.get(f"/api/surplus-listings/mine?user_id={owner['id']}",
+                      headers={"If-None-Match": etag}).status_code == 304
+
+    # Someone else's write leaves the owner's version alone
+    make_listing(other["id"])
+    assert client.get(f"/api/surplus-listings/mine?user_id={owner['id']}",
+                      headers={"If-None-Match": etag}).status_code == 304
+
+    client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+    response = client.get(f"/api/surplus-listings/mine?user_id={owner['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["status"] == "claimed"
+
+
+def test_unknown_user_is_404_even_with_matching_etag(client):
+    for if_none_match in ("*", 'W/"0-000000000000"'):
+        response = client.get("/api/surplus-listings/mine?user_id=999", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 404
+
+
+def test_etags_save_bytes(client, make_user, make_listing):
+    owner = make_user()
+    for index in range(50):
+        make_listing(owner["id"], description=f"Vegetable biryani tray {index}")
+
+    full = sum(len(client.get("/api/surplus-listings").content) for _ in range(REVALIDATIONS))
+    etag = client.get("/api/surplus-listings").headers["ETag"]
+    conditional = sum(
+        len(client.get("/api/surplus-listings", headers={"If-None-Match": etag}).content)
+        for _ in range(REVALIDATIONS)
+    )
+
+    print(f"\n{REVALIDATIONS} polls of 50 listings: {full} body bytes without ETags, {conditional} with")
+    assert conditional == 0
+    assert full > 50 * REVALIDATIONS
+
+
+def test_versions_move_after_the_write_commits(client, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+    steps = []
+
+    def on_statement(conn, cursor, statement, parameters, context, executemany):
+        steps.append(statement.split()[0] + (" change_versions" if "change_versions" in statement else ""))
+
+    def on_commit(conn):
+        steps.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", on_statement)
+    event.listen(engine, "commit", on_commit)
+    try:
+        client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+    finally:
+        event.remove(engine, "before_cursor_execute", on_statement)
+        event.remove(engine, "commit", on_commit)
+
+    first_version_write = next(i for i, step in enumerate(steps) if step.endswith("change_versions"))
+    # The claim's own transaction never locks the shared version rows
+    assert "COMMIT" in steps[:first_version_write]
+    assert steps[-1] == "COMMIT"
+
+
+def test_writes_succeed_when_the_version_bump_fails(client, make_user, make_listing, monkeypatch):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listing = make_listing(owner["id"])
+    etag = client.get("/api/surplus-listings").headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("change_versions is locked")
+
+    monkeypatch.setattr(crud, "bump_change_versions", fail)
+    cursor = broker.latest_cursor
+    response = client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}")
+
+    # The claim committed, so it is reported as done and the rest of the fan-out still ran
+    assert response.status_code == 200
+    assert [event["type"] for event in broker.events_since(cursor)] == ["claimed"]
+    assert client.patch(f"/api/surplus-listings/{listing['id']}/claim?ngo_id={ngo['id']}").status_code == 400
+
+    # The next write that bumps the versions moves the ETag again
+    monkeypatch.undo()
+    make_listing(owner["id"])
+    assert client.get("/api/surplus-listings", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,28 @@
+import csv
+import io
+import json
+from conftest import login
+
+
+def test_export_requires_admin(client, make_user):
+    assert client.get("/api/export/surplus_listings").status_code == 401
+    assert client.get("/api/export/surplus_listings",
+                      headers={"Authorization": "Bearer not-a-token"}).status_code == 401
+    user = make_user()
+    assert client.get("/api/export/surplus_listings", headers=login(client, user["email"])).status_code == 403
+
+
+def test_export_streams_rows(client, make_user, make_listing, admin_headers):
+    owner = make_user()
+    for index in range(3):
+        make_listing(owner["id"], description=f"Vegetable biryani tray {index}")
+
+    response = client.get("/api/export/surplus_listings", headers=admin_headers)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["description"] for row in rows] == [f"Vegetable biryani tray {index}" for index in range(3)]
+
+    response = client.get("/api/export/surplus_listings?format=ndjson", headers=admin_headers)
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [int(row["id"]) for row in rows]
+
+    assert client.get("/api/export/users", headers=admin_headers).status_code == 404
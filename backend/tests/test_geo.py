@@ -0,0 +1,94 @@
+import math
+import random
+import pytest
+from sqlalchemy import insert
+from backend import crud, geo, models
+from conftest import seed_users
+
+
+def destination(lat, lon, bearing_degrees, distance_km):
+    """The point ``distance_km`` from (lat, lon) along ``bearing_degrees``."""
+    phi1, lmb1 = math.radians(lat), math.radians(lon)
+    theta = math.radians(bearing_degrees)
+    delta = distance_km / geo.EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lmb2 = lmb1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2),
+    )
+    return math.degrees(phi2), (math.degrees(lmb2) + 540) % 360 - 180
+
+
+def covered(ranges, cell):
+    return any(low <= cell <= high for low, high in ranges)
+
+
+CENTERS = [
+    (12.97, 77.59),     # Bengaluru
+    (-16.5, 179.98),    # Fiji, east of the antimeridian
+    (65.0, -179.97),    # Chukotka, west of it
+    (89.96, 10.0),      # in the top row of cells
+    (-89.99, -45.0),    # in the bottom row
+    (0.0, 0.0),
+]
+
+
+@pytest.mark.parametrize("lat, lon", CENTERS)
+@pytest.mark.parametrize("radius_km", [0.5, 10, 200])
+def test_cell_ranges_cover_the_whole_circle(lat, lon, radius_km):
+    ranges = geo.cell_ranges(lat, lon, radius_km)
+    assert ranges == sorted(ranges)
+    rng = random.Random(0)
+    for _ in range(2000):
+        # The boundary itself is the likeliest place for a gap
+        distance = radius_km * (1.0 if rng.random() < 0.3 else rng.random())
+        point = destination(lat, lon, rng.uniform(0, 360), distance)
+        assert covered(ranges, geo.cell_for(*point)), point
+
+
+def test_ranges_wrap_around_the_antimeridian():
+    ranges = geo.cell_ranges(-16.5, 179.98, 10)
+    row = geo._row(-16.5)
+    last_column = geo._COLUMNS - 1
+    assert covered(ranges, row * geo._COLUMNS + last_column)
+    assert covered(ranges, row * geo._COLUMNS)
+    # ...without sweeping the rest of the row in between
+    assert not covered(ranges, row * geo._COLUMNS + geo._COLUMNS // 2)
+
+
+def test_near_pole_ranges_span_whole_rows():
+    ranges = geo.cell_ranges(89.96, 10.0, 1)
+    top = geo._ROWS - 1
+    assert all(covered(ranges, top * geo._COLUMNS + column) for column in (0, geo._COLUMNS // 2, geo._COLUMNS - 1))
+
+
+def test_nearby_matches_a_brute_force_scan(db):
+    owner_ids = seed_users(db, 1)
+    rng = random.Random(1)
+    rows = []
+    for lat, lon in CENTERS:
+        for _ in range(150):
+            point = destination(lat, lon, rng.uniform(0, 360), rng.uniform(0, 60))
+            rows.append({
+                "user_id": owner_ids[0],
+                "description": "Seeded tray",
+                "quantity_kg": 5.0,
+                "status": rng.choice(("available", "available", "claimed")),
+                "latitude": point[0],
+                "longitude": point[1],
+                "geo_cell": geo.cell_for(*point),
+            })
+    db.execute(insert(models.SurplusListing.__table__), rows)
+    db.commit()
+    available = db.query(models.SurplusListing).filter(models.SurplusListing.status == "available").all()
+
+    for lat, lon in CENTERS:
+        for radius_km in (5, 25):
+            expected = sorted(
+                (geo.haversine_km(lat, lon, listing.latitude, listing.longitude), listing.id)
+                for listing in available
+                if geo.haversine_km(lat, lon, listing.latitude, listing.longitude) <= radius_km
+            )
+            found = crud.list_nearby_surplus_listings(db, lat, lon, radius_km, limit=len(rows))
+            assert [listing.id for listing, _ in found] == [listing_id for _, listing_id in expected]
+            assert [distance for _, distance in found] == pytest.approx([distance for distance, _ in expected])
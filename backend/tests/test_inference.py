@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import pytest
+from backend import api
+from backend.config import settings
+from backend.inference import InferenceExecutor, InferenceQueueFull
+
+
+class RecordingPredict:
+    """Doubles each input and remembers every batch it was called with."""
+
+    def __init__(self, release=None):
+        self.calls = []
+        self.release = release
+
+    def __call__(self, inputs, model):
+        self.calls.append((model, list(inputs)))
+        if self.release is not None:
+            self.release.wait(5)
+        return [model * value for value in inputs]
+
+
+def test_requests_within_the_window_share_one_call():
+    predict = RecordingPredict()
+    executor = InferenceExecutor(predict, batch_window_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(executor.predict([index, index + 10], 2) for index in range(5)))
+
+    results = asyncio.run(run())
+
+    assert results == [[2 * index, 2 * (index + 10)] for index in range(5)]
+    assert len(predict.calls) == 1
+    assert len(predict.calls[0][1]) == 10
+    assert executor.metrics["batches"] == 1
+    assert executor.metrics["batch_requests"]["8"] == 1
+    assert executor.metrics["batch_rows"]["16"] == 1
+    assert executor.stats()["queue_depth"] == 0
+
+
+def test_batches_are_grouped_by_model():
+    predict = RecordingPredict()
+    executor = InferenceExecutor(predict, batch_window_ms=20)
+    old_model, new_model = 2, 3
+
+    async def run():
+        return await asyncio.gather(
+            executor.predict([1, 2], old_model),
+            executor.predict([3], new_model),
+            executor.predict([4], old_model),
+        )
+
+    # Every request is answered by its own model
+    assert asyncio.run(run()) == [[2, 4], [9], [8]]
+    assert sorted(predict.calls) == [(old_model, [1, 2, 4]), (new_model, [3])]
+    assert executor.metrics["batches"] == 2
+
+
+def test_a_full_batch_is_sent_without_waiting_for_the_window():
+    predict = RecordingPredict()
+    # The window would outlast the test
+    executor = InferenceExecutor(predict, batch_window_ms=60_000, max_batch_rows=4)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(executor.predict([1, 2], 1), executor.predict([3, 4], 1)), 5)
+
+    assert asyncio.run(run()) == [[1, 2], [3, 4]]
+    assert predict.calls == [(1, [1, 2, 3, 4])]
+
+
+def test_a_failed_batch_fails_every_request_in_it():
+    def predict(inputs, model):
+        raise ValueError("bad row")
+
+    executor = InferenceExecutor(predict, batch_window_ms=20)
+
+    async def run():
+        return await asyncio.gather(executor.predict([1], 1), executor.predict([2], 1), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(run())] == ["bad row", "bad row"]
+    assert executor.metrics["errors"] == 1
+    assert executor.queue_depth == 0
+
+
+def test_a_full_queue_rejects_new_requests():
+    release = threading.Event()
+    predict = RecordingPredict(release)
+    executor = InferenceExecutor(predict, queue_size=2, batch_window_ms=1)
+
+    async def run():
+        running = [asyncio.ensure_future(executor.predict([index], 1)) for index in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceQueueFull):
+            await executor.predict([2], 1)
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(run()) == [[0], [1]]
+    assert executor.metrics["rejected"] == 1
+    # Room frees up once the running batch is answered
+    assert asyncio.run(executor.predict([5], 1)) == [5]
+
+
+def test_queue_depth_histogram_counts_arrivals_at_an_empty_queue():
+    executor = InferenceExecutor(RecordingPredict(), batch_window_ms=20)
+
+    async def run():
+        await executor.predict([1], 1)
+        await asyncio.gather(*(executor.predict([index], 1) for index in range(3)))
+
+    asyncio.run(run())
+
+    # Two arrivals found nothing queued, one found one and one found two
+    assert executor.metrics["queue_depth_on_arrival"]["0"] == 2
+    assert executor.metrics["queue_depth_on_arrival"]["1"] == 1
+    assert executor.metrics["queue_depth_on_arrival"]["2"] == 1
+
+
+def test_shorting_answers_503_with_retry_after_when_the_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(api, "inference_executor", InferenceExecutor(RecordingPredict(), queue_size=0))
+    request = {
+        "event_type": "Wedding",
+        "guest_count": 100,
+        "food_types": "Rice, Dal",
+        "seasonality": "Summer",
+        "location": "Urban",
+        "quantity_of_food": 150.0,
+    }
+
+    for path, body in (("/api/predictive-shorting", request), ("/api/predictive-shorting/batch", [request])):
+        response = client.post(path, json=body)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.INFERENCE_RETRY_AFTER_SECONDS)
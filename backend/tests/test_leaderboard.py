@@ -0,0 +1,70 @@
+import os
+import time
+from backend import crud, models
+from backend.rebuild_stats import reconcile
+from conftest import seed_listings, seed_users
+
+LEADERBOARD_BENCH_USERS = int(os.getenv("LEADERBOARD_BENCH_USERS", "5000"))
+LEADERBOARD_BENCH_LISTINGS = int(os.getenv("LEADERBOARD_BENCH_LISTINGS", "50000"))
+
+
+def brute_force_top(db, k, roles=None):
+    """Score every user from their listings in Python and take the top ``k``."""
+    listings_by_user = {}
+    for listing in db.query(models.SurplusListing):
+        listings_by_user.setdefault(listing.user_id, []).append(listing)
+    scores = []
+    for user in db.query(models.User):
+        listings = listings_by_user.get(user.id)
+        if not listings or (roles and user.role not in roles):
+            continue
+        collected = len([l for l in listings if l.status == "collected"])
+        ai_optimized = len([l for l in listings if l.ai_optimized])
+        quantity = sum(l.quantity_kg for l in listings)
+        score = collected * 30.0 / len(listings) + ai_optimized * 30.0 / len(listings) + min(40.0, quantity * 0.4)
+        scores.append((-score, user.id))
+    return [user_id for _, user_id in sorted(scores)[:k]]
+
+
+def seed_leaderboard(db, users, listings):
+    restaurants = seed_users(db, users // 2)
+    stores = seed_users(db, users - users // 2, "store")
+    ngos = seed_users(db, 10, "ngo")
+    seed_listings(db, listings, restaurants + stores, ngos)
+    reconcile(db)
+    return restaurants, stores
+
+
+def test_leaderboard_is_the_true_top_k(client, db):
+    restaurants, stores = seed_leaderboard(db, 60, 600)
+
+    for top_k in (1, 5, 20):
+        body = client.get(f"/api/analytics/platform?top_k={top_k}").json()
+        assert [user["user_id"] for user in body["top_performing_users"]] == brute_force_top(db, top_k)
+
+    body = client.get("/api/analytics/platform?top_k=10&roles=store").json()
+    ranked = [user["user_id"] for user in body["top_performing_users"]]
+    assert ranked == brute_force_top(db, 10, roles={"store"})
+    assert set(ranked) <= set(stores)
+
+
+def test_leaderboard_rejects_out_of_range_k(client):
+    assert client.get("/api/analytics/platform?top_k=0").status_code == 422
+    assert client.get("/api/analytics/platform?top_k=101").status_code == 422
+
+
+def test_leaderboard_benchmark(db):
+    seed_leaderboard(db, LEADERBOARD_BENCH_USERS, LEADERBOARD_BENCH_LISTINGS)
+    db.expunge_all()
+
+    start = time.perf_counter()
+    top = [row.user_id for row in crud.top_users_by_impact(db, 10)]
+    sql_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = brute_force_top(db, 10)
+    python_seconds = time.perf_counter() - start
+
+    print(f"\ntop 10 of {LEADERBOARD_BENCH_USERS} users / {LEADERBOARD_BENCH_LISTINGS} listings: "
+          f"rollup query {sql_seconds * 1000:.1f} ms, scoring every listing {python_seconds * 1000:.1f} ms")
+    assert top == expected
+    assert sql_seconds < python_seconds
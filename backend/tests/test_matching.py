@@ -0,0 +1,143 @@
+import pytest
+from backend import crud, models
+from backend.geo import haversine_km
+from backend.matching import solve_assignment
+from backend.rebuild_stats import compute_rollups
+from conftest import login
+
+# One degree of latitude is about 111 km
+KM = 1 / 111.19
+
+
+def test_ngo_capacity_is_never_exceeded():
+    listings = [(1, 0.0, 0.0, 4.0), (2, 0.0, 0.0, 6.0), (3, 0.0, 0.0, 4.0)]
+    ngos = [(10, 0.0, 0.0, 10.0)]
+
+    assignments = solve_assignment(listings, ngos, max_distance_km=25)
+
+    # Larger listings go first on equal distance: 6 + 4 fills the NGO
+    assert [(listing_id, ngo_id) for listing_id, ngo_id, _, _ in assignments] == [(2, 10), (1, 10)]
+    assert sum(quantity for _, _, _, quantity in assignments) <= 10.0
+
+
+def test_unlimited_capacity_takes_everything_nearest_first():
+    listings = [(1, 0.0, 0.0, 50.0), (2, 10 * KM, 0.0, 50.0)]
+    ngos = [(10, 0.0, 0.0, None), (11, 10 * KM, 0.0, None)]
+
+    assignments = solve_assignment(listings, ngos, max_distance_km=25)
+
+    assert sorted((listing_id, ngo_id) for listing_id, ngo_id, _, _ in assignments) == [(1, 10), (2, 11)]
+    assert all(distance < 0.01 for _, _, distance, _ in assignments)
+
+
+def test_pairs_beyond_max_distance_are_not_matched():
+    listings = [(1, 0.0, 0.0, 1.0), (2, 30 * KM, 0.0, 1.0)]
+    ngos = [(10, 0.0, 0.0, None)]
+
+    assert [listing_id for listing_id, _, _, _ in solve_assignment(listings, ngos, max_distance_km=25)] == [1]
+    far = solve_assignment(listings, ngos, max_distance_km=40)
+    assert sorted(listing_id for listing_id, _, _, _ in far) == [1, 2]
+    assert max(distance for _, _, distance, _ in far) == pytest.approx(30, rel=0.01)
+
+
+def test_only_the_nearest_candidates_are_considered():
+    # The nearest NGO is already full; the second nearest has room
+    listings = [(1, 0.0, 0.0, 5.0)]
+    ngos = [(10, 1 * KM, 0.0, 0.0), (11, 2 * KM, 0.0, 100.0), (12, 3 * KM, 0.0, 100.0)]
+
+    assert solve_assignment(listings, ngos, max_distance_km=25, candidates=1) == []
+    [(_, ngo_id, distance, _)] = solve_assignment(listings, ngos, max_distance_km=25, candidates=2)
+    assert ngo_id == 11
+    assert distance == pytest.approx(haversine_km(0.0, 0.0, 2 * KM, 0.0))
+
+
+def test_matches_agree_with_brute_force_distances():
+    listings = [(i, 12.9 + 0.01 * (i % 7), 77.5 + 0.013 * (i % 11), 1.0 + i % 5) for i in range(300)]
+    ngos = [(1000 + j, 12.9 + 0.02 * (j % 4), 77.5 + 0.03 * (j // 4), 40.0) for j in range(16)]
+    by_id = {row[0]: row for row in listings + ngos}
+
+    assignments = solve_assignment(listings, ngos, max_distance_km=8, candidates=4)
+
+    load = {}
+    for listing_id, ngo_id, distance, quantity in assignments:
+        listing, ngo = by_id[listing_id], by_id[ngo_id]
+        assert distance == pytest.approx(haversine_km(listing[1], listing[2], ngo[1], ngo[2]))
+        assert distance <= 8
+        # The NGO is one of the listing's four nearest
+        nearer = sum(haversine_km(listing[1], listing[2], other[1], other[2]) < distance - 1e-9 for other in ngos)
+        assert nearer < 4
+        load[ngo_id] = load.get(ngo_id, 0.0) + quantity
+    assert len({listing_id for listing_id, _, _, _ in assignments}) == len(assignments)
+    assert all(total <= 40.0 for total in load.values())
+
+
+@pytest.fixture
+def matching_setup(make_user, make_listing):
+    owner = make_user(latitude=0.0, longitude=0.0)
+    near = make_user("ngo", latitude=0.0, longitude=1 * KM, capacity_kg=100.0)
+    other = make_user("ngo", latitude=0.0, longitude=2 * KM, capacity_kg=100.0)
+    listings = [make_listing(owner["id"], quantity_kg=float(index + 1)) for index in range(4)]
+    return owner, near, other, listings
+
+
+def run(client, headers, **request):
+    return client.post("/api/matching/run", json=request, headers=headers)
+
+
+def test_matching_requires_an_admin(client, make_user, matching_setup):
+    assert run(client, {}, dry_run=False).status_code == 401
+    _, near, _, _ = matching_setup
+    assert run(client, login(client, near["email"]), dry_run=False).status_code == 403
+    assert client.get("/api/surplus-listings?status=claimed").json() == []
+
+
+def test_dry_run_claims_nothing(client, admin_headers, matching_setup):
+    _, near, _, listings = matching_setup
+
+    body = run(client, admin_headers).json()
+
+    assert body["dry_run"] is True
+    assert {row["listing_id"] for row in body["assignments"]} == {listing["id"] for listing in listings}
+    assert {row["ngo_id"] for row in body["assignments"]} == {near["id"]}
+    assert body["claimed_count"] == 0
+    assert body["matched_kg"] == 10.0
+    assert client.get("/api/surplus-listings?status=claimed").json() == []
+
+
+def test_commit_reports_only_what_it_claimed(client, db, admin_headers, matching_setup, monkeypatch):
+    owner, near, other, listings = matching_setup
+    taken = listings[2]
+    load_matching_inputs = crud.load_matching_inputs
+
+    def load_then_lose_a_race(session):
+        inputs = load_matching_inputs(session)
+        # Another NGO claims one listing between the solve and the commit
+        assert client.patch(f"/api/surplus-listings/{taken['id']}/claim?ngo_id={other['id']}").status_code == 200
+        return inputs
+
+    monkeypatch.setattr(crud, "load_matching_inputs", load_then_lose_a_race)
+    body = run(client, admin_headers, dry_run=False).json()
+
+    assert sorted(row["listing_id"] for row in body["assignments"]) == sorted(
+        listing["id"] for listing in listings if listing is not taken
+    )
+    assert body["claimed_count"] == 3
+    assert body["matched_kg"] == 10.0 - taken["quantity_kg"]
+    assert body["unmatched_listing_ids"] == []
+    claimed_by = {listing.id: listing.claimed_by_id for listing in db.query(models.SurplusListing)}
+    assert claimed_by[taken["id"]] == other["id"]
+    assert [claimed_by[listing["id"]] for listing in listings if listing is not taken] == [near["id"]] * 3
+    assert compute_rollups(db)[near["id"]]["ngo_active_claims"] == 3
+
+
+def test_commit_is_all_or_nothing(client, db, admin_headers, matching_setup, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("rollup write failed")
+
+    # Fails after every NGO's UPDATE has run, before the commit
+    monkeypatch.setattr(crud, "bump_user_stats", fail)
+    response = run(client, admin_headers, dry_run=False)
+
+    assert response.status_code == 500
+    db.expire_all()
+    assert {listing.status for listing in db.query(models.SurplusListing)} == {"available"}
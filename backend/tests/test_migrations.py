@@ -0,0 +1,67 @@
+import datetime
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from backend import crud, models
+from backend.config import settings
+from backend.rebuild_stats import compute_rollups
+from conftest import seed_listings, seed_users
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_user_listing_stats_migration_backfills_rollups(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    # alembic/env.py takes its URL from the settings
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    command.upgrade(config, "7685eb73821e")
+
+    engine = create_engine(url)
+    with Session(engine) as db:
+        owners = seed_users(db, 4)
+        ngos = seed_users(db, 3, "ngo")
+        seed_users(db, 2, "store")  # no listings: gets no rollup row
+        seed_listings(db, 400, owners, ngos)
+        expected = compute_rollups(db)
+
+    command.upgrade(config, "4466b7ce1412")
+
+    with Session(engine) as db:
+        stored = {
+            stats.user_id: {name: getattr(stats, name) for name in crud.ROLLUP_COUNTERS}
+            for stats in db.query(models.UserListingStats)
+        }
+    engine.dispose()
+    assert set(stored) == set(owners) | set(ngos)
+    for user_id, counters in expected.items():
+        for name, value in counters.items():
+            assert abs(stored[user_id][name] - value) < 1e-6, (user_id, name)
+
+
+def test_listing_expiry_migration_backfills_available_listings(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    command.upgrade(config, "20d8b855b3ac")
+
+    engine = create_engine(url)
+    with Session(engine) as db:
+        seed_listings(db, 200, seed_users(db, 3), seed_users(db, 2, "ngo"))
+
+    command.upgrade(config, "45ae25389f4f")
+
+    with Session(engine) as db:
+        rows = db.execute(text("SELECT status, created_at, expires_at FROM surplus_listings")).all()
+    engine.dispose()
+    assert {status for status, _, _ in rows} == {"available", "claimed", "collected", "expired"}
+    shelf_life = datetime.timedelta(hours=settings.LISTING_DEFAULT_TTL_HOURS)
+    for status, created_at, expires_at in rows:
+        if status == "available":
+            assert datetime.datetime.fromisoformat(expires_at) == datetime.datetime.fromisoformat(created_at) + shelf_life
+        else:
+            assert expires_at is None
@@ -0,0 +1,57 @@
+import json
+import pytest
+from backend.api.auth import create_access_token
+from backend.model_registry import HOLDOUT_FILE, TARGET, ModelRegistry, ModelValidationError
+from conftest import feature_rows, login
+
+
+def test_admins_cannot_self_register(client):
+    response = client.post("/api/auth/register", json={
+        "email": "mallory@example.com", "name": "Mallory", "role": "admin", "password": "secret",
+    })
+    assert response.status_code == 403
+    assert client.post("/api/auth/login", data={"username": "mallory@example.com", "password": "secret"}).status_code == 401
+
+
+def test_admin_role_is_checked_against_the_database(client, make_user, admin_headers):
+    assert client.get("/api/admin/model", headers=admin_headers).status_code == 200
+
+    user = make_user()
+    assert client.get("/api/admin/model", headers=login(client, user["email"])).status_code == 403
+    # A token claiming a role its user does not have grants nothing
+    forged = create_access_token({"sub": user["email"], "role": "admin", "user_id": user["id"]})
+    assert client.get("/api/admin/model", headers={"Authorization": f"Bearer {forged}"}).status_code == 403
+
+
+@pytest.fixture
+def registry(tmp_path, model_dir):
+    registry = ModelRegistry(str(tmp_path))
+    registry.register(str(model_dir), "v1")
+    return registry
+
+
+def write_holdout(registry, rows):
+    with open(f"{registry.root}/{HOLDOUT_FILE}", "w") as out:
+        json.dump(rows, out)
+
+
+def test_reload_without_holdout_keeps_the_served_model(registry):
+    served = registry.current
+    with pytest.raises(ModelValidationError):
+        registry.reload("v1")
+    assert registry.current is served
+    assert registry.metrics["failed_reloads"] == 1
+
+    # Rows without the target cannot measure anything either
+    write_holdout(registry, feature_rows(20))
+    with pytest.raises(ModelValidationError):
+        registry.reload("v1")
+    assert registry.current is served
+
+
+def test_reload_with_holdout_records_its_mae(registry):
+    write_holdout(registry, [{**row, TARGET: row["Quantity of Food"] * 0.1} for row in feature_rows(20)])
+    model = registry.reload("v1")
+    assert registry.current is model
+    assert model.version == "v1"
+    assert model.holdout_mae is not None
@@ -0,0 +1,155 @@
+import os
+import subprocess
+import sys
+import time
+from backend.model_registry import load_model
+from conftest import feature_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BATCH_SIZES = [int(size) for size in os.getenv("SHORTING_BENCH_BATCH_SIZES", "1,16,256").split(",")]
+# How much more a ten-type menu may cost than a single food type
+MENU_COST_RATIO = float(os.getenv("SHORTING_BENCH_MENU_COST_RATIO", "2"))
+
+
+def shorting_request(index):
+    return {
+        "event_type": ("Wedding", "Corporate", "Birthday")[index % 3],
+        "guest_count": 80 + 20 * index,
+        "food_types": ("Rice, Dal", "Meat", "Vegetables, Fruits, Dairy Products")[index % 3],
+        "seasonality": "Summer",
+        "location": "Urban",
+        "quantity_of_food": 150.0 + 10 * index,
+    }
+
+
+def test_batch_matches_single_requests(client, model_dir, serve_model):
+    serve_model(load_model(str(model_dir)))
+    requests = [shorting_request(index) for index in range(6)]
+
+    singles = [client.post("/api/predictive-shorting", json=request).json() for request in requests]
+    batch = client.post("/api/predictive-shorting/batch", json=requests)
+
+    assert batch.status_code == 200
+    assert batch.json() == singles
+
+
+def test_batch_size_is_capped(client):
+    response = client.post("/api/predictive-shorting/batch", json=[shorting_request(0)] * 501)
+    assert response.status_code == 400
+
+
+def test_per_item_cost_falls_with_batch_size(model_dir):
+    model = load_model(str(model_dir))
+    rows = feature_rows(max(BATCH_SIZES), seed=1)
+    per_item_ms = {}
+    for size in BATCH_SIZES:
+        repeats = max(3, 512 // size)
+        model.predict(rows[:size])  # warm up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model.predict(rows[:size])
+        per_item_ms[size] = (time.perf_counter() - start) * 1000 / (repeats * size)
+
+    print("\nper-item predict cost: " + ", ".join(f"batch {size}: {cost:.3f} ms" for size, cost in per_item_ms.items()))
+    costs = [per_item_ms[size] for size in BATCH_SIZES]
+    assert costs == sorted(costs, reverse=True)
+    assert costs[-1] < costs[0] / 5
+
+
+def test_a_long_menu_costs_about_one_prediction(model_dir):
+    from backend import schemas
+    from backend.api import shorting_inputs, shorting_response
+
+    model = load_model(str(model_dir))
+    menus = {
+        1: "Rice",
+        10: "Meat, Vegetables, Fruits, Baked Goods, Dairy Products, Rice, Dal, Paneer, Naan, Salad",
+    }
+    cost_ms = {}
+    for types, food_types in menus.items():
+        request = schemas.PredictiveShortingRequest(**dict(shorting_request(0), food_types=food_types))
+
+        def shorting():
+            inputs = shorting_inputs(request)
+            return shorting_response(request, inputs, model.predict(inputs), model.version)
+
+        assert len(shorting().food_type_breakdown) == types
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            shorting()
+            timings.append((time.perf_counter() - start) * 1000)
+        cost_ms[types] = sorted(timings)[len(timings) // 2]
+
+    print(f"\nmedian shorting cost: 1 food type {cost_ms[1]:.3f} ms, 10 food types {cost_ms[10]:.3f} ms")
+    # One stacked predict call, not one per food type
+    assert cost_ms[10] < cost_ms[1] * MENU_COST_RATIO
+
+
+def test_cached_predictions_are_exact_by_default(model_dir, serve_model):
+    from backend.api import cached_predict_wastage_batch, prediction_cache
+
+    model = serve_model(load_model(str(model_dir)))
+    rows = [dict(row, **{"Quantity of Food": row["Quantity of Food"] + 0.37}) for row in feature_rows(20, seed=2)]
+
+    assert cached_predict_wastage_batch(rows, model) == model.predict(rows)
+    hits = prediction_cache.stats()["hits"]
+    assert cached_predict_wastage_batch(rows, model) == model.predict(rows)
+    assert prediction_cache.stats()["hits"] == hits + len(rows)
+
+
+def test_quantity_buckets_are_opt_in(model_dir, serve_model, monkeypatch):
+    from backend.api import cached_predict_wastage_batch
+    from backend.config import settings
+
+    model = serve_model(load_model(str(model_dir)))
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_QUANTITY_BUCKET_KG", 10.0)
+    row = feature_rows(1, seed=3)[0]
+    nearby = [dict(row, **{"Quantity of Food": quantity}) for quantity in (201.0, 203.5, 198.0)]
+
+    predictions = cached_predict_wastage_batch(nearby, model)
+    assert predictions == [model.predict([dict(row, **{"Quantity of Food": 200.0})])[0]] * 3
+
+
+class ConstantModel:
+    version = "constant"
+
+    def __init__(self, wastage_kg):
+        self.wastage_kg = wastage_kg
+
+    def predict(self, input_dicts):
+        return [self.wastage_kg] * len(input_dicts)
+
+
+def test_wastage_never_exceeds_the_food_supplied(client, serve_model):
+    for wastage_kg in (1e6, -50.0):
+        serve_model(ConstantModel(wastage_kg))
+        requests = [shorting_request(index) for index in range(6)]
+        response = client.post("/api/predictive-shorting/batch", json=requests)
+        assert response.status_code == 200
+
+        for request, result in zip(requests, response.json()):
+            assert 0 <= result["predicted_wastage_kg"] <= request["quantity_of_food"]
+            assert 0 <= result["suggested_shorting_kg"] <= request["quantity_of_food"]
+            for item in result["food_type_breakdown"]:
+                assert 0 <= item["predicted_wastage_kg"] <= item["quantity_of_food"]
+
+
+def test_impossible_events_are_rejected(client, serve_model):
+    serve_model(ConstantModel(1.0))
+    invalid = [{"guest_count": -10}, {"quantity_of_food": -150.0}, {"quantity_of_food": 0}, {"food_types": " , "}, {"food_types": ""}]
+
+    for fields in invalid:
+        request = dict(shorting_request(0), **fields)
+        assert client.post("/api/predictive-shorting", json=request).status_code == 422, fields
+        assert client.post("/api/predictive-shorting/batch", json=[shorting_request(1), request]).status_code == 422, fields
+    # An event with no guests yet is still valid
+    assert client.post("/api/predictive-shorting", json=dict(shorting_request(0), guest_count=0)).status_code == 200
+
+
+def test_schemas_import_without_protected_namespace_warnings():
+    result = subprocess.run(
+        [sys.executable, "-W", "always", "-c", "import backend.schemas"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    assert "protected namespace" not in result.stderr
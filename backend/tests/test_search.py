@@ -0,0 +1,56 @@
+def search(client, q, **params):
+    response = client.get("/api/surplus-listings/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_better_matches_rank_first(client, make_user, make_listing):
+    owner = make_user()
+    weak = make_listing(owner["id"], description="Rice, dal, three curries, salad, naan and a little paneer on the side")
+    strong = make_listing(owner["id"], description="Paneer tikka with extra paneer")
+    make_listing(owner["id"], description="Chicken biryani")
+    both = make_listing(owner["id"], description="Paneer butter masala and paneer tikka")
+
+    # Same term frequency, so the shorter description wins
+    assert [row["id"] for row in search(client, "paneer")] == [strong["id"], both["id"], weak["id"]]
+    # Every word has to match
+    assert [row["id"] for row in search(client, "paneer tikka")] == [strong["id"], both["id"]]
+
+
+def test_query_syntax_is_treated_as_plain_words(client, make_user, make_listing):
+    owner = make_user()
+    listing = make_listing(owner["id"], description="Leftover naan OR roti from lunch")
+
+    assert [row["id"] for row in search(client, 'naan" OR "x')] == []
+    assert [row["id"] for row in search(client, "naan OR roti")] == [listing["id"]]
+    assert search(client, "*:-") == []
+
+
+def test_pages_neither_repeat_nor_skip_listings(client, make_user):
+    owner = make_user()
+    # Equal ranks, so only the id tie-breaker orders them
+    items = [{"description": f"Fresh bread loaves batch {index}", "quantity_kg": 1.0, "photo_url": None} for index in range(45)]
+    client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=items)
+
+    pages = [search(client, "bread", limit=10, offset=offset) for offset in range(0, 50, 10)]
+
+    seen = [row["id"] for page in pages for row in page]
+    assert len(seen) == 45
+    assert seen == sorted(seen, reverse=True)
+    assert [len(page) for page in pages] == [10, 10, 10, 10, 5]
+
+
+def test_bulk_created_listings_are_searchable(client, make_user):
+    owner = make_user()
+    ngo = make_user("ngo")
+    items = [{"description": description, "quantity_kg": 2.0, "photo_url": None} for description in ("Mango lassi", "Veg pulao", "Mango pickle")]
+
+    created_ids = client.post(f"/api/surplus-listings/bulk?user_id={owner['id']}", json=items).json()["created_ids"]
+
+    assert sorted(row["id"] for row in search(client, "mango")) == sorted([created_ids[0], created_ids[2]])
+    assert [row["id"] for row in search(client, "pulao")] == [created_ids[1]]
+
+    # Status filters apply to search results too
+    client.patch(f"/api/surplus-listings/{created_ids[0]}/claim?ngo_id={ngo['id']}")
+    assert [row["id"] for row in search(client, "mango")] == [created_ids[2]]
+    assert sorted(row["id"] for row in search(client, "mango", status="all")) == sorted([created_ids[0], created_ids[2]])
@@ -0,0 +1,175 @@
+import json
+import os
+import subprocess
+import sys
+import joblib
+import pytest
+from backend.compiled_forest import COMPILED_MODEL_FILE, artifact_version, export_compiled_model
+from backend.model_registry import load_model
+from conftest import feature_rows
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKERS = int(os.getenv("SHARED_MODEL_WORKERS", "4"))
+
+# Maps the compiled model, reads every page, then holds the mapping until stdin closes
+WORKER = """
+import sys
+import numpy as np
+from backend.compiled_forest import CompiledModel
+model = CompiledModel.load(sys.argv[1])
+for array in (model.feature, model.threshold, model.children, model.value):
+    np.asarray(array).sum()
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def mapping_usage(pid, path):
+    """Sum the smaps counters (kB) of every mapping of ``path`` in process ``pid``."""
+    totals = {}
+    in_mapping = False
+    with open(f"/proc/{pid}/smaps") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if "-" in fields[0] and ":" not in fields[0]:
+                in_mapping = fields[-1] == path
+            elif in_mapping and fields[0].endswith(":") and len(fields) >= 2 and fields[1].isdigit():
+                totals[fields[0][:-1]] = totals.get(fields[0][:-1], 0) + int(fields[1])
+    return totals
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps"), reason="needs /proc/<pid>/smaps (Linux)")
+def test_workers_share_one_copy_of_the_compiled_model(model_dir):
+    path = str(model_dir / COMPILED_MODEL_FILE)
+    if not os.path.exists(path):
+        export_compiled_model(
+            joblib.load(model_dir / "rf_model.pkl"), joblib.load(model_dir / "encoder.pkl"),
+            joblib.load(model_dir / "scaler.pkl"), path, source_version=artifact_version(model_dir),
+        )
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER, path], cwd=ROOT, stdin=subprocess.PIPE,
+                         stdout=subprocess.PIPE, text=True)
+        # Pages only one process maps count as private, so always start two
+        for _ in range(max(2, WORKERS))
+    ]
+    try:
+        for worker in workers:
+            assert worker.stdout.readline().strip() == "ready"
+        usage = [mapping_usage(worker.pid, path) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait(timeout=30)
+
+    print(f"\ncompiled model mapping per worker (kB): {usage}")
+    for counters in usage:
+        assert counters["Rss"] > 0
+        # Page-cache pages mapped by both workers, no private copies; each is charged about half
+        assert counters["Private_Clean"] + counters["Private_Dirty"] == 0
+        assert counters["Shared_Clean"] + counters["Shared_Dirty"] == counters["Rss"]
+        assert counters["Pss"] <= counters["Rss"] * 0.6
+
+
+# Loads the model the way the API does, with sklearn already imported so
+# only the model's own memory is measured, then holds it until stdin closes
+SERVING_WORKER = """
+import json
+import sys
+import sklearn.ensemble, sklearn.preprocessing
+from backend.model_registry import load_model
+
+def pss_kb():
+    with open("/proc/self/smaps_rollup") as rollup:
+        return next(int(line.split()[1]) for line in rollup if line.startswith("Pss:"))
+
+before = pss_kb()
+model = load_model(sys.argv[1])
+model.predict(json.loads(sys.argv[2]))
+print("ready", before, model.compiled_model is not None, flush=True)
+sys.stdin.read()
+"""
+
+
+def worker_pss_growth_kb(model_dir, compiled):
+    """PSS (kB) that WORKERS concurrently serving ``model_dir`` add, in total."""
+    workers = [
+        subprocess.Popen([sys.executable, "-c", SERVING_WORKER, str(model_dir), json.dumps(feature_rows(200))],
+                         cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(WORKERS)
+    ]
+    try:
+        baselines = []
+        for worker in workers:
+            ready, baseline, is_compiled = worker.stdout.readline().split()
+            assert ready == "ready" and is_compiled == str(compiled)
+            baselines.append(int(baseline))
+        # Read once every worker holds the model, so shared pages are split between all of them
+        growth = []
+        for worker, baseline in zip(workers, baselines):
+            with open(f"/proc/{worker.pid}/smaps_rollup") as rollup:
+                pss = next(int(line.split()[1]) for line in rollup if line.startswith("Pss:"))
+            growth.append(pss - baseline)
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait(timeout=30)
+    return sum(growth)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs /proc/<pid>/smaps_rollup (Linux)")
+def test_compiled_model_memory_does_not_grow_per_worker(model_dir, tmp_path):
+    pickles_dir, compiled_dir = tmp_path / "pickles", tmp_path / "compiled"
+    for directory in (pickles_dir, compiled_dir):
+        directory.mkdir()
+        for name in ("rf_model.pkl", "encoder.pkl", "scaler.pkl"):
+            (directory / name).write_bytes((model_dir / name).read_bytes())
+    export_compiled_model(
+        joblib.load(compiled_dir / "rf_model.pkl"), joblib.load(compiled_dir / "encoder.pkl"),
+        joblib.load(compiled_dir / "scaler.pkl"), str(compiled_dir / COMPILED_MODEL_FILE),
+        source_version=artifact_version(compiled_dir),
+    )
+
+    # Before: each worker unpickles its own forest (joblib mmap_mode='r' does
+    # not help, sklearn copies the tree arrays into private memory)
+    pickled_kb = worker_pss_growth_kb(pickles_dir, compiled=False)
+    # After: every worker maps the same compiled file
+    compiled_kb = worker_pss_growth_kb(compiled_dir, compiled=True)
+    forest_kb = os.path.getsize(compiled_dir / COMPILED_MODEL_FILE) / 1024
+
+    print(f"\nmodel memory across {WORKERS} workers: pickles {pickled_kb} kB, compiled {compiled_kb} kB "
+          f"(compiled file {forest_kb:.0f} kB)")
+    assert pickled_kb > WORKERS * forest_kb * 0.5
+    assert compiled_kb < pickled_kb / 2
+
+
+def test_artifact_version_follows_contents(model_dir, tmp_path):
+    for name in ("rf_model.pkl", "encoder.pkl", "scaler.pkl"):
+        (tmp_path / name).write_bytes((model_dir / name).read_bytes())
+    version = artifact_version(tmp_path)
+    assert version == artifact_version(model_dir)
+
+    # Touching a file keeps the version
+    os.utime(tmp_path / "scaler.pkl", ns=(1, 1))
+    assert artifact_version(tmp_path) == version
+
+    # Same size and mtime, different bytes: a new version
+    scaler = tmp_path / "scaler.pkl"
+    stat = scaler.stat()
+    data = bytearray(scaler.read_bytes())
+    data[-2] ^= 0xFF
+    scaler.write_bytes(bytes(data))
+    os.utime(scaler, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert artifact_version(tmp_path) != version
+
+
+def test_stale_compiled_model_is_ignored(model_dir, tmp_path):
+    for name in ("rf_model.pkl", "encoder.pkl", "scaler.pkl"):
+        (tmp_path / name).write_bytes((model_dir / name).read_bytes())
+    export_compiled_model(
+        joblib.load(tmp_path / "rf_model.pkl"), joblib.load(tmp_path / "encoder.pkl"),
+        joblib.load(tmp_path / "scaler.pkl"), str(tmp_path / COMPILED_MODEL_FILE),
+        source_version="not-these-pickles",
+    )
+    model = load_model(str(tmp_path))
+    assert model.compiled_model is None
+    assert model.rf_model is not None
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+from backend.api import stream
+from backend.broker import FileLogBroker, InMemoryBroker
+from conftest import seed_listings, seed_users
+
+
+class Request:
+    """Stands in for the Starlette request; only disconnect polling is used."""
+
+    def __init__(self, disconnected=True):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def parse_sse(chunks):
+    """(id, event, data) of every message; comments are skipped."""
+    messages = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n") if not line.startswith(":"))
+        if fields:
+            messages.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return messages
+
+
+def read_stream(broker, monkeypatch, publish_while_streaming=(), **params):
+    """Run the stream endpoint on ``broker`` until it stops and return its messages."""
+    monkeypatch.setattr(stream, "broker", broker)
+    request = params.pop("request", Request())
+
+    async def run():
+        response = await stream.stream_surplus_listings(
+            request, cursor=params.get("cursor"), last_event_id=params.get("last_event_id")
+        )
+
+        async def collect():
+            return [chunk async for chunk in response.body_iterator]
+
+        reading = asyncio.ensure_future(collect())
+        if publish_while_streaming:
+            # Let the stream send its backlog and start waiting for live events
+            await asyncio.sleep(0.05)
+            for event_type, payload in publish_while_streaming:
+                broker.publish(event_type, payload)
+        return await asyncio.wait_for(reading, 5)
+
+    return parse_sse(asyncio.run(run()))
+
+
+def publish_many(broker, count):
+    return [broker.publish("created", {"id": index}) for index in range(count)]
+
+
+def test_resume_from_last_event_id_sends_only_missed_events(monkeypatch):
+    broker = InMemoryBroker()
+    cursors = publish_many(broker, 4)
+
+    messages = read_stream(broker, monkeypatch, last_event_id=str(cursors[1]))
+
+    assert messages == [(str(cursors[2]), "created", {"id": 2}), (str(cursors[3]), "created", {"id": 3})]
+    # The query parameter wins over the header
+    assert read_stream(broker, monkeypatch, cursor=cursors[2], last_event_id=str(cursors[0]))[0][2] == {"id": 3}
+
+
+def test_unretained_cursor_falls_back_to_a_snapshot(db, monkeypatch):
+    owner_ids = seed_users(db, 1)
+    seed_listings(db, 10, owner_ids)
+    broker = InMemoryBroker(history_size=2)
+    cursors = publish_many(broker, 5)
+
+    for params in ({}, {"cursor": cursors[0]}, {"cursor": cursors[-1] + 100}, {"last_event_id": "garbage"}):
+        messages = read_stream(broker, monkeypatch, **params)
+        assert [(message_id, event_type) for message_id, event_type, _ in messages] == [(str(cursors[-1]), "snapshot")]
+    # Still retained: no snapshot
+    assert [event_type for _, event_type, _ in read_stream(broker, monkeypatch, cursor=cursors[-2])] == ["created"]
+
+
+def test_snapshot_is_capped_at_snapshot_limit(db, monkeypatch):
+    owner_ids = seed_users(db, 1)
+    seed_listings(db, 40, owner_ids)
+    monkeypatch.setattr(stream, "SNAPSHOT_LIMIT", 3)
+
+    [(_, event_type, data)] = read_stream(InMemoryBroker(), monkeypatch)
+
+    assert event_type == "snapshot"
+    assert len(data["listings"]) == 3
+    assert all(listing["status"] == "available" for listing in data["listings"])
+
+
+def test_slow_subscriber_is_told_to_resync(monkeypatch):
+    broker = InMemoryBroker(queue_size=2)
+    cursors = publish_many(broker, 2)
+
+    # Five events arrive before the client reads any of them
+    messages = read_stream(
+        broker, monkeypatch, cursor=cursors[0], request=Request(disconnected=False),
+        publish_while_streaming=[("created", {"id": index}) for index in range(2, 7)],
+    )
+
+    assert [event_type for _, event_type, _ in messages] == ["created", "resync"]
+    assert messages[-1][2] == {"cursor": cursors[1]}
+    assert not broker._subscribers
+
+
+def test_in_memory_events_since():
+    broker = InMemoryBroker(history_size=3)
+    cursors = publish_many(broker, 5)
+
+    assert broker.events_since(cursors[-1]) == []
+    assert [event["data"]["id"] for event in broker.events_since(cursors[1])] == [2, 3, 4]
+    assert broker.events_since(cursors[0]) is None
+    assert broker.events_since(cursors[-1] + 1) is None
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "events.log")
+
+
+def test_file_log_replays_from_any_retained_cursor(log_path):
+    broker = FileLogBroker(log_path, history_size=2, poll_interval=0.01)
+    cursors = publish_many(broker, 5)
+    wait_for(lambda: broker.latest_cursor == cursors[-1])
+
+    assert cursors == sorted(cursors)
+    # Beyond the in-memory history the log itself is read
+    assert [event["data"]["id"] for event in broker.events_since(0)] == [0, 1, 2, 3, 4]
+    assert [event["cursor"] for event in broker.events_since(cursors[0])] == cursors[1:]
+
+
+def test_file_log_is_compacted_and_cursors_keep_counting(log_path):
+    broker = FileLogBroker(log_path, history_size=2, poll_interval=0.01, max_bytes=2000)
+    cursors = publish_many(broker, 200)
+    wait_for(lambda: broker.latest_cursor == cursors[-1])
+
+    assert os.path.getsize(log_path) <= 2000
+    assert cursors == sorted(cursors)
+    # Old cursors were compacted away; recent ones still replay exactly
+    assert broker.events_since(0) is None
+    retained = broker.events_since(cursors[-20])
+    assert [event["data"]["id"] for event in retained] == list(range(181, 200))
+    assert [event["cursor"] for event in retained] == cursors[-19:]
+
+    # A worker started now continues from the same cursors
+    late = FileLogBroker(log_path, poll_interval=0.01, max_bytes=2000)
+    assert late.latest_cursor == cursors[-1]
+    assert broker.publish("created", {"id": 200}) > cursors[-1]
+
+
+def test_lagging_worker_resyncs_its_subscribers_after_compaction(log_path):
+    # The tail thread stays asleep; the test polls by hand
+    broker = FileLogBroker(log_path, poll_interval=3600, max_bytes=2000)
+
+    async def run():
+        subscription = broker.subscribe()
+        cursors = publish_many(broker, 200)
+        broker._tail_once()
+        assert await asyncio.wait_for(subscription.get(), 1) is None
+        # Then the worker catches up on what the log still holds
+        broker._tail_once()
+        assert broker.latest_cursor == cursors[-1]
+
+    asyncio.run(run())
+
+
+def test_logs_without_a_header_are_started_over(log_path):
+    with open(log_path, "w") as log:
+        log.write('{"type": "created", "data": {}}\n')
+
+    broker = FileLogBroker(log_path, poll_interval=0.01)
+
+    assert broker.latest_cursor == 0
+    assert broker.publish("created", {"id": 1}) > 0
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,57 @@
+import datetime
+from backend import models
+from backend.rebuild_stats import compute_rollups
+from backend.sweeper import ExpirySweeper
+
+
+def hours_ago(hours):
+    return (datetime.datetime.utcnow() - datetime.timedelta(hours=hours)).isoformat()
+
+
+def listing_statuses(db):
+    db.expire_all()
+    return {listing.id: listing.status for listing in db.query(models.SurplusListing)}
+
+
+def test_each_tick_expires_at_most_max_batches(db, make_user, make_listing):
+    owner = make_user()
+    # Oldest expiry first: ids in creation order are due longest ago
+    due = [make_listing(owner["id"], expires_at=hours_ago(50 - index))["id"] for index in range(25)]
+    fresh = make_listing(owner["id"], expires_at=(datetime.datetime.utcnow() + datetime.timedelta(hours=1)).isoformat())
+    sweeper = ExpirySweeper(interval_seconds=60, batch_size=10, max_batches=2)
+
+    assert sweeper.tick() == 20
+    statuses = listing_statuses(db)
+    assert [statuses[listing_id] for listing_id in due] == ["expired"] * 20 + ["available"] * 5
+    assert sweeper.metrics["last_tick_batches"] == 2
+    # The 21st listing has been due for 30 hours
+    assert 30 * 3600 - 60 < sweeper.metrics["lag_seconds"] < 30 * 3600 + 60
+
+    assert sweeper.tick() == 5
+    assert sweeper.metrics["lag_seconds"] == 0.0
+    assert sweeper.metrics["last_tick_batches"] == 1
+    assert listing_statuses(db)[fresh["id"]] == "available"
+
+    assert sweeper.tick() == 0
+    assert sweeper.metrics["ticks"] == 3
+    assert sweeper.metrics["total_expired"] == 25
+
+
+def test_expiry_moves_rollups_and_spares_claimed_listings(client, db, make_user, make_listing):
+    owner = make_user()
+    ngo = make_user("ngo")
+    listings = [make_listing(owner["id"], quantity_kg=2.0, expires_at=hours_ago(1)) for _ in range(4)]
+    client.patch(f"/api/surplus-listings/{listings[0]['id']}/claim?ngo_id={ngo['id']}")
+    before = client.get(f"/api/dashboard/stats/{owner['id']}").json()
+
+    assert ExpirySweeper(interval_seconds=60, batch_size=2, max_batches=5).tick() == 3
+
+    after = client.get(f"/api/dashboard/stats/{owner['id']}").json()
+    assert after["active_listings"] == before["active_listings"] - 3
+    assert listing_statuses(db)[listings[0]["id"]] == "claimed"
+    # The rollups match a recount from the listings themselves
+    stored = {stats.user_id: stats for stats in db.query(models.UserListingStats)}
+    for user_id, counters in compute_rollups(db).items():
+        for name, value in counters.items():
+            assert abs(getattr(stored[user_id], name) - value) < 1e-6, (user_id, name)
+    assert compute_rollups(db)[owner["id"]]["expired_listings"] == 3
@@ -71,18 +71,34 @@ const NgoDashboardPage = () => {
       const controller = new AbortController();
       const timeoutId = setTimeout(() => controller.abort(), 10000); // 10 second timeout
       
+      // The listings endpoint is paged: follow X-Next-Cursor until the last page
+      const fetchAllListings = async (query: string): Promise<Listing[] | null> => {
+        const all: Listing[] = [];
+        let cursor: string | null = null;
+        do {
+          const url = `http://localhost:8000/surplus-listings?${query}&limit=200` +
+            (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+          const res = await fetch(url, {
+            signal: controller.signal,
+            headers: { 'Cache-Control': 'no-cache' }
+          });
+          if (!res.ok) {
+            console.error("Listings response not ok:", res.status);
+            return null;
+          }
+          all.push(...(await res.json()));
+          cursor = res.headers.get("X-Next-Cursor");
+        } while (cursor);
+        return all;
+      };
+
       // Try sequential requests instead of parallel to avoid resource issues
-      const listingsRes = await fetch("http://localhost:8000/surplus-listings", {
-        signal: controller.signal,
-        headers: { 'Cache-Control': 'no-cache' }
-      });
+      const availableListings = await fetchAllListings("status=available");
+      const claimedListings = await fetchAllListings(`status=claimed&claimed_by=${user.id}`);
 
-      if (listingsRes.ok) {
-        const listingsData = await listingsRes.json();
-        setListings(listingsData);
+      if (availableListings && claimedListings) {
+        setListings([...availableListings, ...claimedListings]);
         success = true;
-      } else {
-        console.error("Listings response not ok:", listingsRes.status);
       }
 
       const analyticsRes = await fetch(`http://localhost:8000/analytics/ngo/${user.id}`, {
@@ -4,6 +4,7 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
+from backend.compiled_forest import COMPILED_MODEL_FILE, artifact_version, export_compiled_model
 
 # 1. Load your data
 df = pd.read_csv('food_wastage_data.csv')
@@ -80,4 +81,7 @@ joblib.dump(encoder, 'encoder.pkl')
 # Save the StandardScaler
 joblib.dump(scaler, 'scaler.pkl')
 
+# Save the compiled, memory-mappable copy the API serves from
+export_compiled_model(best_rf, encoder, scaler, COMPILED_MODEL_FILE, source_version=artifact_version('.'))
+
 print("Model, encoder, and scaler saved successfully!")